@@ -6,15 +6,88 @@ import sys
 import json
 import tarfile
 import shutil
+import gzip
+import struct
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, Tuple, Set
 import argparse
 from io import BytesIO
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Попытка импортировать Zstandard (быстрее и компактнее gzip)
+try:
+    import pyzstd
+    HAS_PYZSTD = True
+except ImportError:
+    HAS_PYZSTD = False
+
+# Попытка импортировать многопоточный gzip (если Zstandard недоступен)
+try:
+    import pgzip
+    HAS_PGZIP = True
+except ImportError:
+    HAS_PGZIP = False
+
+# Попытка импортировать быстрый сериализатор JSON
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Попытка импортировать msgpack (компактные двоичные метаданные)
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+# Сигнатуры форматов сжатия (первые байты архива)
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Максимальный размер заголовка кадра Zstandard
+ZSTD_FRAME_HEADER_MAX_SIZE = 18
+
+# Пропускаемый кадр Zstandard (сигнатура и размер данных, little-endian):
+# в нем в начале архива хранится словарь, которым сжат архив (архивы,
+# созданные, пока резервные копии сжимались со словарем)
+ZSTD_SKIPPABLE_MAGIC = b'\x50\x2a\x4d\x18'
+ZSTD_SKIPPABLE_HEADER = struct.Struct('<4sI')
+
+
+def _parse_ts(ts: str) -> datetime:
+    """
+    Разбирает временную метку YYYYMMDD_HHMMSS из имени архива
+    
+    Формат фиксирован, поэтому поля берутся срезами без strptime
+    
+    Raises:
+        ValueError: если строка не соответствует формату
+    """
+    if len(ts) != 15 or ts[8] != '_':
+        raise ValueError(f"Неверный формат временной метки: {ts}")
+    return datetime(int(ts[0:4]), int(ts[4:6]), int(ts[6:8]),
+                    int(ts[9:11]), int(ts[11:13]), int(ts[13:15]))
+
+
+class _TarFragment(tarfile.TarFile):
+    """
+    Фрагмент tar архива без завершающих нулевых блоков
+    
+    Фрагменты записываются параллельно и склеиваются друг за другом,
+    конец архива записывает только последний, обычный TarFile
+    """
+    
+    def close(self):
+        self.closed = True
+
 
 class BackupRestore:
     """Класс для резервного копирования и восстановления рабочих данных"""
@@ -34,6 +107,46 @@ class BackupRestore:
         'README.md',
     ]
     
+    # Журнал резервных копий (одна строка JSON на архив, только дозапись)
+    INDEX_FILENAME = 'index.ndjson'
+    
+    # Служебные файлы и директории, которые не попадают в резервную копию
+    EXCLUDED_NAMES = frozenset({'__pycache__', '.DS_Store', '.git'})
+    EXCLUDED_SUFFIXES = ('.pyc', '.tmp', '.log')
+    
+    # Уже сжатые форматы: такие файлы записываются в архив без повторного сжатия
+    PRECOMPRESSED_SUFFIXES = ('.pdf', '.png', '.jpg', '.jpeg', '.zip', '.gz', '.zst', '.docx')
+    
+    # Поддерживаемые расширения архивов (первое - формат по умолчанию)
+    ARCHIVE_EXTENSIONS = ['.tar.zst', '.tar.gz']
+    
+    # Уровень сжатия Zstandard по умолчанию
+    ZSTD_LEVEL = 3
+    
+    # Допустимые уровни сжатия (для gzip уровни выше 9 ограничиваются 9)
+    MIN_LEVEL = 1
+    MAX_LEVEL = 22
+    
+    # Размер буфера копирования данных между файлами и архивом
+    COPY_BUFFER_SIZE = 4 * 1024 * 1024
+    
+    # Количество потоков для чтения метаданных резервных копий
+    LIST_WORKERS = 8
+    
+    # Упреждающее чтение файлов при архивации: потоки чтения на директорию,
+    # глубина очереди (файлов) и максимальный размер файла, читаемого целиком
+    READ_WORKERS = 4
+    PREFETCH_FILES = 64
+    PREFETCH_MAX_SIZE = 1024 * 1024
+    
+    # Количество потоков для удаления файлов (операции упираются в системные вызовы)
+    RMTREE_WORKERS = (os.cpu_count() or 1) * 4
+    
+    # Параметры gzip: уровень по умолчанию (уровень 9 почти не уменьшает
+    # размер уже сжатых PDF и изображений, но в разы медленнее) и размер блока pgzip
+    GZIP_LEVEL = 3
+    GZIP_BLOCK_SIZE = 2 * 1024 * 1024
+    
     def __init__(self, base_dir: str = ".", backup_dir: str = "backups"):
         """
         Инициализация
@@ -45,11 +158,296 @@ class BackupRestore:
         self.base_dir = Path(base_dir).resolve()
         self.backup_dir = Path(backup_dir).resolve()
         self.backup_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Строковые пути для циклов (без создания объектов Path)
+        self._base_str = str(self.base_dir)
+        self._backup_str = str(self.backup_dir)
+    
+    @classmethod
+    def _timestamp_from_name(cls, filename: str) -> str:
+        """Извлекает временную метку из имени архива backup_YYYYMMDD_HHMMSS.tar.*"""
+        start = len('backup_') if filename.startswith('backup_') else 0
+        for extension in cls.ARCHIVE_EXTENSIONS:
+            if filename.endswith(extension):
+                return filename[start:-len(extension)]
+        return filename[start:]
+    
+    @staticmethod
+    def _encode_metadata(metadata: Dict) -> bytes:
+        """Сериализует метаданные в JSON (UTF-8, с отступами)"""
+        if HAS_ORJSON:
+            return orjson.dumps(metadata, option=orjson.OPT_INDENT_2)
+        return json.dumps(metadata, ensure_ascii=False, indent=2).encode('utf-8')
+    
+    @staticmethod
+    def _is_non_empty_dir(dir_path: str) -> bool:
+        """Проверяет, что директория существует и не пуста (читает не более одной записи)"""
+        try:
+            with os.scandir(dir_path) as it:
+                return next(it, None) is not None
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+    
+    @classmethod
+    def _parallel_rmtree(cls, root: Path):
+        """
+        Удаляет дерево директорий, распределяя удаление файлов по потокам
+        
+        Args:
+            root: Удаляемая директория
+        """
+        files = []
+        dirs = []
+        stack = [os.fspath(root)]
+        while stack:
+            dir_path = stack.pop()
+            dirs.append(dir_path)
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        files.append(entry.path)
+        
+        if files:
+            with ThreadPoolExecutor(max_workers=min(cls.RMTREE_WORKERS, len(files))) as executor:
+                list(executor.map(os.unlink, files, chunksize=64))
+        
+        # Директории удаляем от вложенных к корню
+        for dir_path in reversed(dirs):
+            os.rmdir(dir_path)
+    
+    @classmethod
+    def _move_aside(cls, target_dir: Path) -> Optional[Path]:
+        """
+        Освобождает место под восстанавливаемую директорию
+        
+        Директория переименовывается рядом (одна операция с метаданными
+        файловой системы) и удаляется после успешного восстановления.
+        Если переименование невозможно, директория удаляется сразу
+        
+        Returns:
+            Путь к перенесенной директории или None, если она удалена
+        """
+        aside_dir = target_dir.with_name(f".{target_dir.name}.restore_old")
+        if aside_dir.exists():
+            cls._parallel_rmtree(aside_dir)
+        try:
+            os.rename(target_dir, aside_dir)
+            return aside_dir
+        except OSError:
+            cls._parallel_rmtree(target_dir)
+            return None
+    
+    @classmethod
+    def _exclude_junk(cls, tarinfo: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+        """Фильтр для tar.add: отбрасывает служебные файлы (вместе с содержимым директорий)"""
+        if os.path.basename(tarinfo.name) in cls.EXCLUDED_NAMES:
+            return None
+        if tarinfo.name.endswith(cls.EXCLUDED_SUFFIXES):
+            return None
+        return tarinfo
+    
+    @contextmanager
+    def _open_compressor(self, backup_path: Path, fileobj,
+                         level: Optional[int] = None, store: bool = False):
+        """
+        Оборачивает открытый файл сжимающим потоком
+        
+        Для .tar.zst используется многопоточный Zstandard, иначе gzip
+        (многопоточный через pgzip, если он установлен). Каждый вызов
+        записывает самостоятельный кадр zstd (член gzip), поэтому
+        результаты нескольких вызовов можно склеивать в один файл
+        
+        Args:
+            backup_path: Путь к архиву (определяет формат сжатия)
+            fileobj: Файл, открытый на запись в двоичном режиме
+            level: Уровень сжатия (None - уровень по умолчанию для формата)
+            store: Записывать уже сжатые данные без сжатия (самый быстрый режим)
+        """
+        if backup_path.name.endswith('.tar.zst'):
+            if store:
+                # Несжимаемые данные Zstandard сохраняет как есть, минимальный
+                # уровень лишь сокращает время на попытку сжатия
+                level = pyzstd.CParameter.compressionLevel.bounds()[0]
+            options = {
+                pyzstd.CParameter.compressionLevel: level or self.ZSTD_LEVEL,
+                pyzstd.CParameter.nbWorkers: os.cpu_count() or 1,
+            }
+            with pyzstd.ZstdFile(fileobj, 'wb', level_or_option=options) as cout:
+                yield cout
+            return
+        
+        # У gzip максимальный уровень - 9
+        gzip_level = min(level, 9) if level else self.GZIP_LEVEL
+        if store:
+            gzip_level = 0
+        if HAS_PGZIP:
+            with pgzip.PgzipFile(fileobj=fileobj, mode='wb',
+                                 compresslevel=gzip_level,
+                                 thread=os.cpu_count() or 1,
+                                 blocksize=self.GZIP_BLOCK_SIZE) as cout:
+                yield cout
+        else:
+            with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=gzip_level) as cout:
+                yield cout
+    
+    def _iter_tree(self, tar: tarfile.TarFile, path: str, arcname: str):
+        """
+        Обходит дерево в том же порядке, что и tar.add, применяя фильтр служебных файлов
+        
+        Yields:
+            (TarInfo, путь к файлу)
+        """
+        tarinfo = tar.gettarinfo(path, arcname)
+        if tarinfo is None:
+            # Неподдерживаемый тип файла (сокет и т.п.)
+            return
+        tarinfo = self._exclude_junk(tarinfo)
+        if tarinfo is None:
+            return
+        
+        yield tarinfo, path
+        if tarinfo.isdir():
+            for name in sorted(os.listdir(path)):
+                yield from self._iter_tree(tar, os.path.join(path, name), f"{arcname}/{name}")
+    
+    @staticmethod
+    def _add_prefetched(tar: tarfile.TarFile, tarinfo: tarfile.TarInfo, path: str, future):
+        """Записывает член архива, используя заранее прочитанное содержимое (если есть)"""
+        if future is not None:
+            data = future.result()
+            # Файл мог измениться после stat - пишем то, что прочитали
+            tarinfo.size = len(data)
+            tar.addfile(tarinfo, BytesIO(data))
+        elif tarinfo.isreg():
+            with open(path, 'rb') as f:
+                tar.addfile(tarinfo, f)
+        else:
+            tar.addfile(tarinfo)
+    
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        """Читает файл целиком"""
+        with open(path, 'rb') as f:
+            return f.read()
+    
+    def _write_fragment(self, backup_path: Path, dir_name: str, fragment_path: str,
+                        level: Optional[int] = None):
+        """
+        Записывает директорию в отдельный сжатый фрагмент архива
+        
+        Уже сжатые файлы (PRECOMPRESSED_SUFFIXES) откладываются и
+        записываются следом отдельным кадром без сжатия
+        
+        Args:
+            backup_path: Путь к итоговому архиву (определяет формат сжатия)
+            dir_name: Имя рабочей директории
+            fragment_path: Путь к временному файлу фрагмента
+            level: Уровень сжатия
+        """
+        deferred = []
+        deferred_names = set()
+        with open(fragment_path, 'wb') as fout:
+            with self._open_compressor(backup_path, fout, level=level) as cout:
+                with _TarFragment(fileobj=cout, mode='w',
+                                  copybufsize=self.COPY_BUFFER_SIZE) as tar:
+                    # Небольшие файлы читаются заранее в пуле потоков, чтобы
+                    # ожидание диска перекрывалось со сжатием
+                    pending = deque()
+                    with ThreadPoolExecutor(max_workers=self.READ_WORKERS) as pool:
+                        for tarinfo, path in self._iter_tree(
+                                tar, os.path.join(self._base_str, dir_name), dir_name):
+                            # Жесткая ссылка должна идти после файла, на который ссылается
+                            if ((tarinfo.isreg() and tarinfo.name.lower().endswith(self.PRECOMPRESSED_SUFFIXES))
+                                    or (tarinfo.islnk() and tarinfo.linkname in deferred_names)):
+                                deferred.append((tarinfo, path))
+                                deferred_names.add(tarinfo.name)
+                                continue
+                            
+                            future = None
+                            if tarinfo.isreg() and tarinfo.size <= self.PREFETCH_MAX_SIZE:
+                                future = pool.submit(self._read_file, path)
+                            pending.append((tarinfo, path, future))
+                            
+                            if len(pending) >= self.PREFETCH_FILES:
+                                self._add_prefetched(tar, *pending.popleft())
+                        
+                        while pending:
+                            self._add_prefetched(tar, *pending.popleft())
+            
+            if deferred:
+                with self._open_compressor(backup_path, fout, store=True) as cout:
+                    with _TarFragment(fileobj=cout, mode='w',
+                                      copybufsize=self.COPY_BUFFER_SIZE) as tar:
+                        for tarinfo, path in deferred:
+                            self._add_prefetched(tar, tarinfo, path, None)
+    
+    def _zstd_dict_path(self, dict_id: int) -> Path:
+        """Путь к файлу словаря Zstandard с указанным номером (для архивов со словарем)"""
+        return self.backup_dir / f"zstd_dict_{dict_id}.zstddict"
+    
+    @contextmanager
+    def _open_archive_read(self, backup_path: Path):
+        """
+        Открывает архив на чтение
+        
+        Формат определяется по сигнатуре файла, поэтому старые
+        архивы .tar.gz читаются так же, как и новые .tar.zst.
+        Архив открывается в потоковом режиме: члены читаются строго
+        по порядку, без построения индекса всего архива
+        """
+        # Словарь, встроенный в архив пропускаемым кадром в начале файла
+        dict_content = None
+        data_offset = 0
+        with open(backup_path, 'rb') as f:
+            header = f.read(ZSTD_FRAME_HEADER_MAX_SIZE)
+            if header.startswith(ZSTD_SKIPPABLE_MAGIC):
+                f.seek(0)
+                _, dict_size = ZSTD_SKIPPABLE_HEADER.unpack(f.read(ZSTD_SKIPPABLE_HEADER.size))
+                dict_content = f.read(dict_size)
+                data_offset = f.tell()
+                header = f.read(ZSTD_FRAME_HEADER_MAX_SIZE)
+        
+        if header.startswith(ZSTD_MAGIC):
+            if not HAS_PYZSTD:
+                raise tarfile.ReadError(
+                    "Архив сжат Zstandard, но pyzstd не установлен. Установите: pip install pyzstd"
+                )
+            
+            # Ранее созданные архивы могли быть сжаты со словарем - его номер записан
+            # в заголовке кадра; словарь встроен в архив или лежит рядом отдельным файлом
+            zstd_dict = None
+            dict_id = pyzstd.get_frame_info(header).dictionary_id
+            if dict_id:
+                if dict_content is None:
+                    dict_path = self._zstd_dict_path(dict_id)
+                    if not dict_path.exists():
+                        raise tarfile.ReadError(f"Не найден словарь Zstandard для архива: {dict_path}")
+                    dict_content = dict_path.read_bytes()
+                zstd_dict = pyzstd.ZstdDict(dict_content)
+            
+            with open(backup_path, 'rb') as f:
+                f.seek(data_offset)
+                with pyzstd.ZstdFile(f, 'rb', zstd_dict=zstd_dict) as fin:
+                    with tarfile.open(fileobj=fin, mode='r|',
+                                      bufsize=self.COPY_BUFFER_SIZE,
+                                      copybufsize=self.COPY_BUFFER_SIZE) as tar:
+                        yield tar
+        else:
+            # GzipFile, в отличие от потокового 'r|gz', читает все члены gzip
+            # (архив склеен из нескольких фрагментов)
+            with gzip.GzipFile(backup_path, 'rb') as fin:
+                with tarfile.open(fileobj=fin, mode='r|',
+                                  bufsize=self.COPY_BUFFER_SIZE,
+                                  copybufsize=self.COPY_BUFFER_SIZE) as tar:
+                    yield tar
     
     def create_backup(self, 
                      include_html: bool = True,
                      include_pdf: bool = True,
-                     comment: Optional[str] = None) -> Path:
+                     comment: Optional[str] = None,
+                     level: Optional[int] = None) -> Path:
         """
         Создает резервную копию всех рабочих данных
         
@@ -57,12 +455,21 @@ class BackupRestore:
             include_html: Включать ли HTML файлы
             include_pdf: Включать ли PDF файлы
             comment: Комментарий к резервной копии
+            level: Уровень сжатия (zstd: 1-22, gzip: 1-9; по умолчанию 3)
         
         Returns:
             Path к созданному архиву
+        
+        Raises:
+            ValueError: Уровень сжатия вне диапазона MIN_LEVEL-MAX_LEVEL
         """
+        if level is not None and not self.MIN_LEVEL <= level <= self.MAX_LEVEL:
+            raise ValueError(f"Неверный уровень сжатия: {level} "
+                             f"(допустимо {self.MIN_LEVEL}-{self.MAX_LEVEL})")
+        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_filename = f"backup_{timestamp}.tar.gz"
+        extension = '.tar.zst' if HAS_PYZSTD else '.tar.gz'
+        backup_filename = f"backup_{timestamp}{extension}"
         backup_path = self.backup_dir / backup_filename
         
         print(f"Создание резервной копии...")
@@ -78,44 +485,77 @@ class BackupRestore:
             'included_files': [],
         }
         
+        # Отбираем директории для резервной копии
+        dir_names = []
+        for dir_name in self.WORKING_DIRECTORIES:
+            dir_path = os.path.join(self._base_str, dir_name)
+            
+            # Пропускаем HTML и PDF если не нужно включать
+            if dir_name == 'html' and not include_html:
+                continue
+            if dir_name == 'pdf' and not include_pdf:
+                continue
+            
+            if os.path.isdir(dir_path):
+                print(f"  Добавление директории: {dir_name}/")
+                dir_names.append(dir_name)
+                metadata['included_directories'].append(dir_name)
+        
+        fragment_paths = [os.path.join(self._backup_str, f".{backup_filename}.{dir_name}.part")
+                          for dir_name in dir_names]
+        
         try:
-            with tarfile.open(backup_path, 'w:gz') as tar:
-                # Добавляем директории
-                for dir_name in self.WORKING_DIRECTORIES:
-                    dir_path = self.base_dir / dir_name
-                    
-                    # Пропускаем HTML и PDF если не нужно включать
-                    if dir_name == 'html' and not include_html:
-                        continue
-                    if dir_name == 'pdf' and not include_pdf:
-                        continue
-                    
-                    if dir_path.exists() and dir_path.is_dir():
-                        print(f"  Добавление директории: {dir_name}/")
-                        tar.add(dir_path, arcname=dir_name, recursive=True)
-                        metadata['included_directories'].append(dir_name)
-                
-                # Добавляем файлы
-                for file_name in self.WORKING_FILES:
-                    file_path = self.base_dir / file_name
-                    if file_path.exists() and file_path.is_file():
-                        print(f"  Добавление файла: {file_name}")
-                        tar.add(file_path, arcname=file_name)
-                        metadata['included_files'].append(file_name)
+            # Директории независимы - сжимаем их параллельно в отдельные фрагменты
+            if dir_names:
+                with ThreadPoolExecutor(max_workers=len(dir_names)) as executor:
+                    list(executor.map(
+                        lambda args: self._write_fragment(backup_path, *args, level=level),
+                        zip(dir_names, fragment_paths)))
+            
+            with open(backup_path, 'wb') as fout:
+                # Склеиваем фрагменты в порядке WORKING_DIRECTORIES
+                for fragment_path in fragment_paths:
+                    with open(fragment_path, 'rb') as fin:
+                        shutil.copyfileobj(fin, fout, self.COPY_BUFFER_SIZE)
                 
-                # Добавляем метаданные в архив
-                metadata_str = json.dumps(metadata, ensure_ascii=False, indent=2)
-                metadata_bytes = metadata_str.encode('utf-8')
-                metadata_info = tarfile.TarInfo(name='backup_metadata.json')
-                metadata_info.size = len(metadata_bytes)
-                tar.addfile(metadata_info, fileobj=BytesIO(metadata_bytes))
+                # Последний фрагмент: файлы, метаданные и конец архива
+                with self._open_compressor(backup_path, fout, level=level) as cout:
+                    with tarfile.open(fileobj=cout, mode='w|',
+                                      bufsize=self.COPY_BUFFER_SIZE,
+                                      copybufsize=self.COPY_BUFFER_SIZE) as tar:
+                        # Добавляем файлы
+                        for file_name in self.WORKING_FILES:
+                            file_path = os.path.join(self._base_str, file_name)
+                            if os.path.isfile(file_path):
+                                print(f"  Добавление файла: {file_name}")
+                                tar.add(file_path, arcname=file_name)
+                                metadata['included_files'].append(file_name)
+                        
+                        # Добавляем метаданные в архив
+                        metadata_bytes = self._encode_metadata(metadata)
+                        metadata_info = tarfile.TarInfo(name='backup_metadata.json')
+                        metadata_info.size = len(metadata_bytes)
+                        tar.addfile(metadata_info, fileobj=BytesIO(metadata_bytes))
             
             # Сохраняем метаданные отдельно для быстрого доступа
-            metadata_path = self.backup_dir / f"backup_{timestamp}_metadata.json"
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            # (msgpack читается быстрее JSON, JSON - если msgpack не установлен)
+            if HAS_MSGPACK:
+                metadata_path = self.backup_dir / f"backup_{timestamp}_metadata.msgpack"
+                metadata_path.write_bytes(msgpack.packb(metadata))
+            else:
+                # Те же байты, что записаны в архив - без повторной сериализации
+                metadata_path = self.backup_dir / f"backup_{timestamp}_metadata.json"
+                metadata_path.write_bytes(metadata_bytes)
+            
+            backup_size_bytes = backup_path.stat().st_size
+            self._append_index([{
+                'filename': backup_filename,
+                'timestamp': timestamp,
+                'size': backup_size_bytes,
+                'metadata': metadata,
+            }])
             
-            backup_size = backup_path.stat().st_size / (1024 * 1024)  # MB
+            backup_size = backup_size_bytes / (1024 * 1024)  # MB
             print(f"\n✓ Резервная копия успешно создана!")
             print(f"  Размер: {backup_size:.2f} MB")
             print(f"  Путь: {backup_path}")
@@ -123,12 +563,43 @@ class BackupRestore:
                 print(f"  Комментарий: {comment}")
             
             return backup_path
-            
+        
         except Exception as e:
             print(f"✗ Ошибка при создании резервной копии: {e}")
             if backup_path.exists():
                 backup_path.unlink()
             raise
+        finally:
+            for fragment_path in fragment_paths:
+                if os.path.exists(fragment_path):
+                    os.unlink(fragment_path)
+    
+    def _load_backup_info(self, entry: os.DirEntry) -> Optional[Dict]:
+        """
+        Собирает информацию об одной резервной копии
+        
+        Args:
+            entry: Запись директории с архивом резервной копии
+        
+        Returns:
+            Словарь с информацией о резервной копии или None при ошибке
+        """
+        try:
+            # Пытаемся загрузить метаданные
+            # entry.name = "backup_20251130_083311.tar.zst"
+            timestamp = self._timestamp_from_name(entry.name)
+            metadata = self._read_sidecar_metadata(Path(entry.path)) or {}
+            
+            return {
+                'path': Path(entry.path),
+                'filename': entry.name,
+                'size': entry.stat().st_size,
+                'timestamp': timestamp,
+                'metadata': metadata,
+            }
+        except Exception as e:
+            print(f"Предупреждение: не удалось прочитать информацию о {entry.name}: {e}")
+            return None
     
     def list_backups(self) -> List[Dict]:
         """
@@ -137,35 +608,107 @@ class BackupRestore:
         Returns:
             Список словарей с информацией о резервных копиях
         """
+        extensions = tuple(self.ARCHIVE_EXTENSIONS)
+        with os.scandir(self.backup_dir) as it:
+            entries = [
+                entry for entry in it
+                if entry.name.startswith('backup_') and entry.name.endswith(extensions)
+                and entry.is_file()
+            ]
+        
+        # Информацию об архивах берем из журнала, не открывая файлы метаданных
+        index = self._read_index()
         backups = []
+        unindexed = []
+        for entry in entries:
+            record = index.pop(entry.name, None)
+            if record is None:
+                unindexed.append(entry)
+                continue
+            backups.append({
+                'path': Path(entry.path),
+                'filename': entry.name,
+                'size': record['size'],
+                'timestamp': record['timestamp'],
+                'metadata': record.get('metadata') or {},
+            })
         
-        for backup_file in self.backup_dir.glob('backup_*.tar.gz'):
-            try:
-                # Пытаемся загрузить метаданные
-                # backup_file.stem = "backup_20251130_083311" (без .tar.gz)
-                timestamp = backup_file.stem.replace('backup_', '').replace('.tar', '')
-                metadata_file = self.backup_dir / f"backup_{timestamp}_metadata.json"
-                
-                metadata = {}
-                if metadata_file.exists():
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                
-                backup_info = {
-                    'path': backup_file,
-                    'filename': backup_file.name,
-                    'size': backup_file.stat().st_size,
-                    'timestamp': timestamp,
-                    'metadata': metadata,
-                }
-                backups.append(backup_info)
-            except Exception as e:
-                print(f"Предупреждение: не удалось прочитать информацию о {backup_file.name}: {e}")
+        new_records = []
+        if unindexed:
+            # Архивы вне журнала (старые или скопированные вручную) читаем параллельно
+            with ThreadPoolExecutor(max_workers=min(self.LIST_WORKERS, len(unindexed))) as executor:
+                for info in executor.map(self._load_backup_info, unindexed):
+                    if info:
+                        backups.append(info)
+                        new_records.append({
+                            'filename': info['filename'],
+                            'timestamp': info['timestamp'],
+                            'size': info['size'],
+                            'metadata': info['metadata'],
+                        })
+        
+        # Оставшиеся записи журнала относятся к удаленным архивам
+        new_records.extend({'filename': filename, 'deleted': True} for filename in index)
+        if new_records:
+            self._append_index(new_records)
         
         # Сортируем по дате (новые первыми)
         backups.sort(key=lambda x: x['timestamp'], reverse=True)
         return backups
     
+    def _read_index(self) -> Dict[str, Dict]:
+        """
+        Читает журнал резервных копий
+        
+        Returns:
+            Словарь {имя архива: запись}, записи об удаленных архивах исключены
+        """
+        index = {}
+        try:
+            with open(self.backup_dir / self.INDEX_FILENAME, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Строка могла быть недописана при аварийном завершении
+                        continue
+                    if record.get('deleted'):
+                        index.pop(record['filename'], None)
+                    else:
+                        index[record['filename']] = record
+        except FileNotFoundError:
+            pass
+        return index
+    
+    def _append_index(self, records: List[Dict]):
+        """Дописывает записи в журнал резервных копий"""
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        with open(self.backup_dir / self.INDEX_FILENAME, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    
+    def _read_sidecar_metadata(self, backup_path: Path) -> Optional[Dict]:
+        """
+        Читает отдельный файл метаданных рядом с архивом (если он есть)
+        
+        Сначала ищется двоичный файл .msgpack, затем JSON
+        (его создают старые версии и установки без msgpack)
+        """
+        timestamp = self._timestamp_from_name(backup_path.name)
+        sidecar_base = os.path.join(self._backup_str, f"backup_{timestamp}_metadata")
+        
+        if HAS_MSGPACK:
+            try:
+                with open(sidecar_base + '.msgpack', 'rb') as f:
+                    return msgpack.unpackb(f.read(), raw=False)
+            except FileNotFoundError:
+                pass
+        
+        try:
+            with open(sidecar_base + '.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+    
     def get_backup_metadata(self, backup_path: Path) -> Optional[Dict]:
         """
         Получает метаданные резервной копии
@@ -177,60 +720,61 @@ class BackupRestore:
             Словарь с метаданными или None
         """
         try:
-            with tarfile.open(backup_path, 'r:gz') as tar:
-                try:
-                    metadata_file = tar.extractfile('backup_metadata.json')
-                    if metadata_file:
-                        metadata = json.loads(metadata_file.read().decode('utf-8'))
-                        return metadata
-                except KeyError:
-                    pass
+            with self._open_archive_read(backup_path) as tar:
+                for member in tar:
+                    if member.name == 'backup_metadata.json':
+                        return json.loads(tar.extractfile(member).read().decode('utf-8'))
             
             # Пробуем найти отдельный файл метаданных
-            timestamp = backup_path.stem.replace('backup_', '')
-            metadata_file = self.backup_dir / f"backup_{timestamp}_metadata.json"
-            if metadata_file.exists():
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            return self._read_sidecar_metadata(backup_path)
         except Exception as e:
             print(f"Ошибка при чтении метаданных: {e}")
         
         return None
     
-    def _validate_backup(self, backup_path: Path) -> Tuple[bool, Optional[str]]:
+    def _validate_backup(self, backup_path: Path) -> Tuple[bool, Optional[str], Set[str], Optional[Dict]]:
         """
         Проверяет целостность резервной копии
         
+        Архив читается за один проход: собираются имена верхнего уровня
+        и метаданные, чтобы не открывать архив повторно
+        
         Returns:
-            (is_valid, error_message)
+            (is_valid, error_message, top_level_names, metadata)
         """
         if not backup_path.exists():
-            return False, f"Резервная копия не найдена: {backup_path}"
+            return False, f"Резервная копия не найдена: {backup_path}", set(), None
         
         if not backup_path.is_file():
-            return False, f"Указанный путь не является файлом: {backup_path}"
+            return False, f"Указанный путь не является файлом: {backup_path}", set(), None
         
-        # Проверяем, что это tar.gz архив
-        if not backup_path.suffixes == ['.tar', '.gz']:
-            return False, f"Файл не является tar.gz архивом: {backup_path}"
+        # Проверяем, что это tar.zst или tar.gz архив
+        if backup_path.suffixes[-2:] not in (['.tar', '.zst'], ['.tar', '.gz']):
+            return False, f"Файл не является tar.zst или tar.gz архивом: {backup_path}", set(), None
         
         # Проверяем целостность архива
+        top_names = set()
+        metadata = None
         try:
-            with tarfile.open(backup_path, 'r:gz') as tar:
-                # Проверяем наличие критических директорий
-                members = tar.getnames()
-                if 'documents' not in members and 'documents/' not in [m.split('/')[0] for m in members]:
-                    return False, "Архив не содержит директорию 'documents' - критическая ошибка!"
-                
-                # Проверяем наличие метаданных
-                if 'backup_metadata.json' not in members:
-                    print("  Предупреждение: метаданные не найдены в архиве")
+            with self._open_archive_read(backup_path) as tar:
+                for member in tar:
+                    top_names.add(member.name.split('/', 1)[0])
+                    if member.name == 'backup_metadata.json':
+                        metadata = json.loads(tar.extractfile(member).read().decode('utf-8'))
         except tarfile.TarError as e:
-            return False, f"Ошибка при проверке архива: {e}"
+            return False, f"Ошибка при проверке архива: {e}", top_names, None
         except Exception as e:
-            return False, f"Неожиданная ошибка при проверке архива: {e}"
+            return False, f"Неожиданная ошибка при проверке архива: {e}", top_names, None
+        
+        # Проверяем наличие критических директорий
+        if 'documents' not in top_names:
+            return False, "Архив не содержит директорию 'documents' - критическая ошибка!", top_names, metadata
         
-        return True, None
+        # Проверяем наличие метаданных
+        if metadata is None:
+            print("  Предупреждение: метаданные не найдены в архиве")
+        
+        return True, None, top_names, metadata
     
     def restore_backup(self, 
                       backup_path: Path,
@@ -252,13 +796,17 @@ class BackupRestore:
             True если восстановление успешно, False иначе
         """
         # Проверка целостности архива
-        is_valid, error_msg = self._validate_backup(backup_path)
+        is_valid, error_msg, _, metadata = self._validate_backup(backup_path)
         if not is_valid:
             print(f"✗ {error_msg}")
             return False
         
-        # Получаем метаданные
-        metadata = self.get_backup_metadata(backup_path)
+        # Метаданные уже прочитаны при проверке, иначе берем отдельный файл
+        if metadata is None:
+            try:
+                metadata = self._read_sidecar_metadata(backup_path)
+            except Exception as e:
+                print(f"Ошибка при чтении метаданных: {e}")
         if metadata:
             print(f"Информация о резервной копии:")
             print(f"  Дата создания: {metadata.get('timestamp', 'неизвестно')}")
@@ -269,8 +817,7 @@ class BackupRestore:
         # Проверяем существующие данные
         existing_dirs = []
         for dir_name in self.WORKING_DIRECTORIES:
-            dir_path = self.base_dir / dir_name
-            if dir_path.exists() and any(dir_path.iterdir()):
+            if self._is_non_empty_dir(os.path.join(self._base_str, dir_name)):
                 existing_dirs.append(dir_name)
         
         if existing_dirs and not replace_existing:
@@ -298,88 +845,77 @@ class BackupRestore:
         if existing_dirs:
             print(f"\n⚠ Внимание! Существующие данные будут заменены в директориях:")
             for dir_name in existing_dirs:
-                dir_path = self.base_dir / dir_name
-                print(f"  - {dir_name}/")
-        
-        # Проверяем существующие данные
-        existing_dirs = []
-        for dir_name in self.WORKING_DIRECTORIES:
-            dir_path = self.base_dir / dir_name
-            if dir_path.exists() and any(dir_path.iterdir()):
-                existing_dirs.append(dir_name)
-        
-        if existing_dirs and not replace_existing:
-            print(f"\n⚠ Внимание! Найдены существующие данные в директориях: {', '.join(existing_dirs)}")
-            print("Используйте --replace для замены существующих данных")
-            return False
-        
-        if existing_dirs:
-            print(f"\n⚠ Внимание! Существующие данные будут заменены в директориях:")
-            for dir_name in existing_dirs:
-                dir_path = self.base_dir / dir_name
                 print(f"  - {dir_name}/")
         
         # Подтверждение
         print(f"\nВосстановление из: {backup_path}")
         print(f"В директорию: {self.base_dir}")
         
+        # Что восстанавливаем из архива
+        restore_names = set(self.WORKING_DIRECTORIES) | set(self.WORKING_FILES)
+        if not restore_html:
+            restore_names.discard('html')
+        if not restore_pdf:
+            restore_names.discard('pdf')
+        
+        # Фильтр 'data' запрещает пути вне директории назначения (если поддерживается)
+        extract_kwargs = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+        
+        # Заменяемые директории: имя -> куда перенесены старые данные
+        moved_aside = {}
+        
         try:
-            # Создаем временную директорию для распаковки
-            temp_dir = self.base_dir / '.restore_temp'
-            temp_dir.mkdir(exist_ok=True)
-            
-            try:
-                # Распаковываем архив
-                print("\nРаспаковка архива...")
-                with tarfile.open(backup_path, 'r:gz') as tar:
-                    tar.extractall(temp_dir)
-                
-                # Восстанавливаем директории
-                print("\nВосстановление директорий...")
-                for dir_name in self.WORKING_DIRECTORIES:
-                    source_dir = temp_dir / dir_name
-                    
-                    # Пропускаем HTML и PDF если не нужно восстанавливать
-                    if dir_name == 'html' and not restore_html:
-                        continue
-                    if dir_name == 'pdf' and not restore_pdf:
+            # Распаковываем архив сразу в рабочую директорию, без промежуточной копии
+            print("\nВосстановление из архива...")
+            def restore_members(tar):
+                """Отбирает члены архива для восстановления, освобождая место под директории"""
+                restored_dirs = set()
+                for member in tar:
+                    top_name = member.name.split('/', 1)[0]
+                    if top_name not in restore_names:
                         continue
                     
-                    if source_dir.exists():
-                        target_dir = self.base_dir / dir_name
-                        
-                        # Удаляем существующую директорию если нужно
-                        if target_dir.exists() and replace_existing:
-                            print(f"  Удаление существующей директории: {dir_name}/")
-                            shutil.rmtree(target_dir)
-                        
-                        # Копируем директорию
-                        print(f"  Восстановление: {dir_name}/")
-                        shutil.copytree(source_dir, target_dir, dirs_exist_ok=True)
-                
-                # Восстанавливаем файлы
-                print("\nВосстановление файлов...")
-                for file_name in self.WORKING_FILES:
-                    source_file = temp_dir / file_name
-                    if source_file.exists():
-                        target_file = self.base_dir / file_name
-                        print(f"  Восстановление: {file_name}")
-                        shutil.copy2(source_file, target_file)
-                
-                # Удаляем временную директорию
-                shutil.rmtree(temp_dir)
-                
-                print(f"\n✓ Восстановление успешно завершено!")
-                return True
-                
-            except Exception as e:
-                # Очищаем временную директорию при ошибке
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir)
-                raise
-                
+                    if top_name in self.WORKING_DIRECTORIES:
+                        if top_name not in restored_dirs:
+                            target_dir = self.base_dir / top_name
+                            
+                            # Убираем существующую директорию если нужно
+                            if target_dir.exists() and replace_existing:
+                                print(f"  Удаление существующей директории: {top_name}/")
+                                aside_dir = self._move_aside(target_dir)
+                                if aside_dir:
+                                    moved_aside[top_name] = aside_dir
+                            
+                            print(f"  Восстановление: {top_name}/")
+                            restored_dirs.add(top_name)
+                    else:
+                        print(f"  Восстановление: {top_name}")
+                    
+                    yield member
+            
+            with self._open_archive_read(backup_path) as tar:
+                tar.extractall(self.base_dir, members=restore_members(tar), **extract_kwargs)
+            
+            # Старые данные больше не нужны
+            for aside_dir in moved_aside.values():
+                self._parallel_rmtree(aside_dir)
+            
+            print(f"\n✓ Восстановление успешно завершено!")
+            return True
+        
         except Exception as e:
             print(f"\n✗ Ошибка при восстановлении: {e}")
+            
+            # Возвращаем на место данные, перенесенные перед распаковкой
+            for dir_name, aside_dir in moved_aside.items():
+                target_dir = self.base_dir / dir_name
+                try:
+                    if target_dir.exists():
+                        self._parallel_rmtree(target_dir)
+                    os.rename(aside_dir, target_dir)
+                    print(f"  Исходные данные возвращены: {dir_name}/")
+                except OSError as rollback_error:
+                    print(f"  ⚠ Не удалось вернуть {dir_name}/, данные сохранены в {aside_dir}: {rollback_error}")
             return False
 
 
@@ -414,6 +950,11 @@ def main():
         type=str,
         help='Комментарий к резервной копии'
     )
+    backup_parser.add_argument(
+        '--level',
+        type=int,
+        help='Уровень сжатия (zstd: 1-22, gzip: 1-9; по умолчанию: 3)'
+    )
     
     # Команда restore
     restore_parser = subparsers.add_parser('restore', help='Восстановить из резервной копии')
@@ -464,13 +1005,19 @@ def main():
         parser.print_help()
         return
     
+    if args.command == 'backup' and args.level is not None and not (
+            BackupRestore.MIN_LEVEL <= args.level <= BackupRestore.MAX_LEVEL):
+        backup_parser.error(f"--level: допустимо {BackupRestore.MIN_LEVEL}-{BackupRestore.MAX_LEVEL}, "
+                     f"получено {args.level}")
+    
     backup_restore = BackupRestore(backup_dir=args.backup_dir)
     
     if args.command == 'backup':
         backup_path = backup_restore.create_backup(
             include_html=not args.no_html,
             include_pdf=not args.no_pdf,
-            comment=args.comment
+            comment=args.comment,
+            level=args.level
         )
         print(f"\nРезервная копия сохранена: {backup_path}")
     
@@ -521,7 +1068,7 @@ def main():
         for i, backup in enumerate(backups, 1):
             timestamp = backup['timestamp']
             try:
-                dt = datetime.strptime(timestamp, '%Y%m%d_%H%M%S')
+                dt = _parse_ts(timestamp)
                 date_str = dt.strftime('%Y-%m-%d %H:%M:%S')
             except ValueError:
                 # Пробуем другие форматы
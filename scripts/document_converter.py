@@ -3,18 +3,35 @@
 Поддерживает выборочную конвертацию по фильтрам
 """
 import os
+import posixpath
+import re
 import sys
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import argparse
-from datetime import datetime
+import calendar
+import io
+import logging
+import functools
+from collections import ChainMap
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import markdown2
 from document_parser import DocumentParser
-from jinja2 import Template
+from jinja2 import Environment
+
+# Быстрый Markdown-парсер (необязательно, иначе используется markdown2)
+try:
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.anchors import anchors_plugin
+    HAS_MARKDOWN_IT = True
+except ImportError:
+    HAS_MARKDOWN_IT = False
 
 # Попытка импортировать PDF генераторы
 try:
@@ -24,7 +41,8 @@ except ImportError:
     HAS_PDFKIT = False
 
 try:
-    from weasyprint import HTML
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
     HAS_WEASYPRINT = True
 except ImportError:
     HAS_WEASYPRINT = False
@@ -35,6 +53,300 @@ try:
 except ImportError:
     HAS_PYPDF = False
 
+_LOG = logging.getLogger(__name__)
+
+# Статусы черновиков (в нижнем регистре): такие документы не печатаются на бланке
+_DRAFT_STATUSES = frozenset({'в разработке', 'черновик', 'разработка'})
+
+# Строка, после которой может идти нераспознанный markdown2 список:
+# <p><strong>Заголовок:</strong>, <p><strong>Заголовок:</strong></p> или <p>Текст:
+_RE_LIST_HEADER = re.compile(r'<p><strong>([^<]+):</strong>(</p>)?\s*$|<p>([^<]+:)\s*$')
+
+# Ссылки в HTML, обрабатываемые за один проход: на приложения
+# (приложения/файл.png, attachments/файл.jpg и т.д.) и на документы
+# из встроенного HTML (href="doc:ссылка")
+_RE_HTML_LINK = re.compile(
+    r'(?P<attr>href|src)=["\']'
+    r'(?:(?P<path>(?:приложения|attachments)/[^"\']+)|doc:(?P<ref>[^"\']+))["\']'
+)
+
+# Ссылки на документы: [текст](doc:ссылка) в Markdown (блоки и фрагменты кода
+# пропускаются)
+_RE_DOC_MD = re.compile(
+    r'(?P<code>^(?P<fence>```|~~~).*?^(?P=fence)|`[^`\n]+`)'
+    r'|\[(?P<text>[^\]]+)\]\(doc:(?P<ref>[^\)]+)\)',
+    re.MULTILINE | re.DOTALL
+)
+
+# Названия фильтров документов для вывода
+_FILTER_LABELS = {
+    'organization': 'организация',
+    'department': 'отдел',
+    'doc_type': 'тип',
+    'status': 'статус',
+}
+
+# Форматы дат метаданных: (шаблон, порядок групп год/месяц/день)
+_DATE_FORMATS = (
+    (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'), (1, 2, 3)),
+    (re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})'), (3, 2, 1)),
+    (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'), (3, 2, 1)),
+    (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'), (1, 2, 3)),
+)
+
+
+# Стили документа: встраиваются в HTML, а для WeasyPrint разбираются один раз
+_STYLE_BLOCK = """
+@page {
+    size: A4;
+    margin: 2cm;
+}
+body {
+    font-family: 'Times New Roman', serif;
+    font-size: 12pt;
+    line-height: 1.5;
+    color: #000;
+    max-width: 800px;
+    margin: 0 auto;
+    padding: 20px;
+}
+.header {
+    text-align: center;
+    margin-bottom: 30px;
+    border-bottom: 2px solid #000;
+    padding-bottom: 10px;
+}
+.metadata {
+    margin-bottom: 20px;
+    font-size: 10pt;
+}
+.metadata table {
+    width: 100%;
+    border-collapse: collapse;
+}
+.metadata td {
+    padding: 5px;
+    border: 1px solid #ccc;
+}
+.metadata td:first-child {
+    font-weight: bold;
+    width: 30%;
+}
+h1 {
+    font-size: 16pt;
+    font-weight: bold;
+    margin-top: 20px;
+    margin-bottom: 15px;
+}
+h2 {
+    font-size: 14pt;
+    font-weight: bold;
+    margin-top: 15px;
+    margin-bottom: 10px;
+}
+h3 {
+    font-size: 12pt;
+    font-weight: bold;
+    margin-top: 10px;
+    margin-bottom: 8px;
+}
+p {
+    margin-bottom: 10px;
+    text-align: justify;
+}
+ul, ol {
+    margin-bottom: 10px;
+    padding-left: 30px;
+}
+li {
+    margin-bottom: 5px;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 15px 0;
+}
+table th, table td {
+    border: 1px solid #000;
+    padding: 8px;
+    text-align: left;
+}
+table th {
+    background-color: #f0f0f0;
+    font-weight: bold;
+}
+code {
+    background-color: #f4f4f4;
+    padding: 2px 4px;
+    border-radius: 3px;
+    font-family: 'Courier New', monospace;
+}
+pre {
+    background-color: #f4f4f4;
+    padding: 10px;
+    border-radius: 5px;
+    overflow-x: auto;
+}
+pre code {
+    background-color: transparent;
+    padding: 0;
+}
+.footer {
+    margin-top: 30px;
+    padding-top: 10px;
+    border-top: 1px solid #000;
+    font-size: 10pt;
+}
+@media print {
+    body {
+        max-width: 100%;
+        padding: 0;
+    }
+}
+.approval-block {
+    text-align: right;
+    margin-bottom: 30px;
+    padding-bottom: 20px;
+    border-bottom: 1px solid #ddd;
+    font-size: 11pt;
+}
+.approval-block .approval-title {
+    font-weight: bold;
+    margin-bottom: 15px;
+    font-size: 12pt;
+}
+.approval-block .approval-content {
+    line-height: 1.8;
+}
+"""
+
+# HTML шаблон документа (компилируется один раз при импорте модуля)
+_TEMPLATE_SRC = """
+<!DOCTYPE html>
+<html lang="ru">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ title }}</title>
+    {% if style %}
+    <style>
+{{ style }}
+    </style>
+    {% endif %}
+</head>
+<body>
+    {% if metadata.approval_block %}
+    <div class="approval-block">
+        <div class="approval-title">УТВЕРЖДАЮ</div>
+        <div class="approval-content">
+            {% for line in metadata.approval_block.split('\n') %}
+            {{ line }}<br>
+            {% endfor %}
+        </div>
+    </div>
+    {% endif %}
+    
+    <div class="header">
+        <h1>{{ title }}</h1>
+    </div>
+    
+    {% if metadata and not hide_technical %}
+    <div class="metadata">
+        <table>
+            {% if metadata.organization %}
+            <tr>
+                <td>Организация:</td>
+                <td>{{ metadata.organization }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.department %}
+            <tr>
+                <td>Отдел:</td>
+                <td>{{ metadata.department }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.type %}
+            <tr>
+                <td>Тип документа:</td>
+                <td>{{ metadata.type }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.number %}
+            <tr>
+                <td>Номер:</td>
+                <td>{{ metadata.number }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.draft_number %}
+            <tr>
+                <td>Номер в разработке (черновик):</td>
+                <td>{{ metadata.draft_number }}</td>
+            </tr>
+            {% elif metadata.status == 'в разработке' or metadata.status == 'черновик' %}
+            <tr>
+                <td>Номер в разработке (черновик):</td>
+                <td><em>Не присвоен</em></td>
+            </tr>
+            {% endif %}
+            {% if metadata.date %}
+            <tr>
+                <td>Дата:</td>
+                <td>{{ metadata.date }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.status %}
+            <tr>
+                <td>Статус:</td>
+                <td>{{ metadata.status }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.approved_date %}
+            <tr>
+                <td>Дата подписания (утверждения):</td>
+                <td>{{ metadata.approved_date }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.effective_date %}
+            <tr>
+                <td>Дата ввода в действие:</td>
+                <td>{{ metadata.effective_date }}</td>
+            </tr>
+            {% endif %}
+            {% if metadata.expiry_date %}
+            <tr>
+                <td>Дата окончания действия:</td>
+                <td>{{ metadata.expiry_date }}</td>
+            </tr>
+            {% elif metadata.expiry_type %}
+            <tr>
+                <td>Срок действия:</td>
+                <td>{{ metadata.expiry_type }}</td>
+            </tr>
+            {% endif %}
+        </table>
+    </div>
+    {% endif %}
+    
+    {% if metadata.amendment_procedure and not hide_technical %}
+    <div class="amendment-procedure" style="margin-bottom: 20px; padding: 15px; background-color: #f9f9f9; border-left: 4px solid #0066cc;">
+        <h3 style="margin-top: 0; color: #0066cc;">Порядок внесения изменений</h3>
+        <p style="margin-bottom: 0;">{{ metadata.amendment_procedure }}</p>
+    </div>
+    {% endif %}
+    
+    <div class="content">
+        {{ content|safe }}
+    </div>
+    
+    <div class="footer">
+        <p>Страница <span class="page"></span></p>
+    </div>
+</body>
+</html>
+"""
+
+_DOC_TEMPLATE = Environment(autoescape=False, auto_reload=False).from_string(_TEMPLATE_SRC)
+
 
 class DocumentConverter:
     """Универсальный конвертер документов в HTML и PDF"""
@@ -51,6 +363,32 @@ class DocumentConverter:
         self.html_dir.mkdir(exist_ok=True)
         self.pdf_dir.mkdir(exist_ok=True)
         self.templates_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Поиск документов по ссылкам идет по индексу, построенному один раз на
+        # пакетную конвертацию (вне пакета индекс и кэш сбрасываются перед каждым
+        # документом, чтобы не возвращать устаревшие результаты после изменения документов)
+        self._doc_index: Optional[Dict[str, Dict]] = None
+        self._lookup_by_path = functools.lru_cache(maxsize=4096)(self.parser.find_document_by_path)
+        # URL документов по относительному пути (не зависит от содержимого документов)
+        self._path_cache: Dict[str, str] = {}
+        # Содержимое шаблонов бланков: путь -> (время изменения, байты)
+        self._letterhead_cache: Dict[Path, Tuple[int, bytes]] = {}
+        
+        # Markdown-парсер создается один раз для всех документов
+        self._md = None
+        if HAS_MARKDOWN_IT:
+            self._md = MarkdownIt('commonmark', {'html': True}).enable('table')
+            self._md.use(anchors_plugin, max_level=6)
+            # Адреса ссылок оставляем без процентного кодирования, как markdown2:
+            # по ним распознаются ссылки на приложения и документы
+            self._md.normalizeLink = lambda url: url
+        
+        # Шрифты и стили для WeasyPrint готовятся один раз для всех документов
+        self._font_config = None
+        self._css = None
+        if HAS_WEASYPRINT:
+            self._font_config = FontConfiguration()
+            self._css = CSS(string=_STYLE_BLOCK, font_config=self._font_config)
     
     @staticmethod
     def format_date(date_value) -> Optional[str]:
@@ -69,33 +407,30 @@ class DocumentConverter:
         if hasattr(date_value, 'strftime'):
             return date_value.strftime('%d.%m.%Y')
         
-        # Преобразуем в строку, если нужно
-        date_str = str(date_value)
-        
+        # Строковые даты повторяются между документами - разбираем каждую один раз
+        return DocumentConverter._format_date_str(str(date_value))
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def _format_date_str(date_str: str) -> str:
+        """Форматирует строковую дату в формат дд.ММ.ГГГГ (с кэшированием)"""
         # Если уже в формате дд.ММ.ГГГГ, возвращаем как есть
         if '.' in date_str and len(date_str.split('.')) == 3:
             parts = date_str.split('.')
             if len(parts[0]) <= 2 and len(parts[1]) <= 2 and len(parts[2]) == 4:
                 return date_str
         
-        # Пробуем распарсить ISO формат (YYYY-MM-DD)
-        try:
-            if '-' in date_str:
-                date_part = date_str.split()[0] if ' ' in date_str else date_str
-                dt = datetime.strptime(date_part, '%Y-%m-%d')
-                return dt.strftime('%d.%m.%Y')
-        except (ValueError, AttributeError, TypeError):
-            pass
-        
-        # Пробуем другие форматы
-        formats = ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%Y/%m/%d']
-        for fmt in formats:
-            try:
-                date_part = date_str.split()[0] if ' ' in date_str else date_str
-                dt = datetime.strptime(date_part, fmt)
-                return dt.strftime('%d.%m.%Y')
-            except (ValueError, AttributeError, TypeError):
-                continue
+        # Определяем формат по виду строки вместо перебора strptime с исключениями
+        date_part = date_str.split()[0] if ' ' in date_str else date_str
+        for pattern, (year_group, month_group, day_group) in _DATE_FORMATS:
+            match = pattern.fullmatch(date_part)
+            if match:
+                year = int(match.group(year_group))
+                month = int(match.group(month_group))
+                day = int(match.group(day_group))
+                if year >= 1 and 1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]:
+                    return f'{day:02d}.{month:02d}.{year}'
+                break
         
         # Если не удалось распарсить, возвращаем как есть
         return date_str
@@ -108,202 +443,245 @@ class DocumentConverter:
         - <p><strong>Заголовок:</strong></p>\n- пункт\n- пункт
         - <p>Текст:\n- пункт\n- пункт</p> (список после обычного текста)
         в правильные HTML списки.
-        """
-        import re
-        
-        # Паттерн 1: Список внутри параграфа с заголовком
-        # Ищем <p><strong>Заголовок:</strong>\n- пункт\n- пункт</p>
-        pattern1 = r'<p><strong>([^<]+):</strong>\s*\n((?:- [^\n]+\n?)+)</p>'
         
-        # Паттерн 2: Список после отдельного параграфа с заголовком
-        # Ищем <p><strong>Заголовок:</strong></p>\n- пункт\n- пункт (до следующего блока)
-        pattern2 = r'(<p><strong>([^<]+):</strong></p>)\s*\n((?:- [^\n]+\n?)+)(?=\n\n|<p>|<h|<div)'
+        HTML просматривается построчно за один проход: строка-заголовок
+        (возможно, продолжающаяся на следующих строках текста параграфа),
+        затем после пустых строк - подряд идущие строки "- пункт".
+        """
+        # Без строк "- пункт" исправлять нечего (обычный случай: markdown2
+        # распознал все списки) - проверка на уровне C без разбора строк
+        if '\n- ' not in html_content:
+            return html_content
         
-        # Паттерн 3: Список внутри параграфа после обычного текста (не заголовка)
-        # Ищем <p>Текст:\n- пункт\n- пункт</p>
-        pattern3 = r'<p>([^<]+:)\s*\n((?:- [^\n]+\n?)+)</p>'
+        lines = html_content.split('\n')
+        count = len(lines)
+        result = []
+        i = 0
+        while i < count:
+            converted = self._convert_broken_list(lines, i) if '<p>' in lines[i] else None
+            if converted is None:
+                result.append(lines[i])
+                i += 1
+            else:
+                list_html, i = converted
+                result.append(list_html)
         
-        def replace_with_list1(match):
-            header = match.group(1)
-            list_items = match.group(2)
-            
-            # Разбиваем пункты списка
-            items = re.findall(r'- ([^\n]+)', list_items)
-            
-            # Формируем HTML список
-            list_html = f'<p><strong>{header}:</strong></p>\n<ul>\n'
-            for item in items:
-                item_text = item.strip()
-                list_html += f'  <li>{item_text}</li>\n'
-            list_html += '</ul>'
-            
-            return list_html
+        return '\n'.join(result)
+    
+    @staticmethod
+    def _convert_broken_list(lines: List[str], i: int) -> Optional[Tuple[str, int]]:
+        """
+        Пробует преобразовать в HTML список фрагмент, начинающийся со строки i
         
-        def replace_with_list2(match):
-            header_tag = match.group(1)
-            header = match.group(2)
-            list_items = match.group(3)
-            
-            # Разбиваем пункты списка
-            items = re.findall(r'- ([^\n]+)', list_items)
-            
-            # Формируем HTML список
-            list_html = f'{header_tag}\n<ul>\n'
-            for item in items:
-                item_text = item.strip()
-                list_html += f'  <li>{item_text}</li>\n'
-            list_html += '</ul>'
-            
-            return list_html
+        Returns:
+            (HTML фрагмента, индекс следующей необработанной строки) или None
+        """
+        count = len(lines)
         
-        def replace_with_list3(match):
-            text = match.group(1)
-            list_items = match.group(2)
-            
-            # Разбиваем пункты списка
-            items = re.findall(r'- ([^\n]+)', list_items)
-            
-            # Формируем HTML список
-            list_html = f'<p>{text}</p>\n<ul>\n'
-            for item in items:
-                item_text = item.strip()
-                list_html += f'  <li>{item_text}</li>\n'
-            list_html += '</ul>'
-            
-            return list_html
+        # Текст заголовка может продолжаться на следующих строках параграфа
+        last = i
+        while (last + 1 < count and lines[last + 1].strip() and '<' not in lines[last + 1]
+               and not lines[last + 1].startswith('- ')):
+            last += 1
+        # Последняя строка заголовка может содержать закрывающие теги
+        if (last + 1 < count and lines[last + 1].strip() and '<' in lines[last + 1]
+                and not lines[last + 1].startswith('- ')):
+            last += 1
+        header = lines[i] if last == i else '\n'.join(lines[i:last + 1])
+        match = _RE_LIST_HEADER.search(header)
+        if not match:
+            return None
         
-        # Сначала обрабатываем паттерн 2 (более специфичный)
-        html_content = re.sub(pattern2, replace_with_list2, html_content, flags=re.MULTILINE | re.DOTALL)
+        # Пропускаем пустые строки между заголовком и списком
+        start = last + 1
+        while start < count and not lines[start].strip():
+            start += 1
+        end = start
+        while end < count and lines[end].startswith('- ') and len(lines[end]) > 2:
+            end += 1
+        if end == start:
+            return None
         
-        # Затем обрабатываем паттерн 1
-        html_content = re.sub(pattern1, replace_with_list1, html_content, flags=re.MULTILINE)
+        # Ищем конец списка: для <p><strong>Заголовок:</strong></p> - пустая строка
+        # или начало следующего блока, для остальных - закрывающий </p>.
+        # Как и раньше, предпочитается самый длинный список
+        items = lines[start:end]
+        tail = ''
+        next_line = end
+        if match.group(2):
+            if not (end < count and (lines[end].startswith(('<p>', '<h', '<div'))
+                                     or (lines[end] == '' and end + 1 < count))):
+                for k in range(end - 1, start - 1, -1):
+                    pos = max(lines[k].rfind(token) for token in ('<p>', '<h', '<div'))
+                    if pos >= 3:
+                        items = lines[start:k] + [lines[k][:pos]]
+                        tail = lines[k][pos:]
+                        next_line = k + 1
+                        break
+                else:
+                    return None
+        elif end < count and lines[end].startswith('</p>'):
+            tail = lines[end][len('</p>'):]
+            next_line = end + 1
+        else:
+            for k in range(end - 1, start - 1, -1):
+                pos = lines[k].rfind('</p>')
+                if pos >= 3:
+                    items = lines[start:k] + [lines[k][:pos]]
+                    tail = lines[k][pos + len('</p>'):]
+                    next_line = k + 1
+                    break
+            else:
+                return None
         
-        # Затем обрабатываем паттерн 3 (список после обычного текста)
-        html_content = re.sub(pattern3, replace_with_list3, html_content, flags=re.MULTILINE)
+        if match.group(3):
+            header_html = f'<p>{match.group(3)}</p>'
+        else:
+            header_html = f'<p><strong>{match.group(1)}:</strong></p>'
         
-        return html_content
+        list_html = [header[:match.start()], header_html, '\n<ul>\n']
+        for item in items:
+            list_html.append(f'  <li>{item[2:].strip()}</li>\n')
+        list_html.append('</ul>')
+        list_html.append(tail)
+        return ''.join(list_html), next_line
     
-    def _process_attachment_links(self, html_content: str, doc_relative_path: str) -> str:
+    def _process_html_links(self, html_content: str, doc_relative_path: str, metadata: dict) -> str:
         """
-        Обрабатывает ссылки на приложения в HTML
+        Обрабатывает ссылки в HTML за один проход
         
-        Преобразует относительные пути к приложениям в правильные ссылки
+        Преобразует относительные пути к приложениям и ссылки из встроенного HTML
+        вида doc:номер или doc:путь в рабочие ссылки (ссылки Markdown на документы
+        обрабатываются до конвертации)
         """
-        import re
-        from urllib.parse import quote
-        
-        # Получаем путь к документу без расширения
+        # Путь документа без расширения одинаков для всех ссылок - кодируем его один раз
         doc_path_without_ext = doc_relative_path.replace('.md', '')
+        encoded_doc_path = quote(doc_path_without_ext, safe='/')
         
-        # Паттерн для поиска ссылок на приложения
-        # Ищем ссылки вида: приложения/файл.png, attachments/файл.jpg и т.д.
-        patterns = [
-            (r'href=["\'](приложения/[^"\']+)["\']', 'приложения/'),
-            (r'href=["\'](attachments/[^"\']+)["\']', 'attachments/'),
-            (r'src=["\'](приложения/[^"\']+)["\']', 'приложения/'),
-            (r'src=["\'](attachments/[^"\']+)["\']', 'attachments/'),
-        ]
-        
-        # Заменяем относительные пути на абсолютные URL
-        for pattern, prefix in patterns:
-            def replace_link(match):
-                link_path = match.group(1)
-                # Кодируем оба пути для URL
-                encoded_doc_path = quote(doc_path_without_ext, safe='/')
+        def replace_link(match):
+            link_path = match.group('path')
+            if link_path:
                 encoded_attach_path = quote(link_path, safe='/')
                 return match.group(0).replace(link_path, f'/attachment/{encoded_doc_path}/{encoded_attach_path}')
             
-            html_content = re.sub(pattern, replace_link, html_content)
-        
-        return html_content
-    
-    def _process_document_links_in_markdown(self, markdown_content: str, doc_relative_path: str, metadata: dict) -> str:
-        """
-        Обрабатывает ссылки на другие документы в Markdown
-        
-        Преобразует ссылки вида [текст](doc:номер) или [текст](doc:путь) в рабочие ссылки
-        """
-        import re
-        from urllib.parse import quote
-        
-        # Паттерн для поиска ссылок на документы в Markdown: [текст](doc:ссылка)
-        pattern = r'\[([^\]]+)\]\(doc:([^\)]+)\)'
-        
-        def replace_doc_link(match):
-            link_text = match.group(1)
-            doc_ref = match.group(2).strip()
+            # Ссылки на документы обрабатываются только в href
+            if match.group('attr') != 'href':
+                return match.group(0)
+            
+            doc_ref = match.group('ref')
             
             # Пробуем найти документ
             doc = None
             
             # По номеру
-            doc = self.parser.find_document_by_number(
-                doc_ref, 
-                metadata.get('organization')
-            )
+            if 'number' in metadata:
+                doc = self._find_by_number(
+                    doc_ref, 
+                    metadata.get('organization')
+                )
             
             # По пути
             if not doc:
-                doc = self.parser.find_document_by_path(
+                doc = self._find_by_path(
                     doc_ref,
                     doc_relative_path
                 )
             
             if doc:
-                doc_path_found = doc.get('relative_path', '').replace('\\', '/')
-                encoded_path = quote(doc_path_found, safe='/')
-                return f'[{link_text}](/document/{encoded_path})'
+                return f'href="{self._document_url(doc)}"'
             else:
-                # Если документ не найден, оставляем как есть
-                return f'[{link_text}](doc:{doc_ref})'
-        
-        markdown_content = re.sub(pattern, replace_doc_link, markdown_content)
+                # Если документ не найден, оставляем ссылку как есть, но помечаем как нерабочую
+                return f'href="#" class="broken-doc-link" title="Документ не найден: {doc_ref}"'
         
-        return markdown_content
+        return _RE_HTML_LINK.sub(replace_link, html_content)
     
-    def _process_document_links(self, html_content: str, doc_relative_path: str, metadata: dict) -> str:
+    def _process_document_links_in_markdown(self, markdown_content: str, doc_relative_path: str, metadata: dict) -> str:
         """
-        Обрабатывает ссылки на другие документы в HTML
+        Обрабатывает ссылки на другие документы в Markdown
         
-        Преобразует ссылки вида doc:номер или doc:путь в рабочие ссылки
+        Преобразует ссылки вида [текст](doc:номер) или [текст](doc:путь) в рабочие ссылки,
+        ненайденные документы помечаются как нерабочие ссылки
         """
-        import re
-        from urllib.parse import quote
-        
-        # Паттерн для поиска ссылок на документы: [текст](doc:ссылка)
-        pattern = r'href=["\']doc:([^"\']+)["\']'
-        
         def replace_doc_link(match):
-            doc_ref = match.group(1)
+            if match.group('code'):
+                return match.group('code')
+            
+            link_text = match.group('text')
+            doc_ref = match.group('ref').strip()
             
             # Пробуем найти документ
             doc = None
             
             # По номеру
-            if 'number' in metadata:
-                doc = self.parser.find_document_by_number(
-                    doc_ref, 
-                    metadata.get('organization')
-                )
+            doc = self._find_by_number(
+                doc_ref, 
+                metadata.get('organization')
+            )
             
             # По пути
             if not doc:
-                doc = self.parser.find_document_by_path(
+                doc = self._find_by_path(
                     doc_ref,
                     doc_relative_path
                 )
             
             if doc:
-                doc_path = doc.get('relative_path', '').replace('\\', '/')
-                encoded_path = quote(doc_path, safe='/')
-                return f'href="/document/{encoded_path}"'
+                return f'[{link_text}]({self._document_url(doc)})'
             else:
-                # Если документ не найден, оставляем ссылку как есть, но помечаем как нерабочую
-                return f'href="#" class="broken-doc-link" title="Документ не найден: {doc_ref}"'
+                # Если документ не найден, помечаем ссылку как нерабочую
+                return f'<a href="#" class="broken-doc-link" title="Документ не найден: {doc_ref}">{link_text}</a>'
         
-        html_content = re.sub(pattern, replace_doc_link, html_content)
+        markdown_content = _RE_DOC_MD.sub(replace_doc_link, markdown_content)
         
-        return html_content
+        return markdown_content
+    
+    def _document_url(self, doc: dict) -> str:
+        """Возвращает URL документа (закодированный путь кэшируется)"""
+        relative_path = doc.get('relative_path', '')
+        url = self._path_cache.get(relative_path)
+        if url is None:
+            url = '/document/' + quote(relative_path, safe='/')
+            self._path_cache[relative_path] = url
+        return url
+    
+    def _get_doc_index(self) -> Dict[str, Dict]:
+        """
+        Возвращает индекс документов парсера для разрешения ссылок
+        
+        Индекс берется из DocumentParser.get_document_index() один раз на
+        пакет (вне пакета - на документ), поэтому дерево документов не
+        проверяется при каждом поиске
+        """
+        if self._doc_index is None:
+            self._doc_index = self.parser.get_document_index()
+        return self._doc_index
+    
+    def _find_by_number(self, number: str, organization: Optional[str] = None) -> Optional[Dict]:
+        """Находит документ по номеру через индекс парсера"""
+        return self.parser.find_document_by_number(number, organization, index=self._get_doc_index())
+    
+    def _find_by_path(self, path: str, current_doc_path: Optional[str] = None) -> Optional[Dict]:
+        """
+        Находит документ по пути (аналог DocumentParser.find_document_by_path)
+        
+        Пути от корня документов и от директории текущего документа ищутся
+        по индексу (документы индекса общие с кэшем парсера и не изменяются),
+        остальные случаи - через парсер
+        """
+        by_path = self._get_doc_index()['by_path']
+        key = (path if path.endswith('.md') else f"{path}.md").replace('\\', '/')
+        doc = by_path.get(key)
+        if doc is None and current_doc_path:
+            current_dir = posixpath.dirname(current_doc_path)
+            doc = by_path.get(posixpath.join(current_dir, key))
+        if doc is None:
+            doc = self._lookup_by_path(path, current_doc_path)
+        return doc
+    
+    def _clear_lookup_cache(self):
+        """Сбрасывает индекс и кэш поиска документов по ссылкам"""
+        self._doc_index = None
+        self._lookup_by_path.cache_clear()
     
     def find_letterhead_template(self, document_type: str) -> Optional[Path]:
         """
@@ -330,8 +708,18 @@ class DocumentConverter:
         
         return None
     
+    def _read_letterhead(self, template_path: Path) -> bytes:
+        """Возвращает содержимое шаблона бланка (кэшируется до изменения файла)"""
+        mtime = template_path.stat().st_mtime_ns
+        cached = self._letterhead_cache.get(template_path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, template_path.read_bytes())
+            self._letterhead_cache[template_path] = cached
+        return cached[1]
+    
     def markdown_to_html(self, markdown_content: str, metadata: dict, 
-                        standalone: bool = True, hide_technical: bool = False) -> str:
+                        standalone: bool = True, hide_technical: bool = False,
+                        inline_style: bool = True, batch: bool = False) -> str:
         """
         Конвертирует Markdown в HTML
         
@@ -339,319 +727,102 @@ class DocumentConverter:
             markdown_content: Содержимое документа в Markdown
             metadata: Метаданные документа
             standalone: Если True, возвращает полный HTML документ, иначе только содержимое
+            hide_technical: Скрывать ли технические данные (метаданные документа)
+            inline_style: Встраивать ли стили в HTML (False - стили передаются отдельно)
+            batch: Вызов из пакетной конвертации - индекс поиска документов
+                построен в начале пакета и не сбрасывается
         """
-        html_content = markdown2.markdown(
-            markdown_content,
-            extras=['fenced-code-blocks', 'tables', 'header-ids']
-        )
+        if not batch:
+            self._clear_lookup_cache()
+        
+        # Ссылки на другие документы обрабатываются еще в Markdown
+        doc_relative_path = metadata.get('relative_path', '')
+        if 'doc:' in markdown_content:
+            markdown_content = self._process_document_links_in_markdown(
+                markdown_content, doc_relative_path, metadata
+            )
+        
+        if self._md is not None:
+            html_content = self._md.render(markdown_content)
+        else:
+            html_content = markdown2.markdown(
+                markdown_content,
+                extras=['fenced-code-blocks', 'tables', 'header-ids']
+            )
         
         # Исправляем списки, которые не были распознаны markdown2
         # Преобразуем структуры вида <p><strong>Преимущества:</strong>\n- пункт\n- пункт</p> в правильные списки
         html_content = self._fix_broken_lists(html_content)
         
-        # Обрабатываем ссылки на приложения
-        doc_relative_path = metadata.get('relative_path', '')
-        html_content = self._process_attachment_links(html_content, doc_relative_path)
-        
-        # Обрабатываем ссылки на другие документы
-        html_content = self._process_document_links(html_content, doc_relative_path, metadata)
+        # Обрабатываем ссылки на приложения и ссылки на документы во встроенном HTML
+        html_content = self._process_html_links(html_content, doc_relative_path, metadata)
         
         if not standalone:
             return html_content
         
-        # HTML шаблон для документа
-        template = Template("""
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ title }}</title>
-    <style>
-        @page {
-            size: A4;
-            margin: 2cm;
-        }
-        body {
-            font-family: 'Times New Roman', serif;
-            font-size: 12pt;
-            line-height: 1.5;
-            color: #000;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-        }
-        .header {
-            text-align: center;
-            margin-bottom: 30px;
-            border-bottom: 2px solid #000;
-            padding-bottom: 10px;
-        }
-        .metadata {
-            margin-bottom: 20px;
-            font-size: 10pt;
-        }
-        .metadata table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-        .metadata td {
-            padding: 5px;
-            border: 1px solid #ccc;
-        }
-        .metadata td:first-child {
-            font-weight: bold;
-            width: 30%;
-        }
-        h1 {
-            font-size: 16pt;
-            font-weight: bold;
-            margin-top: 20px;
-            margin-bottom: 15px;
-        }
-        h2 {
-            font-size: 14pt;
-            font-weight: bold;
-            margin-top: 15px;
-            margin-bottom: 10px;
-        }
-        h3 {
-            font-size: 12pt;
-            font-weight: bold;
-            margin-top: 10px;
-            margin-bottom: 8px;
-        }
-        p {
-            margin-bottom: 10px;
-            text-align: justify;
-        }
-        ul, ol {
-            margin-bottom: 10px;
-            padding-left: 30px;
-        }
-        li {
-            margin-bottom: 5px;
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 15px 0;
-        }
-        table th, table td {
-            border: 1px solid #000;
-            padding: 8px;
-            text-align: left;
-        }
-        table th {
-            background-color: #f0f0f0;
-            font-weight: bold;
-        }
-        code {
-            background-color: #f4f4f4;
-            padding: 2px 4px;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-        }
-        pre {
-            background-color: #f4f4f4;
-            padding: 10px;
-            border-radius: 5px;
-            overflow-x: auto;
-        }
-        pre code {
-            background-color: transparent;
-            padding: 0;
-        }
-        .footer {
-            margin-top: 30px;
-            padding-top: 10px;
-            border-top: 1px solid #000;
-            font-size: 10pt;
-        }
-        @media print {
-            body {
-                max-width: 100%;
-                padding: 0;
-            }
-        }
-        .approval-block {
-            text-align: right;
-            margin-bottom: 30px;
-            padding-bottom: 20px;
-            border-bottom: 1px solid #ddd;
-            font-size: 11pt;
-        }
-        .approval-block .approval-title {
-            font-weight: bold;
-            margin-bottom: 15px;
-            font-size: 12pt;
-        }
-        .approval-block .approval-content {
-            line-height: 1.8;
-        }
-    </style>
-</head>
-<body>
-    {% if metadata.approval_block %}
-    <div class="approval-block">
-        <div class="approval-title">УТВЕРЖДАЮ</div>
-        <div class="approval-content">
-            {% for line in metadata.approval_block.split('\n') %}
-            {{ line }}<br>
-            {% endfor %}
-        </div>
-    </div>
-    {% endif %}
+        return self._render_document(html_content, metadata, hide_technical, inline_style)
     
-    <div class="header">
-        <h1>{{ title }}</h1>
-    </div>
-    
-    {% if metadata and not hide_technical %}
-    <div class="metadata">
-        <table>
-            {% if metadata.organization %}
-            <tr>
-                <td>Организация:</td>
-                <td>{{ metadata.organization }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.department %}
-            <tr>
-                <td>Отдел:</td>
-                <td>{{ metadata.department }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.type %}
-            <tr>
-                <td>Тип документа:</td>
-                <td>{{ metadata.type }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.number %}
-            <tr>
-                <td>Номер:</td>
-                <td>{{ metadata.number }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.draft_number %}
-            <tr>
-                <td>Номер в разработке (черновик):</td>
-                <td>{{ metadata.draft_number }}</td>
-            </tr>
-            {% elif metadata.status == 'в разработке' or metadata.status == 'черновик' %}
-            <tr>
-                <td>Номер в разработке (черновик):</td>
-                <td><em>Не присвоен</em></td>
-            </tr>
-            {% endif %}
-            {% if metadata.date %}
-            <tr>
-                <td>Дата:</td>
-                <td>{{ metadata.date }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.status %}
-            <tr>
-                <td>Статус:</td>
-                <td>{{ metadata.status }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.approved_date %}
-            <tr>
-                <td>Дата подписания (утверждения):</td>
-                <td>{{ metadata.approved_date }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.effective_date %}
-            <tr>
-                <td>Дата ввода в действие:</td>
-                <td>{{ metadata.effective_date }}</td>
-            </tr>
-            {% endif %}
-            {% if metadata.expiry_date %}
-            <tr>
-                <td>Дата окончания действия:</td>
-                <td>{{ metadata.expiry_date }}</td>
-            </tr>
-            {% elif metadata.expiry_type %}
-            <tr>
-                <td>Срок действия:</td>
-                <td>{{ metadata.expiry_type }}</td>
-            </tr>
-            {% endif %}
-        </table>
-    </div>
-    {% endif %}
-    
-    {% if metadata.amendment_procedure and not hide_technical %}
-    <div class="amendment-procedure" style="margin-bottom: 20px; padding: 15px; background-color: #f9f9f9; border-left: 4px solid #0066cc;">
-        <h3 style="margin-top: 0; color: #0066cc;">Порядок внесения изменений</h3>
-        <p style="margin-bottom: 0;">{{ metadata.amendment_procedure }}</p>
-    </div>
-    {% endif %}
-    
-    <div class="content">
-        {{ content|safe }}
-    </div>
-    
-    <div class="footer">
-        <p>Страница <span class="page"></span></p>
-    </div>
-</body>
-</html>
-        """)
-        
+    def _render_document(self, html_content: str, metadata: dict,
+                         hide_technical: bool = False, inline_style: bool = True) -> str:
+        """Оборачивает HTML содержимого документа в полный HTML документ"""
         title = metadata.get('title', metadata.get('number', 'Документ'))
         
-        # Форматируем даты в формат дд.ММ.ГГГГ
-        formatted_metadata = metadata.copy()
-        if 'approved_date' in formatted_metadata:
-            formatted_metadata['approved_date'] = self.format_date(formatted_metadata['approved_date'])
-        if 'effective_date' in formatted_metadata:
-            formatted_metadata['effective_date'] = self.format_date(formatted_metadata['effective_date'])
-        if 'expiry_date' in formatted_metadata:
-            formatted_metadata['expiry_date'] = self.format_date(formatted_metadata['expiry_date'])
-        if 'date' in formatted_metadata:
-            formatted_metadata['date'] = self.format_date(formatted_metadata['date'])
-        
-        return template.render(
+        # Форматируем даты в формат дд.ММ.ГГГГ: отформатированные значения
+        # перекрывают исходные без копирования всех метаданных
+        formatted_dates = {}
+        for key in ('approved_date', 'effective_date', 'expiry_date', 'date'):
+            if key in metadata:
+                formatted_dates[key] = self.format_date(metadata[key])
+        formatted_metadata = ChainMap(formatted_dates, metadata)
+        
+        return _DOC_TEMPLATE.render(
             title=title,
             metadata=formatted_metadata,
             content=html_content,
-            hide_technical=hide_technical
+            hide_technical=hide_technical,
+            style=_STYLE_BLOCK if inline_style else ''
         )
     
-    def generate_html(self, document: dict) -> Optional[Path]:
-        """Генерирует HTML для одного документа"""
+    def generate_html(self, document: dict, content: Optional[str] = None) -> Optional[Path]:
+        """
+        Генерирует HTML для одного документа
+        
+        Args:
+            document: Документ
+            content: Уже сконвертированное содержимое (markdown_to_html с standalone=False)
+        """
         try:
-            html_content = self.markdown_to_html(
-                document['content'],
-                document,
-                standalone=True
-            )
+            if content is None:
+                content = self.markdown_to_html(document['content'], document, standalone=False)
+            html_content = self._render_document(content, document)
             
             # Определяем путь для HTML
             rel_path = Path(document['relative_path'])
             html_path = self.html_dir / rel_path.with_suffix('.html')
             html_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Сохраняем HTML
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            # Сохраняем HTML: кодируем один раз и пишем байты, минуя текстовый слой
+            with open(html_path, 'wb') as f:
+                f.write(html_content.encode('utf-8'))
             
             return html_path
         except Exception as e:
-            print(f"✗ Ошибка при генерации HTML для {document.get('file_path', 'unknown')}: {e}")
+            _LOG.error("✗ Ошибка при генерации HTML для %s: %s", document.get('file_path', 'unknown'), e)
             return None
     
-    def generate_pdf(self, document: dict) -> Optional[Path]:
-        """Генерирует PDF для одного документа"""
+    def generate_pdf(self, document: dict, content: Optional[str] = None) -> Optional[Path]:
+        """
+        Генерирует PDF для одного документа
+        
+        Args:
+            document: Документ
+            content: Уже сконвертированное содержимое (markdown_to_html с standalone=False)
+        """
         try:
             # Проверяем, нужно ли использовать бланк
             print_on_letterhead = document.get('print_on_letterhead', False)
             status = document.get('status', '').lower()
-            is_draft = status in ['в разработке', 'черновик', 'разработка']
+            is_draft = status in _DRAFT_STATUSES
             
             use_letterhead = print_on_letterhead and not is_draft
             
@@ -659,11 +830,14 @@ class DocumentConverter:
             hide_technical = use_letterhead
             
             # Генерируем HTML с учетом необходимости скрытия технических данных
-            html_content = self.markdown_to_html(
-                document['content'],
+            # (для WeasyPrint стили передаются заранее разобранными)
+            if content is None:
+                content = self.markdown_to_html(document['content'], document, standalone=False)
+            html_content = self._render_document(
+                content,
                 document,
-                standalone=True,
-                hide_technical=hide_technical
+                hide_technical=hide_technical,
+                inline_style=not HAS_WEASYPRINT
             )
             
             # Определяем путь для PDF
@@ -671,21 +845,38 @@ class DocumentConverter:
             pdf_path = self.pdf_dir / rel_path.with_suffix('.pdf')
             pdf_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Генерируем PDF контента
-            content_pdf_path = pdf_path.parent / f"{pdf_path.stem}_content.pdf"
+            # Ищем бланк, если его нужно использовать
+            letterhead_template = None
+            if use_letterhead and HAS_PYPDF:
+                letterhead_template = self.find_letterhead_template(document.get('type', ''))
+                if not (letterhead_template and letterhead_template.exists()):
+                    _LOG.warning("  Предупреждение: Шаблон бланка не найден для типа '%s'", document.get('type', ''))
+                    letterhead_template = None
+            
+            # Без бланка PDF контента пишется сразу в итоговый файл,
+            # с бланком - в память (без временного файла на диске)
+            pdf_target = None if letterhead_template else str(pdf_path)
+            content_pdf = None
             
             # Пробуем использовать WeasyPrint (предпочтительно)
             if HAS_WEASYPRINT:
                 try:
-                    HTML(string=html_content).write_pdf(
-                        str(content_pdf_path),
+                    content_pdf = HTML(string=html_content).write_pdf(
+                        pdf_target,
+                        stylesheets=[self._css],
+                        font_config=self._font_config,
                         presentational_hints=True
                     )
                 except Exception as e:
-                    print(f"  Предупреждение: WeasyPrint не смог создать PDF: {e}")
-                    print("  Пробую использовать pdfkit...")
+                    _LOG.warning("  Предупреждение: WeasyPrint не смог создать PDF: %s\n  Пробую использовать pdfkit...", e)
                     if HAS_PDFKIT:
                         try:
+                            # pdfkit нужен HTML со встроенными стилями
+                            html_content = self._render_document(
+                                content,
+                                document,
+                                hide_technical=hide_technical
+                            )
                             options = {
                                 'page-size': 'A4',
                                 'margin-top': '2cm',
@@ -696,7 +887,7 @@ class DocumentConverter:
                                 'no-outline': None,
                                 'enable-local-file-access': None
                             }
-                            pdfkit.from_string(html_content, str(content_pdf_path), options=options)
+                            content_pdf = pdfkit.from_string(html_content, pdf_target or False, options=options)
                         except Exception as e2:
                             if 'No wkhtmltopdf' in str(e2) or 'wkhtmltopdf' in str(e2).lower():
                                 raise Exception("wkhtmltopdf не найден. Установите: brew install wkhtmltopdf или используйте WeasyPrint: pip install weasyprint")
@@ -717,7 +908,7 @@ class DocumentConverter:
                         'no-outline': None,
                         'enable-local-file-access': None
                     }
-                    pdfkit.from_string(html_content, str(content_pdf_path), options=options)
+                    content_pdf = pdfkit.from_string(html_content, pdf_target or False, options=options)
                 except Exception as e:
                     if 'No wkhtmltopdf' in str(e) or 'wkhtmltopdf' in str(e).lower():
                         raise Exception("wkhtmltopdf не найден. Установите: brew install wkhtmltopdf или используйте WeasyPrint: pip install weasyprint")
@@ -726,67 +917,84 @@ class DocumentConverter:
                 raise Exception("Не установлен ни один PDF генератор. Установите: pip install weasyprint или pip install pdfkit")
             
             # Если нужно использовать бланк, накладываем контент на шаблон
-            if use_letterhead and HAS_PYPDF:
-                letterhead_template = self.find_letterhead_template(document.get('type', ''))
-                if letterhead_template and letterhead_template.exists():
-                    try:
-                        # Объединяем бланк и контент
-                        writer = PdfWriter()
-                        
-                        # Читаем шаблон бланка
-                        letterhead_reader = PdfReader(str(letterhead_template))
-                        content_reader = PdfReader(str(content_pdf_path))
-                        
-                        # Для каждой страницы контента накладываем на бланк
-                        for page_num in range(len(content_reader.pages)):
-                            # Берем первую страницу бланка (или повторяем, если страниц больше)
-                            letterhead_page = letterhead_reader.pages[min(page_num, len(letterhead_reader.pages) - 1)]
-                            content_page = content_reader.pages[page_num]
-                            
-                            # Накладываем контент на бланк
-                            letterhead_page.merge_page(content_page)
-                            writer.add_page(letterhead_page)
-                        
-                        # Сохраняем итоговый PDF
-                        with open(pdf_path, 'wb') as output_file:
-                            writer.write(output_file)
-                        
-                        # Удаляем временный файл контента
-                        content_pdf_path.unlink()
+            if letterhead_template:
+                try:
+                    # Объединяем бланк и контент
+                    writer = PdfWriter()
+                    
+                    # Читаем шаблон бланка (из памяти, с диска - только при изменении)
+                    letterhead_reader = PdfReader(io.BytesIO(self._read_letterhead(letterhead_template)))
+                    content_reader = PdfReader(io.BytesIO(content_pdf))
+                    
+                    # Для каждой страницы контента накладываем на бланк
+                    for page_num, content_page in enumerate(content_reader.pages):
+                        # Берем первую страницу бланка (или повторяем, если страниц больше)
+                        letterhead_page = letterhead_reader.pages[min(page_num, len(letterhead_reader.pages) - 1)]
                         
-                        return pdf_path
-                    except Exception as e:
-                        print(f"  Предупреждение: Не удалось наложить бланк: {e}")
-                        print(f"  Используется PDF без бланка")
-                        # Переименовываем временный файл в итоговый
-                        content_pdf_path.rename(pdf_path)
-                        return pdf_path
-                else:
-                    print(f"  Предупреждение: Шаблон бланка не найден для типа '{document.get('type', '')}'")
-                    # Переименовываем временный файл в итоговый
-                    content_pdf_path.rename(pdf_path)
-                    return pdf_path
-            else:
-                # Просто переименовываем временный файл в итоговый
-                if content_pdf_path.exists():
-                    content_pdf_path.rename(pdf_path)
-                return pdf_path
-                
+                        # Накладываем контент на копию страницы бланка в итоговом документе,
+                        # чтобы повторяющаяся страница бланка не накапливала контент
+                        writer.add_page(letterhead_page).merge_page(content_page)
+                    
+                    # Сохраняем итоговый PDF
+                    with open(pdf_path, 'wb') as output_file:
+                        writer.write(output_file)
+                except Exception as e:
+                    _LOG.warning("  Предупреждение: Не удалось наложить бланк: %s\n  Используется PDF без бланка", e)
+                    with open(pdf_path, 'wb') as output_file:
+                        output_file.write(content_pdf)
+            
+            return pdf_path
+        
         except Exception as e:
-            print(f"✗ Ошибка при генерации PDF для {document.get('file_path', 'unknown')}: {e}")
+            _LOG.error("✗ Ошибка при генерации PDF для %s: %s", document.get('file_path', 'unknown'), e)
             return None
     
+    def convert_document(self, document: dict, formats: List[str],
+                         batch: bool = False) -> Tuple[Optional[Path], Optional[Path]]:
+        """
+        Конвертирует один документ в указанные форматы
+        
+        Args:
+            document: Документ
+            formats: Список форматов ('html', 'pdf')
+            batch: Документ конвертируется в составе пакета (см. markdown_to_html)
+        
+        Returns:
+            (путь к HTML, путь к PDF); None для не запрошенного или не созданного формата
+        """
+        # Markdown конвертируется один раз для обоих форматов;
+        # HTML и PDF отличаются только оберткой документа
+        content = None
+        if 'html' in formats or 'pdf' in formats:
+            try:
+                content = self.markdown_to_html(document['content'], document,
+                                                standalone=False, batch=batch)
+            except Exception:
+                # Ошибка будет выведена при генерации каждого из форматов
+                content = None
+        
+        html_path = self.generate_html(document, content) if 'html' in formats else None
+        pdf_path = self.generate_pdf(document, content) if 'pdf' in formats else None
+        return html_path, pdf_path
+    
     def convert_documents(self, 
                          documents: List[Dict],
                          formats: List[str] = ['html', 'pdf'],
-                         verbose: bool = True) -> Dict[str, List[Path]]:
+                         verbose: bool = True,
+                         workers: Optional[int] = None) -> Dict[str, List[Path]]:
         """
         Конвертирует список документов в указанные форматы
         
+        Документы конвертируются параллельно в нескольких процессах
+        (генерация HTML и PDF загружает процессор). Процессы порождаются
+        через fork, поэтому из многопоточного процесса (веб-сервер)
+        вызывайте с workers=1
+        
         Args:
             documents: Список документов для конвертации
             formats: Список форматов ('html', 'pdf')
             verbose: Выводить ли информацию о процессе
+            workers: Количество процессов (по умолчанию - число ядер)
         
         Returns:
             Словарь с ключами 'html' и 'pdf', содержащий списки путей к созданным файлам
@@ -794,47 +1002,87 @@ class DocumentConverter:
         results = {'html': [], 'pdf': []}
         
         if verbose:
-            print(f"Найдено документов для конвертации: {len(documents)}")
-            print(f"Форматы: {', '.join(formats)}")
-            print()
+            _LOG.info("Найдено документов для конвертации: %d\nФорматы: %s\n", len(documents), ', '.join(formats))
         
-        for i, doc in enumerate(documents, 1):
-            if verbose:
-                rel_path = doc.get('relative_path', doc.get('file_path', 'unknown'))
-                print(f"[{i}/{len(documents)}] Обработка: {rel_path}")
-            
-            if 'html' in formats:
-                html_path = self.generate_html(doc)
+        workers = min(workers or os.cpu_count() or 1, len(documents))
+        executor = None
+        self._clear_lookup_cache()
+        if workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(str(self.documents_dir), str(self.html_dir),
+                          str(self.pdf_dir), str(self.templates_dir))
+            )
+            converted = executor.map(_convert_one, documents, repeat(formats), chunksize=4)
+        else:
+            converted = (self.convert_document(doc, formats, batch=True) for doc in documents)
+        
+        try:
+            for i, (doc, (html_path, pdf_path)) in enumerate(zip(documents, converted), 1):
                 if html_path:
                     results['html'].append(html_path)
-                    if verbose:
-                        print(f"  ✓ HTML: {html_path}")
-            
-            if 'pdf' in formats:
-                pdf_path = self.generate_pdf(doc)
                 if pdf_path:
                     results['pdf'].append(pdf_path)
-                    if verbose:
-                        print(f"  ✓ PDF: {pdf_path}")
+                
+                if verbose:
+                    # Одна запись журнала на документ
+                    _LOG.info(
+                        "[%d/%d] Обработка: %s%s%s",
+                        i, len(documents),
+                        doc.get('relative_path', doc.get('file_path', 'unknown')),
+                        f"\n  ✓ HTML: {html_path}" if html_path else '',
+                        f"\n  ✓ PDF: {pdf_path}" if pdf_path else ''
+                    )
+        finally:
+            if executor:
+                executor.shutdown()
+            self._clear_lookup_cache()
         
         if verbose:
-            print()
-            print("=" * 60)
-            print(f"Конвертация завершена:")
+            summary = ["", "=" * 60, "Конвертация завершена:"]
             if 'html' in formats:
-                print(f"  HTML файлов создано: {len(results['html'])}")
+                summary.append(f"  HTML файлов создано: {len(results['html'])}")
             if 'pdf' in formats:
-                print(f"  PDF файлов создано: {len(results['pdf'])}")
-            print("=" * 60)
+                summary.append(f"  PDF файлов создано: {len(results['pdf'])}")
+            summary.append("=" * 60)
+            _LOG.info("\n".join(summary))
         
         return results
     
+    def convert(self,
+                formats: List[str] = ['html', 'pdf'],
+                filters: Optional[Dict[str, str]] = None,
+                verbose: bool = True,
+                workers: Optional[int] = None) -> Dict[str, List[Path]]:
+        """
+        Конвертирует документы, подходящие под фильтры (без фильтров - все)
+        
+        Args:
+            formats: Форматы для конвертации
+            filters: Аргументы DocumentParser.filter_documents
+                (organization, department, doc_type, status); пустые значения игнорируются
+            verbose: Выводить сообщения о ходе конвертации
+            workers: Количество процессов (см. convert_documents)
+        """
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        if not filters:
+            documents = self.parser.get_all_documents()
+        else:
+            documents = self.parser.filter_documents(**filters)
+            if verbose:
+                _LOG.info("Применены фильтры: %s", ', '.join(
+                    f"{_FILTER_LABELS[key]}={value}" for key, value in filters.items()
+                ))
+                _LOG.info("")
+        
+        return self.convert_documents(documents, formats, verbose, workers)
+    
     def convert_all(self, 
                    formats: List[str] = ['html', 'pdf'],
                    verbose: bool = True) -> Dict[str, List[Path]]:
         """Конвертирует все документы"""
-        documents = self.parser.get_all_documents()
-        return self.convert_documents(documents, formats, verbose)
+        return self.convert(formats, verbose=verbose)
     
     def convert_filtered(self,
                         organization: Optional[str] = None,
@@ -842,30 +1090,40 @@ class DocumentConverter:
                         doc_type: Optional[str] = None,
                         status: Optional[str] = None,
                         formats: List[str] = ['html', 'pdf'],
-                        verbose: bool = True) -> Dict[str, List[Path]]:
-        """Конвертирует документы с применением фильтров"""
-        documents = self.parser.filter_documents(
-            organization=organization,
-            department=department,
-            doc_type=doc_type,
-            status=status
-        )
+                        verbose: bool = True,
+                        workers: int = 1) -> Dict[str, List[Path]]:
+        """
+        Конвертирует документы с применением фильтров
         
-        if verbose:
-            filters = []
-            if organization:
-                filters.append(f"организация={organization}")
-            if department:
-                filters.append(f"отдел={department}")
-            if doc_type:
-                filters.append(f"тип={doc_type}")
-            if status:
-                filters.append(f"статус={status}")
-            if filters:
-                print(f"Применены фильтры: {', '.join(filters)}")
-            print()
-        
-        return self.convert_documents(documents, formats, verbose)
+        По умолчанию в текущем процессе: метод вызывается из обработчиков
+        многопоточного веб-сервера, где fork рабочих процессов небезопасен
+        """
+        filters = {
+            'organization': organization,
+            'department': department,
+            'doc_type': doc_type,
+            'status': status
+        }
+        return self.convert(formats, filters, verbose, workers)
+
+
+# Конвертер рабочего процесса (создается один раз при запуске процесса)
+_worker_converter = None
+
+
+def _init_worker(documents_dir: str, html_dir: str, pdf_dir: str, templates_dir: str):
+    """Инициализирует конвертер в рабочем процессе"""
+    global _worker_converter
+    _worker_converter = DocumentConverter(documents_dir, html_dir, pdf_dir, templates_dir)
+
+
+def _convert_one(document: dict, formats: List[str]) -> Tuple[Optional[Path], Optional[Path]]:
+    """
+    Конвертирует один документ в рабочем процессе
+    
+    Рабочий процесс живет только в пределах одной пакетной конвертации
+    """
+    return _worker_converter.convert_document(document, formats, batch=True)
 
 
 def main():
@@ -936,6 +1194,13 @@ def main():
     
     args = parser.parse_args()
     
+    # Сообщения конвертера выводятся через logging (--quiet - только ошибки)
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO,
+        format='%(message)s',
+        stream=sys.stdout
+    )
+    
     # Создаем конвертер
     converter = DocumentConverter(
         documents_dir=args.documents_dir,
@@ -943,29 +1208,22 @@ def main():
         pdf_dir=args.pdf_dir
     )
     
-    # Определяем, есть ли фильтры
-    has_filters = any([
-        args.organization,
-        args.department,
-        args.doc_type,
-        args.status
-    ])
+    # Фильтры из аргументов (незаданные не передаются)
+    filters = {
+        key: value for key, value in (
+            ('organization', args.organization),
+            ('department', args.department),
+            ('doc_type', args.doc_type),
+            ('status', args.status)
+        ) if value
+    }
     
     # Конвертируем
-    if has_filters:
-        converter.convert_filtered(
-            organization=args.organization,
-            department=args.department,
-            doc_type=args.doc_type,
-            status=args.status,
-            formats=args.formats,
-            verbose=not args.quiet
-        )
-    else:
-        converter.convert_all(
-            formats=args.formats,
-            verbose=not args.quiet
-        )
+    converter.convert(
+        formats=args.formats,
+        filters=filters,
+        verbose=not args.quiet
+    )
 
 
 if __name__ == "__main__":
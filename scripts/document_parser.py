@@ -1,61 +1,209 @@
 """
 Парсер документов из Markdown с YAML front matter
 """
+import codecs
+import copy
+import functools
+import logging
 import os
 import yaml
 import re
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+# Загрузчик YAML на C (libyaml), если PyYAML собран с ним
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+_LOG = logging.getLogger(__name__)
+
+# Ошибки разбора отдельного документа: файл пропускается, остальные обрабатываются.
+# ValueError включает UnicodeDecodeError и файл вне директории документов,
+# TypeError - front matter, который не является словарем
+_PARSE_ERRORS = (OSError, ValueError, TypeError, yaml.YAMLError)
+
+# YAML front matter и содержимое документа
+_RE_FRONT_MATTER = re.compile(r'^---\s*\n(.*?)\n---\s*\n(.*)$', re.DOTALL)
+
+# Начало файла с закрытым YAML front matter (для чтения только метаданных)
+_RE_FRONT_MATTER_HEAD = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+_RE_FRONT_MATTER_HEAD_BYTES = re.compile(rb'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+
+# Блок "УТВЕРЖДАЮ" в начале документа: # УТВЕРЖДАЮ, **УТВЕРЖДАЮ** или УТВЕРЖДАЮ,
+# затем текст до следующего заголовка
+_RE_APPROVAL_START = re.compile(
+    r'^(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n(.*?)(?=\n\n#\s+[^У])',
+    re.DOTALL | re.MULTILINE | re.IGNORECASE
+)
+
+# Блок "УТВЕРЖДАЮ" в конце документа (после ---)
+_RE_APPROVAL_END = re.compile(
+    r'\n---\s*\n\n(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n(.*?)(?:\n---|\Z)',
+    re.DOTALL | re.IGNORECASE
+)
+
+# Оба варианта блока "УТВЕРЖДАЮ" одним выражением: документ сканируется один раз
+_RE_APPROVAL = re.compile(
+    r'(?P<start>^(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n(?P<start_block>.*?)(?=\n\n#\s+[^У]))'
+    r'|(?P<end>\n---\s*\n\n(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n(?P<end_block>.*?)(?:\n---|\Z))',
+    re.DOTALL | re.MULTILINE | re.IGNORECASE
+)
+
+# Оставшийся после удаления блока разделитель --- в конце документа
+_RE_TRAILING_HR = re.compile(r'\n---\s*\n\s*$')
+
+# Поддерживаемые форматы приложений: расширение -> тип файла
+_ATTACHMENT_TYPES = {
+    **dict.fromkeys(('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp'), 'image'),
+    **dict.fromkeys(('.xlsx', '.xls', '.csv', '.ods'), 'table'),
+    **dict.fromkeys(('.pdf', '.doc', '.docx', '.txt', '.rtf'), 'other'),
+}
 
 
 class DocumentParser:
     """Парсер документов в формате Markdown с метаданными"""
     
+    # Индекс пустого дерева документов
+    _EMPTY_INDEX = {'by_number': {}, 'by_org_number': {}, 'by_path': {}}
+    
     def __init__(self, documents_dir: str = "documents"):
         self.documents_dir = Path(documents_dir)
+        # Разобранные документы и снимок дерева, для которого они получены
+        self._docs_cache: Optional[List[Dict]] = None
+        self._docs_cache_sig: Optional[List[Tuple[str, int, int]]] = None
+        # Индексы разобранных документов (см. get_document_index)
+        self._doc_index: Dict[str, Dict] = self._EMPTY_INDEX
+        # Только метаданные документов (без содержимого) и снимок дерева для них
+        self._meta_cache: Optional[List[Dict]] = None
+        self._meta_cache_sig: Optional[List[Tuple[str, int, int]]] = None
+        # Разобранное содержимое файлов по (путь, mtime_ns, размер): повторный разбор
+        # неизмененного файла (например, цели нескольких ссылок doc:) берется из кэша
+        self._parse_cached = functools.lru_cache(maxsize=4096)(self._parse_file)
     
     def parse_document(self, file_path: Path) -> Optional[Dict]:
         """Парсит документ и возвращает метаданные и содержимое"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Разделяем YAML front matter и Markdown
-            yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
-            
-            if yaml_match:
-                yaml_content = yaml_match.group(1)
-                markdown_content = yaml_match.group(2)
-                metadata = yaml.safe_load(yaml_content)
-            else:
-                metadata = {}
-                markdown_content = content
+            st = os.stat(file_path)
+            yaml_metadata, markdown_content, approval_block, cleaned_content = \
+                self._parse_cached(str(file_path), st.st_mtime_ns, st.st_size)
+            # Кэш разделяется между вызовами, поэтому метаданные копируются
+            metadata = copy.copy(yaml_metadata)
             
             # Добавляем путь к файлу
             metadata['file_path'] = str(file_path)
-            metadata['relative_path'] = str(file_path.relative_to(self.documents_dir))
+            relative_path = file_path.relative_to(self.documents_dir)
+            metadata['relative_path'] = relative_path.as_posix()
             metadata['content'] = markdown_content
             
             # Извлекаем организацию и отдел из пути
-            parts = file_path.relative_to(self.documents_dir).parts
+            parts = relative_path.parts
             if len(parts) >= 2:
                 metadata['organization'] = metadata.get('organization', parts[0])
                 metadata['department'] = metadata.get('department', parts[1])
             
-            # Ищем приложения к документу
+            # Ищем приложения к документу (не кэшируются: зависят не только от файла)
             attachments = self._find_attachments(file_path)
             if attachments:
                 metadata['attachments'] = attachments
             
-            # Извлекаем блок "УТВЕРЖДАЮ" из содержимого
-            approval_block, cleaned_content = self._extract_approval_block(markdown_content)
             if approval_block:
                 metadata['approval_block'] = approval_block
                 metadata['content'] = cleaned_content
             
             return metadata
-        except Exception as e:
-            print(f"Ошибка при парсинге {file_path}: {e}")
+        except _PARSE_ERRORS as e:
+            _LOG.error("Ошибка при парсинге %s: %s", file_path, e)
+            return None
+    
+    def _parse_file(self, path: str, mtime_ns: int, size: int) -> Tuple[Any, str, Optional[str], str]:
+        """
+        Читает и разбирает файл документа (результат кэшируется в _parse_cached)
+        
+        Returns:
+            (yaml_metadata, markdown_content, approval_block, cleaned_content)
+        """
+        content = self._read_text(Path(path))
+        
+        # Разделяем YAML front matter и Markdown
+        yaml_match = _RE_FRONT_MATTER.match(content)
+        
+        if yaml_match:
+            yaml_content = yaml_match.group(1)
+            markdown_content = yaml_match.group(2)
+            metadata = yaml.load(yaml_content, Loader=_SafeLoader)
+        else:
+            metadata = {}
+            markdown_content = content
+        
+        # Извлекаем блок "УТВЕРЖДАЮ" из содержимого
+        approval_block, cleaned_content = self._extract_approval_block(markdown_content)
+        return metadata, markdown_content, approval_block, cleaned_content
+    
+    @staticmethod
+    def _read_text(file_path: Path) -> str:
+        """
+        Читает файл документа: байты декодируются за один вызов, без текстового
+        слоя ввода-вывода. BOM в начале файла отбрасывается, переводы строк
+        приводятся к \\n, как при чтении в текстовом режиме
+        """
+        content = file_path.read_bytes().decode('utf-8-sig')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+    
+    # Сколько байт начала файла читать в поисках конца YAML front matter
+    METADATA_READ_SIZE = 16384
+    
+    def parse_document_metadata_only(self, file_path: Path) -> Optional[Dict]:
+        """
+        Парсит только метаданные документа (YAML front matter и путь)
+        
+        Читается только начало файла до конца front matter; содержимое, приложения
+        и блок "УТВЕРЖДАЮ" не обрабатываются. Если front matter не помещается
+        в METADATA_READ_SIZE байт, документ разбирается полностью
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                head = f.read(self.METADATA_READ_SIZE)
+                whole_file = len(head) < self.METADATA_READ_SIZE or not f.read(1)
+            if head.startswith(codecs.BOM_UTF8):
+                head = head[len(codecs.BOM_UTF8):]
+            
+            head_match = _RE_FRONT_MATTER_HEAD_BYTES.match(head)
+            if head_match:
+                # Граница совпадения приходится на \n, поэтому декодирование префикса корректно
+                text = head[:head_match.end()].decode('utf-8')
+            elif whole_file:
+                text = head.decode('utf-8')
+            else:
+                return self.parse_document(file_path)
+            
+            # Переводы строк как при чтении в текстовом режиме
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+            yaml_match = _RE_FRONT_MATTER_HEAD.match(text)
+            if yaml_match:
+                metadata = yaml.load(yaml_match.group(1), Loader=_SafeLoader)
+            elif not whole_file:
+                return self.parse_document(file_path)
+            else:
+                metadata = {}
+            
+            metadata['file_path'] = str(file_path)
+            relative_path = file_path.relative_to(self.documents_dir)
+            metadata['relative_path'] = relative_path.as_posix()
+            
+            # Извлекаем организацию и отдел из пути
+            parts = relative_path.parts
+            if len(parts) >= 2:
+                metadata['organization'] = metadata.get('organization', parts[0])
+                metadata['department'] = metadata.get('department', parts[1])
+            
+            return metadata
+        except _PARSE_ERRORS as e:
+            _LOG.error("Ошибка при парсинге %s: %s", file_path, e)
             return None
     
     def _extract_approval_block(self, content: str) -> Tuple[Optional[str], str]:
@@ -65,48 +213,41 @@ class DocumentParser:
         Returns:
             (approval_block, cleaned_content) - блок утверждения и очищенное содержимое
         """
-        import re
-        
-        # Ищем блок в начале документа
-        # Паттерн: # УТВЕРЖДАЮ или **УТВЕРЖДАЮ** или УТВЕРЖДАЮ, затем текст до следующего заголовка
-        start_match = re.search(
-            r'^(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n(.*?)(?=\n\n#\s+[^У])',
-            content,
-            re.DOTALL | re.MULTILINE | re.IGNORECASE
-        )
-        
-        if start_match:
-            approval_block = start_match.group(1).strip()
-            # Убираем блок из начала (включая заголовок УТВЕРЖДАЮ)
-            cleaned_content = re.sub(
-                r'^(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n.*?(?=\n\n#\s+[^У])',
-                '',
-                content,
-                flags=re.DOTALL | re.MULTILINE | re.IGNORECASE
-            )
-            return approval_block, cleaned_content.strip()
-        
-        # Ищем блок в конце документа (после ---)
-        end_match = re.search(
-            r'\n---\s*\n\n(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n(.*?)(?:\n---|\Z)',
-            content,
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        if end_match:
-            approval_block = end_match.group(1).strip()
-            # Убираем весь блок из конца (включая --- и заголовок УТВЕРЖДАЮ)
-            cleaned_content = re.sub(
-                r'\n---\s*\n\n(?:#\s*|\*\*)?УТВЕРЖДАЮ(?:\*\*)?\s*\n\n.*?(?:\n---|\Z)',
-                '',
-                content,
-                flags=re.DOTALL | re.IGNORECASE
-            )
+        # Без слова "УТВЕРЖДАЮ" (в любом регистре, как в шаблонах) блока нет
+        if 'утверждаю' not in content.lower():
+            return None, content
+        
+        match = _RE_APPROVAL.search(content)
+        if match is None:
+            return None, content
+        
+        if match.group('start') is not None:
+            # Блок в начале документа (включая заголовок УТВЕРЖДАЮ)
+            pattern, block = _RE_APPROVAL_START, match.group('start_block')
+        else:
+            # Блок в начале документа имеет приоритет над блоком после ---,
+            # даже если он расположен дальше по тексту
+            start_match = _RE_APPROVAL_START.search(content, match.start() + 1)
+            if start_match:
+                match = start_match
+                pattern, block = _RE_APPROVAL_START, start_match.group(1)
+            else:
+                # Блок в конце документа убирается целиком (включая --- и заголовок)
+                pattern, block = _RE_APPROVAL_END, match.group('end_block')
+        
+        # Вырезаем найденный блок и остальные блоки того же вида срезами строки
+        parts = [content[:match.start()]]
+        pos = match.end()
+        for extra in pattern.finditer(content, pos):
+            parts.append(content[pos:extra.start()])
+            pos = extra.end()
+        parts.append(content[pos:])
+        cleaned_content = ''.join(parts)
+        
+        if pattern is _RE_APPROVAL_END:
             # Убираем оставшийся --- если есть
-            cleaned_content = re.sub(r'\n---\s*\n\s*$', '', cleaned_content)
-            return approval_block, cleaned_content.strip()
-        
-        return None, content
+            cleaned_content = _RE_TRAILING_HR.sub('', cleaned_content)
+        return block.strip(), cleaned_content.strip()
     
     def _find_attachments(self, doc_path: Path) -> List[Dict]:
         """
@@ -132,60 +273,174 @@ class DocumentParser:
             f'{doc_name}_attachments'
         ]
         
-        # Поддерживаемые форматы файлов
-        image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp'}
-        table_extensions = {'.xlsx', '.xls', '.csv', '.ods'}
-        other_extensions = {'.pdf', '.doc', '.docx', '.txt', '.rtf'}
-        all_extensions = image_extensions | table_extensions | other_extensions
+        # Директория документа читается один раз вместо проверки exists()/is_dir()
+        # для каждого возможного имени
+        candidates = set(attachment_dir_names)
+        try:
+            with os.scandir(doc_dir) as entries:
+                present = {entry.name for entry in entries
+                           if entry.name in candidates and entry.is_dir()}
+        except OSError:
+            present = set()
         
         for dir_name in attachment_dir_names:
-            attachment_dir = doc_dir / dir_name
-            if attachment_dir.exists() and attachment_dir.is_dir():
-                for file_path in attachment_dir.rglob('*'):
-                    if file_path.is_file() and file_path.suffix.lower() in all_extensions:
-                        rel_path = file_path.relative_to(doc_dir)
-                        file_type = 'image' if file_path.suffix.lower() in image_extensions else \
-                                   'table' if file_path.suffix.lower() in table_extensions else \
-                                   'other'
-                        
-                        attachments.append({
-                            'name': file_path.name,
-                            'path': str(rel_path),
-                            'relative_path': str(rel_path),
-                            'type': file_type,
-                            'size': file_path.stat().st_size,
-                            'extension': file_path.suffix.lower()
-                        })
+            if dir_name in present:
+                attachment_dir = doc_dir / dir_name
+                # Обход через os.scandir: тип и размер файла берутся из записи
+                # каталога, без отдельных вызовов is_file()/stat() для каждого пути
+                stack = [(str(attachment_dir), dir_name)]
+                while stack:
+                    dir_path, rel_dir = stack.pop()
+                    with os.scandir(dir_path) as entries:
+                        for entry in entries:
+                            name = entry.name
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append((entry.path, os.path.join(rel_dir, name)))
+                                continue
+                            
+                            # Расширение как у Path.suffix; проверяем до обращения к файлу
+                            dot = name.rfind('.')
+                            extension = name[dot:].lower() if 0 < dot < len(name) - 1 else ''
+                            file_type = _ATTACHMENT_TYPES.get(extension)
+                            if file_type is None or not entry.is_file():
+                                continue
+                            
+                            rel_path = os.path.join(rel_dir, name)
+                            attachments.append({
+                                'name': name,
+                                'path': rel_path,
+                                'relative_path': rel_path,
+                                'type': file_type,
+                                'size': entry.stat().st_size,
+                                'extension': extension
+                            })
                 break  # Используем первую найденную директорию
         
-        return sorted(attachments, key=lambda x: x['name'])
+        attachments.sort(key=itemgetter('name'))
+        return attachments
     
-    def get_all_documents(self) -> List[Dict]:
-        """Получает все документы из директории"""
-        documents = []
-        
-        if not self.documents_dir.exists():
-            return documents
+    def _tree_signature(self) -> List[Tuple[str, int, int]]:
+        """
+        Снимок дерева документов: пути, время изменения и размеры всех файлов
+        и директорий (включая приложения). Получение снимка требует только
+        обхода директорий и stat, без чтения и разбора файлов
+        """
+        signature = []
+        for root, dirs, files in os.walk(self.documents_dir):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                signature.append((path, st.st_mtime_ns, st.st_size))
+        return signature
+    
+    def _iter_document_files(self) -> List[Path]:
+        """
+        Возвращает файлы документов (кроме карточек сотрудников), отсортированные по пути
         
+        Дерево обходится одним проходом через os.scandir: тип записи берется
+        из каталога, папки сотрудников пропускаются целиком
+        """
         # Исключаем папки с карточками сотрудников
         excluded_folders = {'сотрудники', 'employees'}
         
-        for md_file in self.documents_dir.rglob('*.md'):
-            # Пропускаем файлы из папок сотрудников
-            parts = md_file.relative_to(self.documents_dir).parts
-            if any(part in excluded_folders for part in parts):
+        md_files = []
+        stack = [str(self.documents_dir)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in excluded_folders:
+                            stack.append(entry.path)
+                    elif entry.name.endswith('.md') and entry.is_file():
+                        md_files.append(entry.path)
+        
+        md_files.sort()
+        return [Path(md_file) for md_file in md_files]
+    
+    def _load_documents(self) -> List[Dict]:
+        """
+        Возвращает кэшированный список разобранных документов
+        
+        Документы перечитываются, только если изменилось дерево документов;
+        вместе со списком перестраиваются индексы по номеру и пути документа
+        """
+        if not self.documents_dir.exists():
+            return []
+        
+        signature = self._tree_signature()
+        if self._docs_cache is not None and signature == self._docs_cache_sig:
+            return self._docs_cache
+        
+        parsed = (self.parse_document(md_file) for md_file in self._iter_document_files())
+        documents = [doc for doc in parsed if doc]
+        
+        # Индексы по номеру и пути (как и при переборе, побеждает первый найденный документ)
+        by_number = {}
+        by_org_number = {}
+        by_path = {}
+        for doc in documents:
+            by_path.setdefault(doc['relative_path'], doc)
+            number = doc.get('number')
+            if number is None:
                 continue
-            
-            doc = self.parse_document(md_file)
+            try:
+                by_number.setdefault(number, doc)
+                by_org_number.setdefault((doc.get('organization'), number), doc)
+            except TypeError:
+                # Нехешируемое значение (например, список в YAML) не совпадет с номером из ссылки
+                continue
+        
+        self._docs_cache = documents
+        self._docs_cache_sig = signature
+        self._doc_index = {'by_number': by_number, 'by_org_number': by_org_number, 'by_path': by_path}
+        return documents
+    
+    def get_all_documents(self) -> List[Dict]:
+        """
+        Получает все документы из директории
+        
+        Результат кэшируется, пока не изменилось дерево документов. Возвращаются
+        копии словарей, чтобы изменения у вызывающего кода не попадали в кэш
+        """
+        return [dict(doc) for doc in self._load_documents()]
+    
+    def _load_metadata(self) -> List[Dict]:
+        """
+        Возвращает метаданные всех документов
+        
+        Если полный список документов актуален, используется он, иначе
+        читается только YAML front matter каждого файла
+        """
+        if not self.documents_dir.exists():
+            return []
+        
+        signature = self._tree_signature()
+        if self._docs_cache is not None and signature == self._docs_cache_sig:
+            return self._docs_cache
+        if self._meta_cache is not None and signature == self._meta_cache_sig:
+            return self._meta_cache
+        
+        documents = []
+        for md_file in self._iter_document_files():
+            doc = self.parse_document_metadata_only(md_file)
             if doc:
                 documents.append(doc)
         
+        self._meta_cache = documents
+        self._meta_cache_sig = signature
         return documents
     
+    def get_all_documents_metadata_only(self) -> List[Dict]:
+        """Получает метаданные всех документов без содержимого и приложений"""
+        return [dict(doc) for doc in self._load_metadata()]
+    
     def get_organizations(self) -> List[str]:
         """Получает список всех организаций"""
         orgs = set()
-        for doc in self.get_all_documents():
+        for doc in self._load_metadata():
             if 'organization' in doc:
                 orgs.add(doc['organization'])
         return sorted(list(orgs))
@@ -193,7 +448,7 @@ class DocumentParser:
     def get_departments(self, organization: Optional[str] = None) -> List[str]:
         """Получает список отделов (опционально для конкретной организации)"""
         depts = set()
-        for doc in self.get_all_documents():
+        for doc in self._load_metadata():
             if 'department' in doc:
                 if organization is None or doc.get('organization') == organization:
                     depts.add(doc['department'])
@@ -202,7 +457,7 @@ class DocumentParser:
     def get_document_types(self) -> List[str]:
         """Получает список типов документов"""
         types = set()
-        for doc in self.get_all_documents():
+        for doc in self._load_metadata():
             if 'type' in doc:
                 types.add(doc['type'])
         return sorted(list(types))
@@ -211,11 +466,22 @@ class DocumentParser:
                         department: Optional[str] = None,
                         doc_type: Optional[str] = None,
                         status: Optional[str] = None) -> List[Dict]:
-        """Фильтрует документы по критериям"""
-        documents = self.get_all_documents()
+        """
+        Фильтрует документы по критериям
+        
+        Отбор идет по метаданным (при устаревшем кэше читается только YAML
+        front matter), полностью разбираются лишь подошедшие документы.
+        Организация и отдел могут быть заданы в front matter, поэтому обход
+        не ограничивается поддиректорией по пути
+        """
+        if not (organization or department or doc_type or status):
+            return self.get_all_documents()
+        
+        candidates = self._load_metadata()
+        full_documents = candidates is self._docs_cache
         
         filtered = []
-        for doc in documents:
+        for doc in candidates:
             if organization and doc.get('organization') != organization:
                 continue
             if department and doc.get('department') != department:
@@ -224,30 +490,64 @@ class DocumentParser:
                 continue
             if status and doc.get('status') != status:
                 continue
-            filtered.append(doc)
+            if full_documents:
+                filtered.append(dict(doc))
+            else:
+                parsed = self.parse_document(Path(doc['file_path']))
+                if parsed:
+                    filtered.append(parsed)
         
         return filtered
     
+    def get_document_index(self) -> Dict[str, Dict]:
+        """
+        Возвращает индексы документов для разрешения многих ссылок подряд
+        
+        Актуальность кэша (обход дерева документов и stat каждого файла)
+        проверяется один раз - при вызове. Код, разрешающий много ссылок
+        (обработка одного документа, пакетная конвертация), получает индекс
+        один раз и передает его в find_document_by_number; изменения
+        документов после получения индекса в нем не видны
+        
+        Returns:
+            {'by_number': {номер: документ},
+             'by_org_number': {(организация, номер): документ},
+             'by_path': {относительный путь: документ}};
+            документы общие с кэшем парсера и не изменяются вызывающим кодом
+        """
+        if not self._load_documents():
+            return self._EMPTY_INDEX
+        return self._doc_index
+    
     def find_document_by_number(self, number: str, 
-                                organization: Optional[str] = None) -> Optional[Dict]:
+                                organization: Optional[str] = None,
+                                index: Optional[Dict[str, Dict]] = None) -> Optional[Dict]:
         """
         Находит документ по номеру
         
+        Без index каждый вызов проверяет актуальность кэша документов
+        (обход дерева и stat всех файлов), сам поиск - по словарю
+        
         Args:
             number: Номер документа (например, "ПОЛ-001")
             organization: Опционально, ограничить поиск организацией
+            index: Индекс из get_document_index() (без повторной проверки дерева)
         
         Returns:
             Словарь с метаданными документа или None
         """
-        documents = self.get_all_documents()
-        
-        for doc in documents:
-            if doc.get('number') == number:
-                if organization is None or doc.get('organization') == organization:
-                    return doc
+        if index is None:
+            index = self.get_document_index()
         
-        return None
+        try:
+            if organization is None:
+                doc = index['by_number'].get(number)
+            else:
+                doc = index['by_org_number'].get((organization, number))
+        except TypeError:
+            # Нехешируемое значение (например, список в YAML) не совпадет с номером документа
+            return None
+        return dict(doc) if doc is not None else None
     
     def find_document_by_path(self, path: str, 
                              current_doc_path: Optional[str] = None) -> Optional[Dict]:
@@ -266,6 +566,19 @@ class DocumentParser:
         Returns:
             Словарь с метаданными документа или None
         """
+        doc_file = self._resolve_document_file(path, current_doc_path)
+        if doc_file is None:
+            return None
+        return self.parse_document(doc_file)
+    
+    def _resolve_document_file(self, path: str,
+                               current_doc_path: Optional[str] = None) -> Optional[Path]:
+        """
+        Находит файл документа по пути (только проверки существования, без чтения файла)
+        
+        Returns:
+            Путь к файлу документа или None
+        """
         # Если путь уже содержит расширение .md, используем как есть
         if not path.endswith('.md'):
             path = f"{path}.md"
@@ -273,7 +586,7 @@ class DocumentParser:
         # Пробуем как абсолютный путь
         doc_file = self.documents_dir / path
         if doc_file.exists() and doc_file.is_file():
-            return self.parse_document(doc_file)
+            return doc_file
         
         # Если указан текущий документ, пробуем относительный путь
         if current_doc_path:
@@ -283,12 +596,12 @@ class DocumentParser:
             # Относительный путь от текущего документа
             relative_file = current_dir / path
             if relative_file.exists() and relative_file.is_file():
-                return self.parse_document(relative_file)
+                return relative_file
             
             # Относительный путь от директории текущего документа
             relative_file = self.documents_dir / current_dir / path
             if relative_file.exists() and relative_file.is_file():
-                return self.parse_document(relative_file)
+                return relative_file
         
         return None
     
@@ -314,12 +627,16 @@ class DocumentParser:
         # Пробуем найти по номеру
         doc = self.find_document_by_number(doc_ref, current_org)
         if doc:
-            return doc.get('relative_path', '').replace('\\', '/')
-        
-        # Пробуем найти по пути
-        doc = self.find_document_by_path(doc_ref, current_doc_path)
-        if doc:
-            return doc.get('relative_path', '').replace('\\', '/')
+            return doc.get('relative_path')
+        
+        # Пробуем найти по пути (для URL достаточно пути к файлу, документ не разбираем)
+        doc_file = self._resolve_document_file(doc_ref, current_doc_path)
+        if doc_file:
+            try:
+                return doc_file.relative_to(self.documents_dir).as_posix()
+            except ValueError:
+                # Файл вне директории документов
+                return None
         
         return None
 
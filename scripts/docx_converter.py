@@ -3,8 +3,11 @@
 """
 import os
 import sys
+import shutil
+from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import re
 
 # Добавляем текущую директорию в путь для импорта
@@ -14,6 +17,12 @@ try:
     from docx import Document
     from docx.shared import Pt, Inches, RGBColor
     from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    # lxml устанавливается вместе с python-docx
+    from lxml import etree
+    from lxml import html as lxml_html
     HAS_DOCX = True
 except ImportError:
     HAS_DOCX = False
@@ -22,16 +31,563 @@ from document_parser import DocumentParser
 import markdown2
 from html import unescape
 
+# Быстрый Markdown-парсер (необязательно, иначе используется markdown2)
+try:
+    from markdown_it import MarkdownIt
+    HAS_MARKDOWN_IT = True
+except ImportError:
+    HAS_MARKDOWN_IT = False
+
+
+# Теги без закрывающей пары
+_VOID_TAGS = frozenset({'br', 'hr', 'img', 'input', 'meta', 'link', 'col', 'area', 'base', 'wbr', 'source'})
+
+# Пробельные символы внутри текста HTML (схлопываются в один пробел)
+_RE_WS = re.compile(r'\s+')
+
+# Остаток тега до закрывающей '>' (символ '>' внутри значений атрибутов в кавычках
+# не завершает тег)
+_RE_TAG_END = re.compile(r'''[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>''')
+
+# Форматы строковой даты документа (для даты создания DOCX)
+_DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y')
+
+# Атрибут значения выравнивания абзаца (<w:jc w:val="...">)
+_JC_VAL = qn('w:val') if HAS_DOCX else None
+
+# Стили заголовков DOCX и соответствующие им префиксы Markdown
+_HEADING_PREFIXES = {
+    'Heading 1': '# ',
+    'Heading 2': '## ',
+    'Heading 3': '### ',
+    'Heading 4': '#### ',
+    'Title': '# ',
+}
+
+
+def iter_block_items(doc: Document):
+    """
+    Перебирает абзацы и таблицы тела документа в порядке следования
+    
+    Тело документа обходится один раз (doc.paragraphs и doc.tables - это
+    два отдельных прохода, при которых теряется взаимный порядок)
+    """
+    for child in doc.element.body.iterchildren():
+        tag = child.tag
+        if tag.endswith('}p'):
+            yield Paragraph(child, doc)
+        elif tag.endswith('}tbl'):
+            yield Table(child, doc)
+
+
+def _is_centered(paragraph: Paragraph) -> bool:
+    """
+    Проверяет выравнивание абзаца по центру по элементу <w:pPr><w:jc>
+    
+    Значение атрибута сравнивается со строкой напрямую, без преобразования
+    в перечисление через свойство paragraph.alignment
+    """
+    pPr = paragraph._p.pPr
+    if pPr is None:
+        return False
+    jc = pPr.jc
+    return jc is not None and jc.get(_JC_VAL) == 'center'
+
+
+def _copy_file(src: Path, dst: Path):
+    """
+    Копирует файл вместе с метаданными (как shutil.copy2)
+    
+    Где есть os.copy_file_range (Linux), данные копируются ядром, без чтения
+    в память процесса, а на файловых системах с поддержкой reflink - без
+    копирования блоков; при ошибке используется shutil.copy2
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                # Вызов может скопировать меньше запрошенного
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _add_docx_table(doc: Document, rows: List[List[Tuple[str, bool]]]):
+    """
+    Добавляет в документ таблицу по матрице ячеек (текст, жирный)
+    
+    Все строки создаются сразу при добавлении таблицы; текст записывается
+    в пустой абзац новой ячейки напрямую через XML, без объектов-оберток
+    python-docx и очистки содержимого ячейки для каждого значения
+    """
+    max_cols = max((len(cells) for cells in rows), default=0)
+    if max_cols == 0:
+        return
+    
+    table = doc.add_table(rows=len(rows), cols=max_cols, style='Light Grid Accent 1')
+    for tr, cells in zip(table._tbl.tr_lst, rows):
+        for tc, (cell_text, bold) in zip(tr.tc_lst, cells):
+            r = tc.p_lst[0].add_r()
+            r.text = cell_text
+            if bold:
+                r.get_or_add_rPr().get_or_add_b()
+
+
+class HtmlTokenizer:
+    """
+    Однопроходный разбор HTML на события: текст, открывающий, закрывающий
+    и самозакрывающийся тег
+    
+    Текст между тегами находится через str.find('<'), имя тега берется срезом,
+    значения атрибутов в кавычках пропускаются при поиске конца тега;
+    комментарии и служебные конструкции (<!DOCTYPE>, <?...?>) пропускаются
+    """
+    
+    TEXT = 'text'
+    OPEN = 'open'
+    CLOSE = 'close'
+    SELF_CLOSE = 'self_close'
+    
+    def __init__(self, buf: str):
+        self.buf = buf
+        self.pos = 0
+    
+    def next_token(self) -> Optional[Tuple[str, str]]:
+        """
+        Возвращает следующее событие (вид, значение) или None в конце текста
+        
+        Для тегов значение - имя тега в нижнем регистре, для текста - текст
+        с раскрытыми HTML-сущностями
+        """
+        buf = self.buf
+        size = len(buf)
+        pos = self.pos
+        
+        while pos < size:
+            lt = buf.find('<', pos)
+            if lt == -1:
+                lt = size
+            if lt > pos:
+                self.pos = lt
+                return self.TEXT, unescape(buf[pos:lt])
+            
+            if buf.startswith('<!--', pos):
+                end = buf.find('-->', pos + 4)
+                pos = size if end == -1 else end + 3
+                continue
+            
+            match = _RE_TAG_END.match(buf, pos + 1)
+            gt = match.end() - 1 if match else -1
+            first = buf[pos + 1:pos + 2]
+            if gt == -1 or not (first.isalpha() or first in ('/', '!', '?')):
+                # Одиночный '<' - обычный текст
+                end = buf.find('<', pos + 1)
+                if end == -1:
+                    end = size
+                self.pos = end
+                return self.TEXT, unescape(buf[pos:end])
+            
+            self.pos = gt + 1
+            if first in ('!', '?'):
+                pos = self.pos
+                continue
+            
+            closing = first == '/'
+            name_start = pos + 2 if closing else pos + 1
+            name_end = name_start
+            while name_end < gt and (buf[name_end].isalnum()):
+                name_end += 1
+            name = buf[name_start:name_end].lower()
+            if not name:
+                pos = self.pos
+                continue
+            
+            if closing:
+                return self.CLOSE, name
+            if name in _VOID_TAGS or buf[gt - 1] == '/':
+                return self.SELF_CLOSE, name
+            return self.OPEN, name
+        
+        self.pos = size
+        return None
+
+
+class DocxBuilder:
+    """
+    Построение DOCX по событиям разметки (открытие/закрытие тегов и текст)
+    
+    Текст блока (абзаца, заголовка, элемента списка) накапливается вместе с
+    признаками жирного и курсивного начертания и записывается в документ при
+    закрытии блока; таблицы собираются целиком и добавляются при закрытии
+    """
+    
+    def __init__(self, doc: Document):
+        self.doc = doc
+        # Фрагменты текущего блока: (текст, жирный, курсив) или None для переноса строки
+        self.segments: List[Optional[Tuple[str, bool, bool]]] = []
+        self.bold = 0
+        self.italic = 0
+        # Стили открытых списков и глубина вложенности элементов списка
+        self.lists: List[str] = []
+        self.list_items = 0
+        self.heading_level: Optional[int] = None
+        self.preformatted = 0
+        # Строки собираемой таблицы: (тексты ячеек, строка заголовка)
+        self.table_rows: Optional[List[Tuple[List[str], bool]]] = None
+        self.cell: Optional[List[str]] = None
+    
+    def start(self, tag: str):
+        """Обрабатывает открывающий тег (один поиск обработчика по имени тега)"""
+        handlers = self._TABLE_START if self.table_rows is not None else self._START
+        handler = handlers.get(tag)
+        if handler is not None:
+            handler(self, tag)
+    
+    def end(self, tag: str):
+        """Обрабатывает закрывающий тег"""
+        handlers = self._TABLE_END if self.table_rows is not None else self._END
+        handler = handlers.get(tag)
+        if handler is not None:
+            handler(self, tag)
+    
+    # Обработчики тегов
+    
+    def _start_bold(self, tag: str):
+        self.bold += 1
+    
+    def _end_bold(self, tag: str):
+        self.bold = max(0, self.bold - 1)
+    
+    def _start_italic(self, tag: str):
+        self.italic += 1
+    
+    def _end_italic(self, tag: str):
+        self.italic = max(0, self.italic - 1)
+    
+    def _start_break(self, tag: str):
+        if self.cell is not None:
+            self.cell.append(' ')
+        else:
+            self.segments.append(None)
+    
+    def _flush_block(self, tag: str):
+        self.flush()
+        # Незакрытые <b>/<i> не переносят начертание в следующий блок
+        self.bold = 0
+        self.italic = 0
+    
+    def _start_heading(self, tag: str):
+        self._flush_block(tag)
+        self.heading_level = int(tag[1])
+    
+    def _end_heading(self, tag: str):
+        self._flush_block(tag)
+        self.heading_level = None
+    
+    def _start_list(self, tag: str):
+        self.flush()
+        self.lists.append('List Bullet' if tag == 'ul' else 'List Number')
+    
+    def _end_list(self, tag: str):
+        self.flush()
+        if self.lists:
+            self.lists.pop()
+    
+    def _start_item(self, tag: str):
+        self._flush_block(tag)
+        self.list_items += 1
+    
+    def _end_item(self, tag: str):
+        self._flush_block(tag)
+        self.list_items = max(0, self.list_items - 1)
+    
+    def _start_pre(self, tag: str):
+        self.flush()
+        self.preformatted += 1
+    
+    def _end_pre(self, tag: str):
+        self.flush()
+        self.preformatted = max(0, self.preformatted - 1)
+    
+    def _start_table(self, tag: str):
+        self.flush()
+        self.table_rows = []
+    
+    def _start_row(self, tag: str):
+        self.table_rows.append(([], False))
+    
+    def _start_cell(self, tag: str):
+        if self.table_rows:
+            self.cell = []
+            if tag == 'th':
+                self.table_rows[-1] = (self.table_rows[-1][0], True)
+    
+    def _end_cell(self, tag: str):
+        if self.cell is not None:
+            self.table_rows[-1][0].append(_RE_WS.sub(' ', ''.join(self.cell)).strip())
+            self.cell = None
+    
+    def _end_table(self, tag: str):
+        rows = self.table_rows
+        self.table_rows = None
+        self.cell = None
+        self._add_table(rows)
+    
+    # Таблицы обработчиков. Внутри таблицы важны только строки, ячейки и
+    # начертание текста; открытие и закрытие блоков без собственной обработки
+    # (p, div, blockquote...) завершает текущий абзац
+    _START = {
+        'strong': _start_bold, 'b': _start_bold,
+        'em': _start_italic, 'i': _start_italic,
+        'br': _start_break,
+        'h1': _start_heading, 'h2': _start_heading, 'h3': _start_heading,
+        'h4': _start_heading, 'h5': _start_heading, 'h6': _start_heading,
+        'ul': _start_list, 'ol': _start_list,
+        'li': _start_item,
+        'pre': _start_pre,
+        'table': _start_table,
+        'p': _flush_block, 'div': _flush_block, 'blockquote': _flush_block,
+        'hr': _flush_block, 'center': _flush_block,
+        'dl': _flush_block, 'dt': _flush_block, 'dd': _flush_block,
+    }
+    _END = {
+        'strong': _end_bold, 'b': _end_bold,
+        'em': _end_italic, 'i': _end_italic,
+        'h1': _end_heading, 'h2': _end_heading, 'h3': _end_heading,
+        'h4': _end_heading, 'h5': _end_heading, 'h6': _end_heading,
+        'ul': _end_list, 'ol': _end_list,
+        'li': _end_item,
+        'pre': _end_pre,
+        'p': _flush_block, 'div': _flush_block, 'blockquote': _flush_block,
+        'hr': _flush_block, 'center': _flush_block,
+        'dl': _flush_block, 'dt': _flush_block, 'dd': _flush_block,
+    }
+    _TABLE_START = {
+        'strong': _start_bold, 'b': _start_bold,
+        'em': _start_italic, 'i': _start_italic,
+        'br': _start_break,
+        'tr': _start_row,
+        'td': _start_cell, 'th': _start_cell,
+    }
+    _TABLE_END = {
+        'strong': _end_bold, 'b': _end_bold,
+        'em': _end_italic, 'i': _end_italic,
+        'td': _end_cell, 'th': _end_cell,
+        'table': _end_table,
+    }
+    
+    def feed_html(self, html_content: str):
+        """
+        Передает построителю события HTML-токенизатора
+        
+        Используется для фрагментов HTML из токенов markdown-it: отдельный
+        открывающий или закрывающий тег не образует дерева для lxml
+        """
+        tokenizer = HtmlTokenizer(html_content)
+        token = tokenizer.next_token()
+        while token is not None:
+            kind, value = token
+            if kind == HtmlTokenizer.TEXT:
+                self.text(value)
+            elif kind == HtmlTokenizer.OPEN:
+                self.start(value)
+            elif kind == HtmlTokenizer.CLOSE:
+                self.end(value)
+            else:
+                self.start(value)
+                self.end(value)
+            token = tokenizer.next_token()
+    
+    def feed_tree(self, root):
+        """
+        Передает построителю события дерева lxml (без самого корня)
+        
+        Для каждого элемента: открытие тега, его текст, закрытие тега и текст
+        после элемента (tail); у комментариев учитывается только tail
+        """
+        if root.text:
+            self.text(root.text)
+        for event, elem in etree.iterwalk(root, events=('start', 'end')):
+            if elem is root:
+                continue
+            tag = elem.tag if isinstance(elem.tag, str) else None
+            if event == 'start':
+                if tag is not None:
+                    self.start(tag)
+                    if elem.text:
+                        self.text(elem.text)
+            else:
+                if tag is not None:
+                    self.end(tag)
+                if elem.tail:
+                    self.text(elem.tail)
+    
+    def feed_tokens(self, tokens):
+        """
+        Передает построителю токены markdown-it
+        
+        Открывающие и закрывающие токены несут имя HTML-тега (h1, p, ul, li,
+        table, strong...), поэтому обрабатываются так же, как теги HTML
+        """
+        for token in tokens:
+            if token.nesting == 1:
+                self.start(token.tag)
+            elif token.nesting == -1:
+                self.end(token.tag)
+            elif token.type == 'inline':
+                self.feed_tokens(token.children or ())
+            elif token.type in ('text', 'code_inline'):
+                self.text(token.content)
+            elif token.type in ('softbreak', 'hardbreak'):
+                self.start('br')
+            elif token.type in ('fence', 'code_block'):
+                self.start('pre')
+                self.text(token.content)
+                self.end('pre')
+            elif token.type in ('html_block', 'html_inline'):
+                self.feed_html(token.content)
+            elif token.type == 'hr':
+                self.start('hr')
+    
+    def text(self, text: str):
+        """Добавляет текст к текущему блоку или ячейке таблицы"""
+        if self.cell is not None:
+            self.cell.append(text)
+        elif self.table_rows is None:
+            self.segments.append((text, self.bold > 0, self.italic > 0))
+    
+    def finish(self):
+        """Записывает оставшийся текст и незакрытую таблицу"""
+        if self.table_rows is not None:
+            self.end('table')
+        self.flush()
+    
+    def flush(self):
+        """Записывает накопленный текст блока как заголовок или абзац"""
+        if not self.segments:
+            return
+        segments = self.segments
+        self.segments = []
+        
+        if self.preformatted:
+            # Код: пробелы сохраняются, строки разделяются переносами
+            lines = ''.join(segment[0] for segment in segments if segment).strip('\n').split('\n')
+            if not any(line.strip() for line in lines):
+                return
+            para = self.doc.add_paragraph()
+            for index, line in enumerate(lines):
+                run = para.add_run(line)
+                if index < len(lines) - 1:
+                    run.add_break()
+            return
+        
+        runs = self._normalize(segments)
+        if not runs:
+            return
+        
+        if self.heading_level is not None:
+            # Заголовки жирные по умолчанию, форматирование внутри не переносится
+            text = ' '.join(''.join(run[0] for run in runs if run).split())
+            self.doc.add_heading(text, level=min(self.heading_level, 4))
+            return
+        
+        style = None
+        if self.list_items:
+            style = self.lists[-1] if self.lists else 'List Bullet'
+        para = self.doc.add_paragraph(style=style)
+        for run_data in runs:
+            if run_data is None:
+                para.add_run().add_break()
+                continue
+            text, bold, italic = run_data
+            run = para.add_run(text)
+            if bold:
+                run.bold = True
+            if italic:
+                run.italic = True
+    
+    @staticmethod
+    def _normalize(segments: List[Optional[Tuple[str, bool, bool]]]) -> List[Optional[Tuple[str, bool, bool]]]:
+        """
+        Схлопывает пробелы как при отображении HTML, убирает пробелы в начале
+        и конце строк и объединяет соседние фрагменты с одинаковым начертанием
+        """
+        runs: List[Optional[Tuple[str, bool, bool]]] = []
+        line_start = True
+        for segment in segments:
+            if segment is None:
+                DocxBuilder._rstrip_runs(runs)
+                runs.append(None)
+                line_start = True
+                continue
+            
+            text, bold, italic = segment
+            text = _RE_WS.sub(' ', text)
+            if line_start or (runs and runs[-1] is not None and runs[-1][0].endswith(' ')):
+                text = text.lstrip(' ')
+            if not text:
+                continue
+            line_start = False
+            
+            if runs and runs[-1] is not None and runs[-1][1] == bold and runs[-1][2] == italic:
+                runs[-1] = (runs[-1][0] + text, bold, italic)
+            else:
+                runs.append((text, bold, italic))
+        
+        DocxBuilder._rstrip_runs(runs)
+        # Переносы строк в начале и в конце блока не нужны
+        while runs and runs[-1] is None:
+            runs.pop()
+        while runs and runs[0] is None:
+            runs.pop(0)
+        return runs
+    
+    @staticmethod
+    def _rstrip_runs(runs: List[Optional[Tuple[str, bool, bool]]]):
+        """Убирает пробелы в конце последней строки фрагментов"""
+        while runs and runs[-1] is not None:
+            text, bold, italic = runs[-1]
+            text = text.rstrip(' ')
+            if text:
+                runs[-1] = (text, bold, italic)
+                return
+            runs.pop()
+    
+    def _add_table(self, rows: List[Tuple[List[str], bool]]):
+        """Добавляет таблицу; первая строка и строки с <th> выделяются жирным"""
+        _add_docx_table(self.doc, [
+            [(cell_text, is_header or row_idx == 0) for cell_text in cells]
+            for row_idx, (cells, is_header) in enumerate(rows)
+        ])
+
 
 class DocxConverter:
     """Конвертер между DOCX и Markdown форматами"""
     
+    # Пустой DOCX с настроенными стилями (шаблон для всех создаваемых документов)
+    _TEMPLATE_DOCX: Optional[bytes] = None
+    
     def __init__(self, documents_dir: str = "documents", 
                  versions_dir: str = "version_history/versions"):
         self.documents_dir = Path(documents_dir)
         self.versions_dir = Path(versions_dir)
         self.parser = DocumentParser(documents_dir)
         self.versions_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Markdown-парсер создается один раз для всех документов
+        self._md = None
+        if HAS_MARKDOWN_IT:
+            self._md = MarkdownIt('commonmark', {'html': True, 'breaks': True}).enable('table')
+        self._markdown2 = markdown2.Markdown(
+            extras=['fenced-code-blocks', 'tables', 'header-ids', 'break-on-newline']
+        )
     
     def docx_to_markdown(self, docx_path: Path, 
                         include_metadata: bool = True,
@@ -65,48 +621,8 @@ class DocxConverter:
             if core_props.modified:
                 metadata['modified'] = core_props.modified.strftime('%Y-%m-%d')
         
-        # Извлекаем содержимое
-        content_lines = []
-        
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if not text:
-                content_lines.append('')
-                continue
-            
-            # Определяем стиль заголовка
-            style_name = paragraph.style.name if paragraph.style else ''
-            
-            if 'Heading 1' in style_name or paragraph.style.name == 'Title':
-                content_lines.append(f'# {text}')
-            elif 'Heading 2' in style_name:
-                content_lines.append(f'## {text}')
-            elif 'Heading 3' in style_name:
-                content_lines.append(f'### {text}')
-            elif 'Heading 4' in style_name:
-                content_lines.append(f'#### {text}')
-            elif paragraph.alignment == WD_ALIGN_PARAGRAPH.CENTER:
-                content_lines.append(f'<center>{text}</center>')
-            else:
-                content_lines.append(text)
-        
-        # Обрабатываем таблицы
-        for table in doc.tables:
-            content_lines.append('')
-            # Заголовок таблицы
-            if table.rows:
-                header_row = table.rows[0]
-                headers = [cell.text.strip() for cell in header_row.cells]
-                content_lines.append('| ' + ' | '.join(headers) + ' |')
-                content_lines.append('| ' + ' | '.join(['---'] * len(headers)) + ' |')
-                
-                # Данные таблицы
-                for row in table.rows[1:]:
-                    cells = [cell.text.strip() for cell in row.cells]
-                    content_lines.append('| ' + ' | '.join(cells) + ' |')
-            content_lines.append('')
-        
-        content = '\n'.join(content_lines)
+        # Извлекаем содержимое: абзацы и таблицы в порядке документа
+        content = '\n'.join(self._emit_lines(doc))
         
         # Формируем YAML front matter
         if include_metadata and metadata:
@@ -119,6 +635,82 @@ class DocxConverter:
         
         return content
     
+    def _emit_lines(self, doc: Document):
+        """
+        Генерирует строки Markdown для абзацев и таблиц документа
+        
+        Несколько пустых строк подряд (пустые абзацы, отступы вокруг
+        таблиц) выдаются как одна пустая строка
+        """
+        prev_blank = False
+        for block in iter_block_items(doc):
+            if isinstance(block, Table):
+                lines = self._table_lines(block)
+            else:
+                lines = (self._paragraph_line(block),)
+            
+            for line in lines:
+                if not line:
+                    if prev_blank:
+                        continue
+                    prev_blank = True
+                else:
+                    prev_blank = False
+                yield line
+    
+    def _paragraph_line(self, paragraph: Paragraph) -> str:
+        """Преобразует абзац DOCX в строку Markdown"""
+        text = paragraph.text.strip()
+        if not text:
+            return ''
+        
+        # Определяем стиль заголовка
+        style_name = paragraph.style.name if paragraph.style else ''
+        prefix = _HEADING_PREFIXES.get(style_name)
+        if prefix is None and 'Heading ' in style_name:
+            # Стили, в имени которых есть имя стандартного заголовка
+            prefix = next((md_prefix for name, md_prefix in _HEADING_PREFIXES.items()
+                           if name != 'Title' and name in style_name), None)
+        
+        if prefix is not None:
+            return prefix + text
+        if _is_centered(paragraph):
+            return f'<center>{text}</center>'
+        return text
+    
+    def _table_lines(self, table: Table):
+        """Генерирует строки таблицы Markdown для таблицы DOCX"""
+        yield ''
+        # Заголовок таблицы
+        rows = table.rows
+        if rows:
+            header_row = rows[0]
+            headers = [cell.text.strip() for cell in header_row.cells]
+            yield '| ' + ' | '.join(headers) + ' |'
+            yield '| ' + ' | '.join(['---'] * len(headers)) + ' |'
+            
+            # Данные таблицы
+            for row in rows[1:]:
+                cells = [cell.text.strip() for cell in row.cells]
+                yield '| ' + ' | '.join(cells) + ' |'
+        yield ''
+    
+    @classmethod
+    def _get_template_bytes(cls) -> bytes:
+        """Возвращает шаблон DOCX, создавая его при первом обращении"""
+        if cls._TEMPLATE_DOCX is None:
+            doc = Document()
+            
+            # Настройка стилей
+            font = doc.styles['Normal'].font
+            font.name = 'Times New Roman'
+            font.size = Pt(12)
+            
+            buffer = BytesIO()
+            doc.save(buffer)
+            cls._TEMPLATE_DOCX = buffer.getvalue()
+        return cls._TEMPLATE_DOCX
+    
     def markdown_to_docx(self, markdown_content: str, 
                         metadata: Dict[str, Any],
                         output_path: Path,
@@ -140,13 +732,8 @@ class DocxConverter:
         if not HAS_DOCX:
             raise ImportError("python-docx не установлен. Установите: pip install python-docx")
         
-        doc = Document()
-        
-        # Настройка стилей
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Times New Roman'
-        font.size = Pt(12)
+        # Стили уже настроены в шаблоне
+        doc = Document(BytesIO(self._get_template_bytes()))
         
         # Устанавливаем метаданные документа
         if include_metadata:
@@ -156,20 +743,16 @@ class DocxConverter:
             if metadata.get('organization'):
                 core_props.author = metadata.get('organization', '')
             if metadata.get('date'):
-                try:
-                    from datetime import datetime
-                    date_str = metadata['date']
-                    if isinstance(date_str, str):
-                        # Пробуем разные форматы
-                        for fmt in ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y']:
-                            try:
-                                date_obj = datetime.strptime(date_str.split()[0], fmt)
-                                core_props.created = date_obj
-                                break
-                            except:
-                                continue
-                except:
-                    pass
+                date_str = metadata['date']
+                if isinstance(date_str, str) and date_str.split():
+                    date_part = date_str.split()[0]
+                    # Пробуем разные форматы
+                    for fmt in _DATE_FORMATS:
+                        try:
+                            core_props.created = datetime.strptime(date_part, fmt)
+                            break
+                        except ValueError:
+                            continue
         
         # Добавляем заголовок
         if metadata.get('title'):
@@ -197,14 +780,14 @@ class DocxConverter:
                 tech_para.style = 'List Bullet'
                 doc.add_paragraph('')  # Пустая строка
         
-        # Конвертируем Markdown в HTML для более точной обработки
-        html_content = markdown2.markdown(
-            markdown_content,
-            extras=['fenced-code-blocks', 'tables', 'header-ids', 'break-on-newline']
-        )
-        
-        # Используем простой парсинг HTML, который лучше сохраняет форматирование
-        self._simple_html_parse(html_content, doc)
+        if self._md is not None:
+            # Токены markdown-it переносятся в документ напрямую, без HTML
+            builder = DocxBuilder(doc)
+            builder.feed_tokens(self._md.parse(markdown_content))
+            builder.finish()
+        else:
+            # markdown2 умеет только HTML: разбираем его за один проход
+            self._simple_html_parse(self._markdown2.convert(markdown_content), doc)
         
         # Сохраняем документ
         output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -212,484 +795,18 @@ class DocxConverter:
         
         return output_path
     
-    def _html_to_docx(self, html_content: str, doc: Document):
+    def _simple_html_parse(self, html_content: str, doc: Document):
         """
-        Конвертирует HTML в элементы DOCX
+        Разбирает HTML и добавляет элементы в документ
         
-        Args:
-            html_content: HTML содержимое
-            doc: Объект Document для добавления элементов
+        HTML разбирается парсером lxml в дерево (незакрытые теги, комментарии
+        и сущности обрабатывает libxml2), обход дерева передается в DocxBuilder
         """
-        from xml.etree import ElementTree as ET
-        import re
-        
-        # Парсим HTML
-        try:
-            # Очищаем HTML от некорректных тегов
-            html_content = re.sub(r'<br\s*/?>', '\n', html_content)
-            root = ET.fromstring(f'<root>{html_content}</root>')
-        except:
-            # Если не удалось распарсить как XML, используем простой парсинг
-            self._simple_html_parse(html_content, doc)
-            return
-        
-        current_para = None
-        list_level = 0
-        list_style = None
-        
-        def process_element(elem, para=None, in_list=False):
-            nonlocal current_para, list_level, list_style
-            
-            tag = elem.tag.lower()
-            text = elem.text or ''
-            tail = elem.tail or ''
-            
-            # Заголовки
-            if tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                level = int(tag[1])
-                heading_text = self._extract_text(elem)
-                if heading_text.strip():
-                    doc.add_heading(heading_text, level=min(level, 4))
-                current_para = None
-            
-            # Параграфы
-            elif tag == 'p':
-                para_text = self._extract_text(elem)
-                if para_text.strip():
-                    current_para = doc.add_paragraph()
-                    self._add_formatted_text(current_para, para_text)
-                else:
-                    doc.add_paragraph('')
-            
-            # Списки
-            elif tag in ['ul', 'ol']:
-                list_level += 1
-                list_style = 'List Bullet' if tag == 'ul' else 'List Number'
-                for item in elem.findall('.//li'):
-                    item_text = self._extract_text(item)
-                    if item_text.strip():
-                        para = doc.add_paragraph(item_text, style=list_style)
-                        self._add_formatted_text(para, item_text)
-                list_level -= 1
-                list_style = None
-            
-            # Элементы списка
-            elif tag == 'li':
-                if not in_list:
-                    item_text = self._extract_text(elem)
-                    if item_text.strip():
-                        para = doc.add_paragraph(item_text, style=list_style or 'List Bullet')
-                        self._add_formatted_text(para, item_text)
-            
-            # Таблицы
-            elif tag == 'table':
-                self._process_table(elem, doc)
-            
-            # Обычный текст
-            elif text.strip() or tail.strip():
-                if not current_para:
-                    current_para = doc.add_paragraph()
-                if text.strip():
-                    self._add_formatted_text(current_para, text)
-                if tail.strip():
-                    self._add_formatted_text(current_para, tail)
-            
-            # Рекурсивно обрабатываем дочерние элементы
-            for child in elem:
-                process_element(child, current_para, in_list=(tag in ['ul', 'ol']))
-        
-        # Обрабатываем корневой элемент
-        for child in root:
-            process_element(child)
-    
-    def _simple_html_parse(self, html_content: str, doc: Document):
-        """Простой парсинг HTML через регулярные выражения с сохранением форматирования"""
-        import re
-        
-        # Обрабатываем таблицы отдельно - извлекаем и сразу парсим
-        tables = []
-        table_pattern = r'<table[^>]*>(.*?)</table>'
-        table_matches = list(re.finditer(table_pattern, html_content, flags=re.DOTALL | re.IGNORECASE))
-        
-        # Обрабатываем таблицы в обратном порядке, чтобы не сбить индексы при замене
-        for match in reversed(table_matches):
-            table_html = match.group(0)
-            tables.append((match.start(), match.end(), table_html))
-            # Заменяем таблицу на плейсхолдер
-            html_content = html_content[:match.start()] + f'__TABLE_PLACEHOLDER_{len(tables)-1}__' + html_content[match.end():]
-        
-        # Обрабатываем списки с сохранением структуры
-        html_content = re.sub(r'<ul[^>]*>', '\n__UL_START__\n', html_content, flags=re.IGNORECASE)
-        html_content = re.sub(r'</ul>', '\n__UL_END__\n', html_content, flags=re.IGNORECASE)
-        html_content = re.sub(r'<ol[^>]*>', '\n__OL_START__\n', html_content, flags=re.IGNORECASE)
-        html_content = re.sub(r'</ol>', '\n__OL_END__\n', html_content, flags=re.IGNORECASE)
-        
-        # Заголовки
-        html_content = re.sub(r'<h1[^>]*>(.*?)</h1>', r'__H1__\1__/H1__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<h2[^>]*>(.*?)</h2>', r'__H2__\1__/H2__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<h3[^>]*>(.*?)</h3>', r'__H3__\1__/H3__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<h4[^>]*>(.*?)</h4>', r'__H4__\1__/H4__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Параграфы
-        html_content = re.sub(r'<p[^>]*>(.*?)</p>', r'__P__\1__/P__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Элементы списков
-        html_content = re.sub(r'<li[^>]*>(.*?)</li>', r'__LI__\1__/LI__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Удаляем оставшиеся HTML теги, но сохраняем форматирование
-        # Жирный и курсив обрабатываем отдельно
-        html_content = re.sub(r'<strong[^>]*>(.*?)</strong>', r'__BOLD__\1__/BOLD__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<b[^>]*>(.*?)</b>', r'__BOLD__\1__/BOLD__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<em[^>]*>(.*?)</em>', r'__ITALIC__\1__/ITALIC__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        html_content = re.sub(r'<i[^>]*>(.*?)</i>', r'__ITALIC__\1__/ITALIC__', html_content, flags=re.DOTALL | re.IGNORECASE)
-        
-        # Удаляем остальные теги
-        html_content = re.sub(r'<[^>]+>', '', html_content)
-        html_content = unescape(html_content)
-        
-        # Парсим построчно
-        lines = html_content.split('\n')
-        i = 0
-        in_list = False
-        list_style = None
-        last_was_empty = False  # Отслеживаем последовательные пустые строки
-        
-        while i < len(lines):
-            line = lines[i]
-            
-            # Таблицы - обрабатываем плейсхолдеры
-            if '__TABLE_PLACEHOLDER_' in line:
-                # Извлекаем индекс таблицы
-                match = re.search(r'__TABLE_PLACEHOLDER_(\d+)__', line)
-                if match:
-                    table_idx = int(match.group(1))
-                    if table_idx < len(tables):
-                        # Парсим таблицу из сохраненного HTML
-                        table_html = tables[table_idx][2]
-                        self._parse_table_html(table_html, doc)
-                        last_was_empty = False
-                i += 1
-                continue
-            
-            # Заголовки
-            if '__H1__' in line:
-                text = re.sub(r'__H1__|__/H1__', '', line)
-                text = re.sub(r'__(P|/P|LI|/LI|UL_START|UL_END|OL_START|OL_END)__', '', text)
-                # Удаляем маркеры форматирования и применяем форматирование
-                text = self._clean_formatting_markers(text)
-                if text.strip():
-                    heading = doc.add_heading(text.strip(), level=1)
-                    last_was_empty = False
-            elif '__H2__' in line:
-                text = re.sub(r'__H2__|__/H2__', '', line)
-                text = re.sub(r'__(P|/P|LI|/LI|UL_START|UL_END|OL_START|OL_END)__', '', text)
-                # Удаляем маркеры форматирования и применяем форматирование
-                text = self._clean_formatting_markers(text)
-                if text.strip():
-                    heading = doc.add_heading(text.strip(), level=2)
-                    last_was_empty = False
-            elif '__H3__' in line:
-                text = re.sub(r'__H3__|__/H3__', '', line)
-                text = re.sub(r'__(P|/P|LI|/LI|UL_START|UL_END|OL_START|OL_END)__', '', text)
-                # Удаляем маркеры форматирования и применяем форматирование
-                text = self._clean_formatting_markers(text)
-                if text.strip():
-                    heading = doc.add_heading(text.strip(), level=3)
-                    last_was_empty = False
-            elif '__H4__' in line:
-                text = re.sub(r'__H4__|__/H4__', '', line)
-                text = re.sub(r'__(P|/P|LI|/LI|UL_START|UL_END|OL_START|OL_END)__', '', text)
-                # Удаляем маркеры форматирования и применяем форматирование
-                text = self._clean_formatting_markers(text)
-                if text.strip():
-                    heading = doc.add_heading(text.strip(), level=4)
-                    last_was_empty = False
-            # Списки
-            elif '__UL_START__' in line:
-                in_list = True
-                list_style = 'List Bullet'
-                last_was_empty = False
-            elif '__UL_END__' in line or '__OL_END__' in line:
-                in_list = False
-                list_style = None
-                last_was_empty = False
-            elif '__OL_START__' in line:
-                in_list = True
-                list_style = 'List Number'
-                last_was_empty = False
-            elif '__LI__' in line:
-                # Извлекаем текст, удаляя маркеры LI
-                text = re.sub(r'__LI__|__/LI__', '', line)
-                # Удаляем все остальные служебные маркеры
-                text = re.sub(r'__(P|/P|H[1-6]|/H[1-6]|UL_START|UL_END|OL_START|OL_END)__', '', text).strip()
-                if text:
-                    para = doc.add_paragraph(text, style=list_style or 'List Bullet')
-                    self._add_formatted_text_from_html(para, text)
-                    last_was_empty = False
-            # Параграфы
-            elif '__P__' in line:
-                # Извлекаем текст, удаляя маркеры P
-                text = re.sub(r'__P__|__/P__', '', line)
-                # Удаляем все остальные служебные маркеры
-                text = re.sub(r'__(LI|/LI|H[1-6]|/H[1-6]|UL_START|UL_END|OL_START|OL_END)__', '', text).strip()
-                if text:
-                    para = doc.add_paragraph()
-                    self._add_formatted_text_from_html(para, text)
-                    last_was_empty = False
-            # Обычный текст
-            elif line.strip() and not line.startswith('__'):
-                para = doc.add_paragraph()
-                self._add_formatted_text_from_html(para, line.strip())
-                last_was_empty = False
-            # Пустые строки - добавляем только одну, если предыдущая не была пустой
-            elif not line.strip():
-                # Пропускаем пустые строки, если предыдущая тоже была пустой
-                # или если мы в списке
-                if not last_was_empty and not in_list:
-                    # Добавляем только одну пустую строку для разделения блоков
-                    last_was_empty = True
-                # Иначе просто пропускаем
-            
-            i += 1
-    
-    def _clean_formatting_markers(self, text: str) -> str:
-        """Удаляет маркеры форматирования из текста, применяя форматирование к заголовкам"""
-        import re
-        
-        # Обрабатываем правильно оформленные пары маркеров
-        # Заменяем __BOLD__...__/BOLD__ на просто текст (заголовки уже жирные по умолчанию)
-        text = re.sub(r'__BOLD__(.*?)__/BOLD__', r'\1', text, flags=re.DOTALL)
-        text = re.sub(r'__ITALIC__(.*?)__/ITALIC__', r'\1', text, flags=re.DOTALL)
-        
-        # Удаляем все оставшиеся поврежденные маркеры форматирования
-        text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', text)
-        text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', text)
-        text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', text)
-        
-        # Удаляем одиночные подчеркивания в начале/конце (остатки от маркеров)
-        text = re.sub(r'^_+\s*|\s*_+$', '', text)
-        
-        return text.strip()
-    
-    def _add_formatted_text_from_html(self, para, text: str):
-        """Добавляет форматированный текст из HTML-подобных маркеров"""
-        import re
-        
-        para.clear()
-        
-        # Сначала удаляем все служебные маркеры (кроме форматирования)
-        # Удаляем маркеры параграфов, списков, заголовков
-        text = re.sub(r'__(P|/P|LI|/LI|H[1-6]|/H[1-6]|UL_START|UL_END|OL_START|OL_END)__', '', text)
-        
-        # Сначала обрабатываем правильно оформленные маркеры форматирования
-        # Ищем пары __BOLD__...__/BOLD__ и __ITALIC__...__/ITALIC__
-        # Используем нежадный поиск, чтобы правильно обработать вложенные маркеры
-        # Важно: проверяем, что это действительно правильная пара (не поврежденная)
-        parts = re.split(r'(__BOLD__.*?__/BOLD__|__ITALIC__.*?__/ITALIC__)', text, flags=re.DOTALL)
-        
-        for part in parts:
-            if not part:
-                continue
-            
-            # Обрабатываем правильно оформленные пары маркеров
-            # Проверяем, что это действительно правильная пара (не множественные маркеры подряд)
-            if part.startswith('__BOLD__') and part.endswith('__/BOLD__'):
-                content = part[8:-9]  # Убираем __BOLD__ и __/BOLD__
-                # Проверяем, что внутри нет множественных маркеров (поврежденный случай)
-                # Если внутри есть другие маркеры или только подчеркивания - это поврежденный случай
-                if '__BOLD__' in content or '__ITALIC__' in content or '__/BOLD__' in content or '__/ITALIC__' in content:
-                    # Это поврежденный маркер, удаляем его полностью
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', part)
-                    clean_text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', clean_text)
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', clean_text)
-                    # Удаляем одиночные подчеркивания в начале/конце (остатки от маркеров)
-                    clean_text = re.sub(r'^_+\s*|\s*_+$', '', clean_text)
-                    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                    if clean_text:
-                        para.add_run(clean_text)
-                elif content.strip() and not content.strip().startswith('_') and len(content.strip()) > 1:
-                    # Рекурсивно обрабатываем вложенное форматирование
-                    self._add_formatted_text_to_para(para, content, force_bold=True)
-                else:
-                    # Пустой или только подчеркивания - удаляем маркеры
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', part)
-                    clean_text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', clean_text)
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', clean_text)
-                    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                    if clean_text:
-                        para.add_run(clean_text)
-            elif part.startswith('__ITALIC__') and part.endswith('__/ITALIC__'):
-                content = part[10:-11]  # Убираем __ITALIC__ и __/ITALIC__
-                # Проверяем, что внутри нет множественных маркеров (поврежденный случай)
-                if '__BOLD__' in content or '__ITALIC__' in content or '__/BOLD__' in content or '__/ITALIC__' in content:
-                    # Это поврежденный маркер, удаляем его полностью
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', part)
-                    clean_text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', clean_text)
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', clean_text)
-                    # Удаляем одиночные подчеркивания в начале/конце (остатки от маркеров)
-                    clean_text = re.sub(r'^_+\s*|\s*_+$', '', clean_text)
-                    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                    if clean_text:
-                        para.add_run(clean_text)
-                elif content.strip() and not content.strip().startswith('_') and len(content.strip()) > 1:
-                    # Рекурсивно обрабатываем вложенное форматирование
-                    self._add_formatted_text_to_para(para, content, force_italic=True)
-                else:
-                    # Пустой или только подчеркивания - удаляем маркеры
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', part)
-                    clean_text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', clean_text)
-                    clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', clean_text)
-                    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                    if clean_text:
-                        para.add_run(clean_text)
-            else:
-                # Для обычного текста удаляем все поврежденные маркеры
-                # Удаляем неполные/поврежденные маркеры форматирования
-                clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', part)
-                clean_text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', clean_text)
-                clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', clean_text)
-                # Удаляем одиночные подчеркивания в начале/конце (остатки от маркеров)
-                clean_text = re.sub(r'^_+\s*|\s*_+$', '', clean_text)
-                # Удаляем множественные пробелы и пробелы в начале/конце
-                clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                if clean_text:
-                    para.add_run(clean_text)
-    
-    def _add_formatted_text_to_para(self, para, text: str, force_bold=False, force_italic=False):
-        """Вспомогательный метод для добавления форматированного текста с принудительным форматированием"""
-        import re
-        
-        # Обрабатываем вложенное форматирование
-        parts = re.split(r'(__BOLD__.*?__/BOLD__|__ITALIC__.*?__/ITALIC__)', text, flags=re.DOTALL)
-        
-        for part in parts:
-            if not part:
-                continue
-            
-            if part.startswith('__BOLD__') and part.endswith('__/BOLD__'):
-                content = part[8:-9]
-                if content.strip():
-                    self._add_formatted_text_to_para(para, content, force_bold=True, force_italic=force_italic)
-            elif part.startswith('__ITALIC__') and part.endswith('__/ITALIC__'):
-                content = part[10:-11]
-                if content.strip():
-                    self._add_formatted_text_to_para(para, content, force_bold=force_bold, force_italic=True)
-            else:
-                # Удаляем поврежденные маркеры
-                clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', part)
-                clean_text = re.sub(r'[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?__+', '', clean_text)
-                clean_text = re.sub(r'__+[A-Z_/]*?(BOLD|ITALIC|/BOLD|/ITALIC)[A-Z_/]*?', '', clean_text)
-                clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-                if clean_text:
-                    run = para.add_run(clean_text)
-                    if force_bold:
-                        run.bold = True
-                    if force_italic:
-                        run.italic = True
-    
-    def _parse_table_html(self, table_html: str, doc: Document):
-        """Парсит HTML таблицу и добавляет в документ"""
-        import re
-        
-        # Извлекаем строки
-        rows = re.findall(r'<tr[^>]*>(.*?)</tr>', table_html, flags=re.DOTALL | re.IGNORECASE)
-        if not rows:
-            return
-        
-        # Определяем количество столбцов
-        max_cols = 0
-        table_data = []
-        for row in rows:
-            cells = re.findall(r'<(td|th)[^>]*>(.*?)</(td|th)>', row, flags=re.DOTALL | re.IGNORECASE)
-            cell_texts = [unescape(cell[1].strip()) for cell in cells]
-            table_data.append((cell_texts, 'th' in row.lower()))
-            max_cols = max(max_cols, len(cell_texts))
-        
-        if max_cols == 0:
-            return
-        
-        # Создаем таблицу
-        table = doc.add_table(rows=1, cols=max_cols)
-        table.style = 'Light Grid Accent 1'
-        
-        for row_idx, (cells, is_header) in enumerate(table_data):
-            if row_idx > 0:
-                table.add_row()
-            
-            for col_idx, cell_text in enumerate(cells[:max_cols]):
-                table.rows[row_idx].cells[col_idx].text = cell_text
-                if is_header or row_idx == 0:
-                    para = table.rows[row_idx].cells[col_idx].paragraphs[0]
-                    for run in para.runs:
-                        run.bold = True
-    
-    def _extract_text(self, elem) -> str:
-        """Извлекает текст из HTML элемента"""
-        text = elem.text or ''
-        for child in elem:
-            text += self._extract_text(child)
-        text += elem.tail or ''
-        return unescape(text).strip()
-    
-    def _add_formatted_text(self, para, text: str):
-        """Добавляет форматированный текст в параграф"""
-        import re
-        
-        # Очищаем параграф от текста по умолчанию
-        para.clear()
-        
-        # Обрабатываем жирный и курсив
-        parts = re.split(r'(\*\*.*?\*\*|\*.*?\*)', text)
-        
-        for part in parts:
-            if not part:
-                continue
-            
-            # Жирный текст
-            if part.startswith('**') and part.endswith('**'):
-                run = para.add_run(part[2:-2])
-                run.bold = True
-            # Курсив
-            elif part.startswith('*') and part.endswith('*') and len(part) > 2:
-                run = para.add_run(part[1:-1])
-                run.italic = True
-            # Обычный текст
-            else:
-                para.add_run(part)
-    
-    def _process_table(self, table_elem, doc: Document):
-        """Обрабатывает HTML таблицу"""
-        rows = table_elem.findall('.//tr')
-        if not rows:
-            return
-        
-        # Определяем количество столбцов
-        max_cols = 0
-        for row in rows:
-            cols = len(row.findall('.//td') + row.findall('.//th'))
-            max_cols = max(max_cols, cols)
-        
-        if max_cols == 0:
-            return
-        
-        # Создаем таблицу
-        table = doc.add_table(rows=1, cols=max_cols)
-        table.style = 'Light Grid Accent 1'
-        
-        for row_idx, row_elem in enumerate(rows):
-            if row_idx > 0:
-                table.add_row()
-            
-            cells = row_elem.findall('.//td') + row_elem.findall('.//th')
-            for col_idx, cell_elem in enumerate(cells[:max_cols]):
-                cell_text = self._extract_text(cell_elem)
-                table.rows[row_idx].cells[col_idx].text = cell_text
-                
-                # Жирный для заголовков
-                if cell_elem.tag.lower() == 'th':
-                    para = table.rows[row_idx].cells[col_idx].paragraphs[0]
-                    for run in para.runs:
-                        run.bold = True
+        builder = DocxBuilder(doc)
+        if html_content.strip():
+            root = lxml_html.fragment_fromstring(html_content, create_parent='div')
+            builder.feed_tree(root)
+        builder.finish()
     
     def save_docx_version(self, docx_path: Path, doc_relative_path: str, 
                          author: str, comment: Optional[str] = None) -> Path:
@@ -705,8 +822,6 @@ class DocxConverter:
         Returns:
             Path к сохраненной версии
         """
-        from datetime import datetime
-        
         # Создаем структуру директорий для версий
         doc_path = self.documents_dir / doc_relative_path
         rel_path = doc_path.relative_to(self.documents_dir)
@@ -719,8 +834,7 @@ class DocxConverter:
         version_path = version_dir / version_filename
         
         # Копируем DOCX файл
-        import shutil
-        shutil.copy2(docx_path, version_path)
+        _copy_file(docx_path, version_path)
         
         return version_path
 
@@ -1,122 +1,235 @@
 """
 Парсер карточек сотрудников из Markdown с YAML front matter
 """
+import copy
+import functools
 import os
 import yaml
 import re
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+# Загрузчик YAML на C (libyaml), если PyYAML собран с ним
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# YAML front matter и содержимое карточки
+_RE_FRONT_MATTER = re.compile(r'^---\s*\n(.*?)\n---\s*\n(.*)$', re.DOTALL)
+
+# Начало карточки с закрытым YAML front matter (для чтения только метаданных)
+_RE_FRONT_MATTER_HEAD = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+
 
 class EmployeeParser:
     """Парсер карточек сотрудников в формате Markdown с метаданными"""
     
     def __init__(self, documents_dir: str = "documents"):
         self.documents_dir = Path(documents_dir)
+        # Разобранные карточки по (путь, mtime_ns, размер, только метаданные):
+        # неизмененный файл повторно не читается и не разбирается
+        self._parse_cached = functools.lru_cache(maxsize=4096)(self._parse_file)
+        # Индекс ФИО -> [(отдел, метаданные карточки)] и снимок файлов карточек, для которого он построен
+        self._name_index: Optional[Dict[str, List[Tuple[str, Dict]]]] = None
+        self._name_index_sig: Optional[List[Tuple[str, int, int]]] = None
+    
+    def clear_cache(self):
+        """Сбрасывает кэш разобранных карточек сотрудников и индекс по ФИО"""
+        self._parse_cached.cache_clear()
+        self._name_index = None
+        self._name_index_sig = None
     
-    def parse_employee(self, file_path: Path) -> Optional[Dict]:
-        """Парсит карточку сотрудника и возвращает метаданные"""
+    def parse_employee(self, file_path: Path, metadata_only: bool = False) -> Optional[Dict]:
+        """
+        Парсит карточку сотрудника и возвращает метаданные
+        
+        Args:
+            file_path: Путь к карточке
+            metadata_only: Читать только начало файла с YAML front matter,
+                без содержимого карточки (ключ 'content' не заполняется)
+        """
         try:
+            st = os.stat(file_path)
+            # Кэш разделяется между вызовами, поэтому метаданные копируются
+            return copy.copy(self._parse_cached(str(file_path), st.st_mtime_ns, st.st_size,
+                                                metadata_only))
+        except Exception as e:
+            print(f"Ошибка при парсинге карточки сотрудника {file_path}: {e}")
+            return None
+    
+    # Сколько символов начала карточки читать в поисках конца YAML front matter
+    METADATA_READ_SIZE = 8192
+    
+    def _parse_file(self, path: str, mtime_ns: int, size: int, metadata_only: bool = False) -> Dict:
+        """Читает и разбирает карточку сотрудника (результат кэшируется в _parse_cached)"""
+        file_path = Path(path)
+        yaml_match = None
+        markdown_content = None
+        
+        if metadata_only:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                head = f.read(self.METADATA_READ_SIZE)
+                whole_file = len(head) < self.METADATA_READ_SIZE or not f.read(1)
+            if head.startswith('---'):
+                yaml_match = _RE_FRONT_MATTER_HEAD.match(head)
+                # Конец front matter должен быть определен по прочитанному началу:
+                # после него есть непробельный текст или файл прочитан целиком
+                if not (whole_file or (yaml_match and head[yaml_match.end():].strip())):
+                    metadata = dict(self._parse_cached(path, mtime_ns, size, False))
+                    metadata.pop('content', None)
+                    return metadata
+        else:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             # Разделяем YAML front matter и Markdown
-            yaml_match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
-            
-            if yaml_match:
-                yaml_content = yaml_match.group(1)
-                markdown_content = yaml_match.group(2)
-                metadata = yaml.safe_load(yaml_content)
-            else:
-                metadata = {}
-                markdown_content = content
-            
-            # Добавляем путь к файлу
-            metadata['file_path'] = str(file_path)
-            metadata['relative_path'] = str(file_path.relative_to(self.documents_dir))
-            
-            # Извлекаем организацию и отдел из пути
-            parts = file_path.relative_to(self.documents_dir).parts
-            if len(parts) >= 2:
-                metadata['organization'] = metadata.get('organization', parts[0])
-                # Ищем отдел (может быть в разных местах пути)
-                for i, part in enumerate(parts):
-                    if part in ['сотрудники', 'employees'] and i > 0:
-                        metadata['department'] = metadata.get('department', parts[i-1])
-                        break
-                if 'department' not in metadata and len(parts) >= 2:
-                    metadata['department'] = metadata.get('department', parts[1])
-            
-            # Определяем доступность
-            if 'dismissal_date' in metadata and metadata['dismissal_date']:
-                metadata['available'] = False
-            else:
-                metadata['available'] = metadata.get('available', True)
-            
-            # Добавляем содержимое, если есть
-            if markdown_content.strip():
-                metadata['content'] = markdown_content.strip()
-            
-            return metadata
-        except Exception as e:
-            print(f"Ошибка при парсинге карточки сотрудника {file_path}: {e}")
-            return None
+            # (без "---" в начале файла front matter нет, регулярное выражение не нужно)
+            yaml_match = _RE_FRONT_MATTER.match(content) if content.startswith('---') else None
+            markdown_content = yaml_match.group(2) if yaml_match else content
+        
+        if yaml_match:
+            metadata = yaml.load(yaml_match.group(1), Loader=_SafeLoader)
+        else:
+            metadata = {}
+        
+        # Добавляем путь к файлу
+        metadata['file_path'] = str(file_path)
+        metadata['relative_path'] = str(file_path.relative_to(self.documents_dir))
+        
+        # Извлекаем организацию и отдел из пути
+        parts = file_path.relative_to(self.documents_dir).parts
+        if len(parts) >= 2:
+            metadata['organization'] = metadata.get('organization', parts[0])
+            # Ищем отдел (может быть в разных местах пути)
+            for i, part in enumerate(parts):
+                if part in ['сотрудники', 'employees'] and i > 0:
+                    metadata['department'] = metadata.get('department', parts[i-1])
+                    break
+            if 'department' not in metadata and len(parts) >= 2:
+                metadata['department'] = metadata.get('department', parts[1])
+        
+        # Определяем доступность
+        if 'dismissal_date' in metadata and metadata['dismissal_date']:
+            metadata['available'] = False
+        else:
+            metadata['available'] = metadata.get('available', True)
+        
+        # Добавляем содержимое, если есть
+        if markdown_content and markdown_content.strip():
+            metadata['content'] = markdown_content.strip()
+        
+        return metadata
     
     def get_employee_by_name(self, full_name: str, organization: Optional[str] = None, department: Optional[str] = None) -> Optional[Dict]:
         """Находит сотрудника по ФИО"""
+        candidates = self._get_name_index().get(full_name.strip(), ())
+        
         # Сначала ищем в указанном отделе
         if department:
-            employees = self.get_all_employees(organization=organization, department=department)
-            for emp in employees:
-                if emp.get('full_name', '').strip() == full_name.strip():
-                    return emp
+            for dept_name, emp in candidates:
+                if dept_name == department and self._organization_matches(emp, organization):
+                    # Индекс построен по метаданным, карточка читается целиком
+                    employee = self.parse_employee(Path(emp['file_path']))
+                    if employee:
+                        return employee
         
         # Если не найдено в указанном отделе, ищем по всей организации
-        employees = self.get_all_employees(organization=organization, department=None)
-        for emp in employees:
-            if emp.get('full_name', '').strip() == full_name.strip():
-                return emp
+        for dept_name, emp in candidates:
+            if self._organization_matches(emp, organization):
+                employee = self.parse_employee(Path(emp['file_path']))
+                if employee:
+                    return employee
         return None
     
+    def _get_name_index(self) -> Dict[str, List[Tuple[str, Dict]]]:
+        """
+        Возвращает индекс карточек по ФИО: ФИО -> [(папка отдела, метаданные
+        карточки)] в порядке обхода каталогов; читается только front matter
+        
+        Индекс перестраивается, только если изменился набор файлов карточек
+        или их mtime/размер
+        """
+        emp_files = self._employee_files()
+        signature = []
+        for emp_file in emp_files:
+            try:
+                st = os.stat(emp_file)
+            except OSError:
+                continue
+            signature.append((str(emp_file), st.st_mtime_ns, st.st_size))
+        
+        if self._name_index is None or signature != self._name_index_sig:
+            index: Dict[str, List[Tuple[str, Dict]]] = {}
+            for emp_file in emp_files:
+                employee = self.parse_employee(emp_file, metadata_only=True)
+                if employee and isinstance(employee.get('full_name'), str):
+                    # Файл лежит в <отдел>/сотрудники/
+                    index.setdefault(employee['full_name'].strip(), []).append(
+                        (emp_file.parent.parent.name, employee))
+            self._name_index = index
+            self._name_index_sig = signature
+        return self._name_index
+    
+    @staticmethod
+    def _organization_matches(employee: Dict, organization: Optional[str]) -> bool:
+        """Проверяет организацию из метаданных карточки (без учета кавычек и пробелов)"""
+        if not organization:
+            return True
+        emp_org = employee.get('organization', '')
+        # Нормализуем сравнение (убираем кавычки и пробелы)
+        org_normalized = organization.replace('"', '').strip()
+        emp_org_normalized = emp_org.replace('"', '').strip()
+        return org_normalized == emp_org_normalized
+    
     def get_all_employees(self, organization: Optional[str] = None, department: Optional[str] = None) -> List[Dict]:
         """Получает список всех сотрудников с опциональной фильтрацией"""
-        employees = []
-        employees_dir = self.documents_dir
+        employees = (self.parse_employee(emp_file) for emp_file in self._employee_files(department))
+        # Фильтруем по организации из метаданных файла
+        return [employee for employee in employees
+                if employee and self._organization_matches(employee, organization)]
+    
+    def _employee_files(self, department: Optional[str] = None) -> List[Path]:
+        """
+        Возвращает файлы карточек сотрудников из папок "сотрудники" или "employees"
+        отделов (documents/<организация>/<отдел>/сотрудники/*.md)
         
-        # Ищем папки "сотрудники" или "employees" в структуре
-        for org_dir in employees_dir.iterdir():
-            if not org_dir.is_dir():
-                continue
-            
+        Каталоги обходятся через os.scandir: тип записи берется из каталога,
+        без отдельных вызовов is_dir() для каждого пути. Если отдел указан,
+        в каждой организации проверяется только папка с его именем
+        """
+        emp_files = []
+        
+        # Отдел - имя одной папки, а не путь
+        if department and (department in ('.', '..') or os.path.basename(department) != department):
+            return emp_files
+        
+        with os.scandir(self.documents_dir) as org_entries:
+            org_paths = [entry.path for entry in org_entries if entry.is_dir()]
+        
+        for org_path in org_paths:
             # Ищем в отделах
-            for dept_dir in org_dir.iterdir():
-                if not dept_dir.is_dir():
-                    continue
-                
-                if department and dept_dir.name != department:
-                    continue
-                
+            if department:
+                dept_path = os.path.join(org_path, department)
+                dept_paths = [dept_path] if os.path.isdir(dept_path) else []
+            else:
+                with os.scandir(org_path) as dept_entries:
+                    dept_paths = [entry.path for entry in dept_entries if entry.is_dir()]
+            
+            for dept_path in dept_paths:
                 # Ищем папку сотрудников
-                employees_folder = dept_dir / "сотрудники"
-                if not employees_folder.exists():
-                    employees_folder = dept_dir / "employees"
+                employees_folder = os.path.join(dept_path, "сотрудники")
+                if not os.path.exists(employees_folder):
+                    employees_folder = os.path.join(dept_path, "employees")
+                if not os.path.isdir(employees_folder):
+                    continue
                 
-                if employees_folder.exists() and employees_folder.is_dir():
-                    for emp_file in employees_folder.glob("*.md"):
-                        employee = self.parse_employee(emp_file)
-                        if employee:
-                            # Фильтруем по организации из метаданных файла
-                            if organization:
-                                emp_org = employee.get('organization', '')
-                                # Нормализуем сравнение (убираем кавычки и пробелы)
-                                org_normalized = organization.replace('"', '').strip()
-                                emp_org_normalized = emp_org.replace('"', '').strip()
-                                if org_normalized != emp_org_normalized:
-                                    continue
-                            employees.append(employee)
-        
-        return employees
+                with os.scandir(employees_folder) as entries:
+                    emp_files.extend(Path(entry.path) for entry in entries
+                                     if entry.name.endswith('.md') and entry.is_file())
+        
+        return emp_files
     
     def get_employees_by_department(self, organization: str, department: str) -> List[Dict]:
         """Получает список сотрудников отдела"""
@@ -2,17 +2,18 @@
 Генератор PDF из Markdown документов
 """
 import os
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 # Добавляем текущую директорию в путь для импорта
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import markdown2
 from document_parser import DocumentParser
-from jinja2 import Template
+from jinja2 import Environment
 
 # Попытка импортировать PDF генераторы
 try:
@@ -28,210 +29,20 @@ except ImportError:
     HAS_WEASYPRINT = False
 
 
-class PDFGenerator:
-    """Генератор PDF из Markdown документов"""
-    
-    def __init__(self, documents_dir: str = "documents", pdf_dir: str = "pdf"):
-        self.documents_dir = Path(documents_dir)
-        self.pdf_dir = Path(pdf_dir)
-        self.parser = DocumentParser(documents_dir)
-        self.pdf_dir.mkdir(exist_ok=True)
-    
-    @staticmethod
-    def format_date(date_value) -> Optional[str]:
-        """
-        Форматирует дату в формат дд.ММ.ГГГГ
-        
-        Поддерживает:
-        - строки в форматах YYYY-MM-DD, DD.MM.YYYY и др.
-        - объекты datetime.date
-        - объекты datetime.datetime
-        """
-        if not date_value:
-            return None
-        
-        # Если это объект date или datetime
-        if hasattr(date_value, 'strftime'):
-            return date_value.strftime('%d.%m.%Y')
-        
-        # Преобразуем в строку, если нужно
-        date_str = str(date_value)
-        
-        # Если уже в формате дд.ММ.ГГГГ, возвращаем как есть
-        if '.' in date_str and len(date_str.split('.')) == 3:
-            parts = date_str.split('.')
-            if len(parts[0]) <= 2 and len(parts[1]) <= 2 and len(parts[2]) == 4:
-                return date_str
-        
-        # Пробуем распарсить ISO формат (YYYY-MM-DD)
-        try:
-            if '-' in date_str:
-                date_part = date_str.split()[0] if ' ' in date_str else date_str
-                dt = datetime.strptime(date_part, '%Y-%m-%d')
-                return dt.strftime('%d.%m.%Y')
-        except (ValueError, AttributeError, TypeError):
-            pass
-        
-        # Пробуем другие форматы
-        formats = ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%Y/%m/%d']
-        for fmt in formats:
-            try:
-                date_part = date_str.split()[0] if ' ' in date_str else date_str
-                dt = datetime.strptime(date_part, fmt)
-                return dt.strftime('%d.%m.%Y')
-            except (ValueError, AttributeError, TypeError):
-                continue
-        
-        # Если не удалось распарсить, возвращаем как есть
-        return date_str
-    
-    def _process_attachment_links(self, html_content: str, doc_relative_path: str) -> str:
-        """
-        Обрабатывает ссылки на приложения в HTML для PDF
-        
-        В PDF версии ссылки на приложения преобразуются в локальные пути
-        """
-        import re
-        from pathlib import Path
-        
-        # Получаем путь к документу
-        doc_path = Path(doc_relative_path)
-        doc_dir = doc_path.parent
-        
-        # Паттерн для поиска ссылок на приложения
-        patterns = [
-            (r'href=["\'](приложения/[^"\']+)["\']', 'приложения/'),
-            (r'href=["\'](attachments/[^"\']+)["\']', 'attachments/'),
-            (r'src=["\'](приложения/[^"\']+)["\']', 'приложения/'),
-            (r'src=["\'](attachments/[^"\']+)["\']', 'attachments/'),
-        ]
-        
-        # Заменяем относительные пути на абсолютные пути к файлам
-        for pattern, prefix in patterns:
-            def replace_link(match):
-                link_path = match.group(1)
-                # Создаем абсолютный путь к файлу приложения
-                attachment_file = self.documents_dir / doc_dir / link_path
-                if attachment_file.exists():
-                    return match.group(0).replace(link_path, str(attachment_file))
-                return match.group(0)
-            
-            html_content = re.sub(pattern, replace_link, html_content)
-        
-        return html_content
-    
-    def _process_document_links(self, html_content: str, doc_relative_path: str, metadata: dict) -> str:
-        """
-        Обрабатывает ссылки на другие документы в HTML для PDF
-        
-        В PDF версии ссылки преобразуются в текстовые ссылки с указанием номера документа
-        """
-        import re
-        
-        # Паттерн для поиска ссылок на документы: [текст](doc:ссылка)
-        pattern = r'<a\s+href=["\']doc:([^"\']+)["\']>([^<]+)</a>'
-        
-        def replace_doc_link(match):
-            doc_ref = match.group(1)
-            link_text = match.group(2)
-            
-            # Пробуем найти документ
-            doc = None
-            
-            # По номеру
-            if 'number' in metadata:
-                doc = self.parser.find_document_by_number(
-                    doc_ref, 
-                    metadata.get('organization')
-                )
-            
-            # По пути
-            if not doc:
-                doc = self.parser.find_document_by_path(
-                    doc_ref,
-                    doc_relative_path
-                )
-            
-            if doc:
-                doc_number = doc.get('number', '')
-                doc_title = doc.get('title', link_text)
-                if doc_number:
-                    return f'<a href="#doc-{doc_number}" title="{doc_title}">{link_text} (№{doc_number})</a>'
-                else:
-                    return f'<a href="#doc-{doc_ref}" title="{doc_title}">{link_text}</a>'
-            else:
-                # Если документ не найден, просто оставляем текст без ссылки
-                return f'<span style="color: #999;">{link_text} (документ не найден)</span>'
-        
-        html_content = re.sub(pattern, replace_doc_link, html_content)
-        
-        return html_content
-    
-    def _process_document_links_in_markdown(self, markdown_content: str, doc_relative_path: str, metadata: dict) -> str:
-        """
-        Обрабатывает ссылки на другие документы в Markdown для PDF
-        
-        Преобразует ссылки вида [текст](doc:номер) или [текст](doc:путь)
-        """
-        import re
-        
-        # Паттерн для поиска ссылок на документы в Markdown: [текст](doc:ссылка)
-        pattern = r'\[([^\]]+)\]\(doc:([^\)]+)\)'
-        
-        def replace_doc_link(match):
-            link_text = match.group(1)
-            doc_ref = match.group(2).strip()
-            
-            # Пробуем найти документ
-            doc = None
-            
-            # По номеру
-            doc = self.parser.find_document_by_number(
-                doc_ref, 
-                metadata.get('organization')
-            )
-            
-            # По пути
-            if not doc:
-                doc = self.parser.find_document_by_path(
-                    doc_ref,
-                    doc_relative_path
-                )
-            
-            if doc:
-                doc_number = doc.get('number', '')
-                doc_title = doc.get('title', link_text)
-                if doc_number:
-                    return f'[{link_text} (№{doc_number})]({doc_title})'
-                else:
-                    return f'[{link_text}]({doc_title})'
-            else:
-                # Если документ не найден, просто оставляем текст
-                return f'{link_text} (документ не найден)'
-        
-        markdown_content = re.sub(pattern, replace_doc_link, markdown_content)
-        
-        return markdown_content
-    
-    def markdown_to_html(self, markdown_content: str, metadata: dict) -> str:
-        """Конвертирует Markdown в HTML с применением стилей"""
-        # Обрабатываем ссылки на документы в Markdown перед конвертацией
-        doc_relative_path = metadata.get('relative_path', '')
-        markdown_content = self._process_document_links_in_markdown(markdown_content, doc_relative_path, metadata)
-        
-        html_content = markdown2.markdown(
-            markdown_content,
-            extras=['fenced-code-blocks', 'tables', 'header-ids']
-        )
-        
-        # Обрабатываем ссылки на приложения
-        html_content = self._process_attachment_links(html_content, doc_relative_path)
-        
-        # Обрабатываем ссылки на другие документы в HTML (на случай, если что-то пропустили)
-        html_content = self._process_document_links(html_content, doc_relative_path, metadata)
-        
-        # HTML шаблон для документа
-        template = Template("""
+# Ссылки на приложения в HTML: href/src с путем в папке приложений документа
+_ATTACHMENT_LINK_PATTERN = r'(?:href|src)=["\'](?P<attachment>(?:приложения|attachments)/[^"\']+)["\']'
+
+# Ссылки на другие документы в HTML: <a href="doc:ссылка">текст</a>
+_DOC_LINK_HTML_PATTERN = r'<a\s+href=["\']doc:(?P<doc_ref>[^"\']+)["\']>(?P<link_text>[^<]+)</a>'
+
+# Обе ссылки в HTML обрабатываются за один проход
+_RE_HTML_LINKS = re.compile(f'{_DOC_LINK_HTML_PATTERN}|{_ATTACHMENT_LINK_PATTERN}')
+
+# Ссылки на другие документы в Markdown: [текст](doc:ссылка)
+_RE_DOC_LINK_MD = re.compile(r'\[([^\]]+)\]\(doc:([^\)]+)\)')
+
+# HTML шаблон документа (компилируется один раз при импорте модуля)
+_TEMPLATE_SRC = """
 <!DOCTYPE html>
 <html lang="ru">
 <head>
@@ -428,7 +239,197 @@ class PDFGenerator:
     </div>
 </body>
 </html>
-        """)
+"""
+
+_DOC_TEMPLATE = Environment(autoescape=False, auto_reload=False).from_string(_TEMPLATE_SRC)
+
+
+class PDFGenerator:
+    """Генератор PDF из Markdown документов"""
+    
+    def __init__(self, documents_dir: str = "documents", pdf_dir: str = "pdf"):
+        self.documents_dir = Path(documents_dir)
+        self.pdf_dir = Path(pdf_dir)
+        self.parser = DocumentParser(documents_dir)
+        self.pdf_dir.mkdir(exist_ok=True)
+    
+    @staticmethod
+    def format_date(date_value) -> Optional[str]:
+        """
+        Форматирует дату в формат дд.ММ.ГГГГ
+        
+        Поддерживает:
+        - строки в форматах YYYY-MM-DD, DD.MM.YYYY и др.
+        - объекты datetime.date
+        - объекты datetime.datetime
+        """
+        if not date_value:
+            return None
+        
+        # Если это объект date или datetime
+        if hasattr(date_value, 'strftime'):
+            return date_value.strftime('%d.%m.%Y')
+        
+        # Преобразуем в строку, если нужно
+        date_str = str(date_value)
+        
+        # Если уже в формате дд.ММ.ГГГГ, возвращаем как есть
+        if '.' in date_str and len(date_str.split('.')) == 3:
+            parts = date_str.split('.')
+            if len(parts[0]) <= 2 and len(parts[1]) <= 2 and len(parts[2]) == 4:
+                return date_str
+        
+        # Пробуем распарсить ISO формат (YYYY-MM-DD)
+        try:
+            if '-' in date_str:
+                date_part = date_str.split()[0] if ' ' in date_str else date_str
+                dt = datetime.strptime(date_part, '%Y-%m-%d')
+                return dt.strftime('%d.%m.%Y')
+        except (ValueError, AttributeError, TypeError):
+            pass
+        
+        # Пробуем другие форматы
+        formats = ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%Y/%m/%d']
+        for fmt in formats:
+            try:
+                date_part = date_str.split()[0] if ' ' in date_str else date_str
+                dt = datetime.strptime(date_part, fmt)
+                return dt.strftime('%d.%m.%Y')
+            except (ValueError, AttributeError, TypeError):
+                continue
+        
+        # Если не удалось распарсить, возвращаем как есть
+        return date_str
+    
+    def _process_links(self, html_content: str, doc_relative_path: str, metadata: dict) -> str:
+        """
+        Обрабатывает ссылки на приложения и на другие документы в HTML для PDF
+        
+        Оба вида ссылок находятся одним регулярным выражением за один проход по HTML
+        """
+        doc_dir = Path(doc_relative_path).parent
+        # Дерево документов проверяется один раз на все ссылки документа
+        index = self.parser.get_document_index()
+        
+        def replace_link(match):
+            if match.group('attachment') is not None:
+                return self._replace_attachment_link(match, doc_dir)
+            return self._replace_document_link(match, doc_relative_path, metadata, index)
+        
+        return _RE_HTML_LINKS.sub(replace_link, html_content)
+    
+    def _replace_attachment_link(self, match, doc_dir: Path) -> str:
+        """
+        Заменяет ссылку на приложение
+        
+        В PDF версии ссылки на приложения преобразуются в локальные пути
+        """
+        link_path = match.group('attachment')
+        # Создаем абсолютный путь к файлу приложения
+        attachment_file = self.documents_dir / doc_dir / link_path
+        if attachment_file.exists():
+            return match.group(0).replace(link_path, str(attachment_file))
+        return match.group(0)
+    
+    def _replace_document_link(self, match, doc_relative_path: str, metadata: dict,
+                               index: Optional[Dict] = None) -> str:
+        """
+        Заменяет ссылку на другой документ
+        
+        В PDF версии ссылки преобразуются в текстовые ссылки с указанием номера документа;
+        index - индекс документов из DocumentParser.get_document_index()
+        """
+        doc_ref = match.group('doc_ref')
+        link_text = match.group('link_text')
+        
+        # Пробуем найти документ
+        doc = None
+        
+        # По номеру
+        if 'number' in metadata:
+            doc = self.parser.find_document_by_number(
+                doc_ref, 
+                metadata.get('organization'),
+                index=index
+            )
+        
+        # По пути
+        if not doc:
+            doc = self.parser.find_document_by_path(
+                doc_ref,
+                doc_relative_path
+            )
+        
+        if doc:
+            doc_number = doc.get('number', '')
+            doc_title = doc.get('title', link_text)
+            if doc_number:
+                return f'<a href="#doc-{doc_number}" title="{doc_title}">{link_text} (№{doc_number})</a>'
+            else:
+                return f'<a href="#doc-{doc_ref}" title="{doc_title}">{link_text}</a>'
+        else:
+            # Если документ не найден, просто оставляем текст без ссылки
+            return f'<span style="color: #999;">{link_text} (документ не найден)</span>'
+    
+    def _process_document_links_in_markdown(self, markdown_content: str, doc_relative_path: str, metadata: dict) -> str:
+        """
+        Обрабатывает ссылки на другие документы в Markdown для PDF
+        
+        Преобразует ссылки вида [текст](doc:номер) или [текст](doc:путь)
+        """
+        # Дерево документов проверяется один раз на все ссылки документа
+        index = self.parser.get_document_index()
+        
+        def replace_doc_link(match):
+            link_text = match.group(1)
+            doc_ref = match.group(2).strip()
+            
+            # Пробуем найти документ
+            doc = None
+            
+            # По номеру
+            doc = self.parser.find_document_by_number(
+                doc_ref, 
+                metadata.get('organization'),
+                index=index
+            )
+            
+            # По пути
+            if not doc:
+                doc = self.parser.find_document_by_path(
+                    doc_ref,
+                    doc_relative_path
+                )
+            
+            if doc:
+                doc_number = doc.get('number', '')
+                doc_title = doc.get('title', link_text)
+                if doc_number:
+                    return f'[{link_text} (№{doc_number})]({doc_title})'
+                else:
+                    return f'[{link_text}]({doc_title})'
+            else:
+                # Если документ не найден, просто оставляем текст
+                return f'{link_text} (документ не найден)'
+        
+        markdown_content = _RE_DOC_LINK_MD.sub(replace_doc_link, markdown_content)
+        
+        return markdown_content
+    
+    def markdown_to_html(self, markdown_content: str, metadata: dict) -> str:
+        """Конвертирует Markdown в HTML с применением стилей"""
+        # Обрабатываем ссылки на документы в Markdown перед конвертацией
+        doc_relative_path = metadata.get('relative_path', '')
+        markdown_content = self._process_document_links_in_markdown(markdown_content, doc_relative_path, metadata)
+        
+        html_content = markdown2.markdown(
+            markdown_content,
+            extras=['fenced-code-blocks', 'tables', 'header-ids']
+        )
+        
+        # Обрабатываем ссылки на приложения и на другие документы в HTML
+        # (на случай, если что-то пропустили)
+        html_content = self._process_links(html_content, doc_relative_path, metadata)
         
         title = metadata.get('title', metadata.get('number', 'Документ'))
         
@@ -443,7 +444,7 @@ class PDFGenerator:
         if 'date' in formatted_metadata:
             formatted_metadata['date'] = self.format_date(formatted_metadata['date'])
         
-        return template.render(
+        return _DOC_TEMPLATE.render(
             title=title,
             metadata=formatted_metadata,
             content=html_content
@@ -498,7 +499,7 @@ class PDFGenerator:
                     raise
             else:
                 raise Exception("Не установлен ни один PDF генератор. Установите: pip install weasyprint или pip install pdfkit")
-                
+        
         except Exception as e:
             print(f"✗ Ошибка при генерации PDF для {document['file_path']}: {e}")
             return None
@@ -516,7 +517,9 @@ class PDFGenerator:
 
 if __name__ == "__main__":
     # Используем новый конвертер для обратной совместимости
+    import logging
     from document_converter import DocumentConverter
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
     converter = DocumentConverter()
     converter.convert_all(formats=['pdf'], verbose=True)
 
@@ -272,6 +272,9 @@ def _process_document_links_in_markdown(markdown_content: str, doc_path: str, do
     # Паттерн для поиска ссылок на документы в Markdown: [текст](doc:ссылка)
     pattern = r'\[([^\]]+)\]\(doc:([^\)]+)\)'
     
+    # Дерево документов проверяется один раз на все ссылки документа
+    index = parser.get_document_index()
+    
     def replace_doc_link(match):
         link_text = match.group(1)
         doc_ref = match.group(2).strip()
@@ -282,7 +285,8 @@ def _process_document_links_in_markdown(markdown_content: str, doc_path: str, do
         # По номеру
         doc = parser.find_document_by_number(
             doc_ref, 
-            document.get('organization')
+            document.get('organization'),
+            index=index
         )
         
         # По пути
@@ -317,6 +321,9 @@ def _process_document_links_in_html(html_content: str, doc_path: str, document:
     # Паттерн для поиска ссылок на документы: [текст](doc:ссылка)
     pattern = r'href=["\']doc:([^"\']+)["\']'
     
+    # Дерево документов проверяется один раз на все ссылки документа
+    index = parser.get_document_index()
+    
     def replace_doc_link(match):
         doc_ref = match.group(1)
         
@@ -327,7 +334,8 @@ def _process_document_links_in_html(html_content: str, doc_path: str, document:
         if 'number' in document:
             doc = parser.find_document_by_number(
                 doc_ref, 
-                document.get('organization')
+                document.get('organization'),
+                index=index
             )
         
         # По пути
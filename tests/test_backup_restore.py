@@ -0,0 +1,169 @@
+"""
+Тесты для резервного копирования и восстановления
+"""
+import unittest
+import tempfile
+import shutil
+import tarfile
+from io import BytesIO
+from pathlib import Path
+import sys
+import os
+
+# Добавляем путь к скриптам
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from backup_restore import (
+    BackupRestore, HAS_PYZSTD, ZSTD_MAGIC, ZSTD_FRAME_HEADER_MAX_SIZE,
+    ZSTD_SKIPPABLE_MAGIC, ZSTD_SKIPPABLE_HEADER,
+)
+
+if HAS_PYZSTD:
+    import pyzstd
+
+
+class TestBackupRestore(unittest.TestCase):
+    """Тесты для BackupRestore"""
+    
+    def setUp(self):
+        """Создание временной структуры проекта"""
+        self.test_dir = tempfile.mkdtemp()
+        self.base_dir = Path(self.test_dir) / 'project'
+        self.backup_dir = Path(self.test_dir) / 'backups'
+        
+        doc_dir = self.base_dir / 'documents' / 'Орг' / 'Отдел'
+        doc_dir.mkdir(parents=True)
+        (doc_dir / 'doc.md').write_text("# Документ\n\nСодержимое.", encoding='utf-8')
+        (self.base_dir / 'config').mkdir()
+        (self.base_dir / 'config' / 'config.yaml').write_text("key: value\n", encoding='utf-8')
+        
+        self.backup = BackupRestore(str(self.base_dir), str(self.backup_dir))
+    
+    def tearDown(self):
+        """Удаление временной директории"""
+        shutil.rmtree(self.test_dir)
+    
+    def test_create_and_restore(self):
+        """Тест создания резервной копии и восстановления из нее"""
+        backup_path = self.backup.create_backup(comment="Тест")
+        self.assertTrue(backup_path.exists())
+        
+        backups = self.backup.list_backups()
+        self.assertEqual(len(backups), 1)
+        self.assertEqual(backups[0]['metadata']['comment'], "Тест")
+        
+        metadata = self.backup.get_backup_metadata(backup_path)
+        self.assertIn('documents', metadata['included_directories'])
+        
+        shutil.rmtree(self.base_dir / 'documents')
+        success = self.backup.restore_backup(backup_path, create_backup_before=False)
+        
+        self.assertTrue(success)
+        restored = self.base_dir / 'documents' / 'Орг' / 'Отдел' / 'doc.md'
+        self.assertEqual(restored.read_text(encoding='utf-8'), "# Документ\n\nСодержимое.")
+    
+    def test_list_backups_uses_index(self):
+        """Тест журнала резервных копий: удаленные архивы исключаются из списка"""
+        backup_path = self.backup.create_backup(comment="Из журнала")
+        index_path = self.backup_dir / 'index.ndjson'
+        self.assertTrue(index_path.exists())
+        
+        backups = self.backup.list_backups()
+        self.assertEqual(backups[0]['metadata']['comment'], "Из журнала")
+        self.assertEqual(backups[0]['size'], backup_path.stat().st_size)
+        
+        backup_path.unlink()
+        self.assertEqual(self.backup.list_backups(), [])
+        self.assertIn('"deleted": true', index_path.read_text(encoding='utf-8'))
+    
+    def test_backup_skips_junk_files(self):
+        """Тест исключения служебных файлов из резервной копии"""
+        doc_dir = self.base_dir / 'documents'
+        (doc_dir / '__pycache__').mkdir()
+        (doc_dir / '__pycache__' / 'module.pyc').write_bytes(b'\x00')
+        (doc_dir / 'convert.log').write_text("log", encoding='utf-8')
+        backup_path = self.backup.create_backup()
+        
+        shutil.rmtree(doc_dir)
+        success = self.backup.restore_backup(backup_path, create_backup_before=False)
+        
+        self.assertTrue(success)
+        self.assertTrue((doc_dir / 'Орг' / 'Отдел' / 'doc.md').exists())
+        self.assertFalse((doc_dir / '__pycache__').exists())
+        self.assertFalse((doc_dir / 'convert.log').exists())
+    
+    def test_restore_replaces_existing_directory(self):
+        """Тест замены существующих данных при восстановлении"""
+        (self.base_dir / 'html').mkdir()
+        (self.base_dir / 'html' / 'page.html').write_text("<p>Старое</p>", encoding='utf-8')
+        backup_path = self.backup.create_backup(include_html=False)
+        
+        stale_file = self.base_dir / 'documents' / 'stale.md'
+        stale_file.write_text("# Лишний документ", encoding='utf-8')
+        success = self.backup.restore_backup(backup_path, restore_html=False,
+                                             create_backup_before=False)
+        
+        self.assertTrue(success)
+        self.assertFalse(stale_file.exists())
+        self.assertTrue((self.base_dir / 'html' / 'page.html').exists())
+        self.assertFalse((self.base_dir / '.restore_temp').exists())
+        self.assertFalse((self.base_dir / '.documents.restore_old').exists())
+    
+    @unittest.skipUnless(HAS_PYZSTD, "pyzstd не установлен")
+    def test_zstd_archive_without_dictionary(self):
+        """Тест: архив сжимается без словаря и читается стандартным zstd"""
+        backup_path = self.backup.create_backup()
+        
+        self.assertEqual(list(self.backup_dir.glob('*.zstddict')), [])
+        header = backup_path.read_bytes()[:ZSTD_FRAME_HEADER_MAX_SIZE]
+        self.assertTrue(header.startswith(ZSTD_MAGIC))
+        self.assertEqual(pyzstd.get_frame_info(header).dictionary_id, 0)
+    
+    @unittest.skipUnless(HAS_PYZSTD, "pyzstd не установлен")
+    def test_restore_zstd_dict_archive(self):
+        """Тест восстановления ранее созданного архива со встроенным словарем"""
+        doc_dir = self.base_dir / 'documents' / 'Орг' / 'Отдел'
+        samples = [f"# Документ {i}\n\nПриказ по отделу номер {i}.".encode('utf-8') * 20
+                   for i in range(300)]
+        zstd_dict = pyzstd.train_dict(samples, 4096)
+        
+        tar_buffer = BytesIO()
+        with tarfile.open(fileobj=tar_buffer, mode='w') as tar:
+            tar.add(self.base_dir / 'documents', arcname='documents')
+        backup_path = self.backup_dir / 'backup_20240101_120000.tar.zst'
+        with open(backup_path, 'wb') as f:
+            f.write(ZSTD_SKIPPABLE_HEADER.pack(ZSTD_SKIPPABLE_MAGIC, len(zstd_dict.dict_content)))
+            f.write(zstd_dict.dict_content)
+            f.write(pyzstd.compress(tar_buffer.getvalue(), zstd_dict=zstd_dict))
+        
+        shutil.rmtree(self.base_dir / 'documents')
+        success = self.backup.restore_backup(backup_path, create_backup_before=False)
+        
+        self.assertTrue(success)
+        self.assertTrue((doc_dir / 'doc.md').exists())
+    
+    def test_invalid_compression_level(self):
+        """Тест отказа при недопустимом уровне сжатия до создания архива"""
+        for level in (0, 25):
+            with self.assertRaises(ValueError):
+                self.backup.create_backup(level=level)
+        self.assertEqual(self.backup.list_backups(), [])
+    
+    def test_restore_legacy_tar_gz(self):
+        """Тест восстановления из архива старого формата tar.gz"""
+        backup_path = self.backup_dir / 'backup_20240101_120000.tar.gz'
+        with tarfile.open(backup_path, 'w:gz') as tar:
+            tar.add(self.base_dir / 'documents', arcname='documents')
+        
+        backups = self.backup.list_backups()
+        self.assertEqual(backups[0]['timestamp'], '20240101_120000')
+        
+        shutil.rmtree(self.base_dir / 'documents')
+        success = self.backup.restore_backup(backup_path, create_backup_before=False)
+        
+        self.assertTrue(success)
+        self.assertTrue((self.base_dir / 'documents' / 'Орг' / 'Отдел' / 'doc.md').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Тесты для конвертера документов
+"""
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+import os
+
+# Добавляем путь к скриптам
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from document_converter import DocumentConverter
+
+
+class TestDocumentConverter(unittest.TestCase):
+    """Тесты для DocumentConverter"""
+    
+    def setUp(self):
+        """Создание временного дерева документов"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        doc_dir = self.test_dir / 'documents' / 'org' / 'dept'
+        doc_dir.mkdir(parents=True)
+        for i in range(1, 6):
+            (doc_dir / f'doc{i}.md').write_text(f"""---
+title: Документ {i}
+number: ДОК-{i}
+organization: org
+type: положение
+---
+
+# Документ {i}
+
+См. [следующий документ](doc:ДОК-{i % 5 + 1}) и [несуществующий](doc:ДОК-99).
+""", encoding='utf-8')
+    
+    def tearDown(self):
+        """Удаление временной директории"""
+        shutil.rmtree(self.test_dir)
+    
+    def _converter(self, name: str) -> DocumentConverter:
+        """Создает конвертер с отдельной директорией результатов"""
+        out_dir = self.test_dir / name
+        out_dir.mkdir()
+        return DocumentConverter(str(self.test_dir / 'documents'), str(out_dir / 'html'),
+                                 str(out_dir / 'pdf'), str(self.test_dir / 'templates'))
+    
+    def _convert(self, name: str, workers: int):
+        """Конвертирует все документы в HTML; документ без содержимого дает ошибку"""
+        converter = self._converter(name)
+        documents = converter.parser.get_all_documents()
+        del documents[2]['content']
+        with self.assertLogs('document_converter', level='INFO') as logs:
+            results = converter.convert_documents(documents, formats=['html'], workers=workers)
+        html_dir = converter.html_dir
+        html = {str(path.relative_to(html_dir)): path.read_text(encoding='utf-8')
+                for path in results['html']}
+        return results, html, logs.output
+    
+    def test_convert_documents_workers(self):
+        """Тест одинаковых результатов конвертации в процессе и в пуле процессов"""
+        results_seq, html_seq, logs_seq = self._convert('seq', workers=1)
+        results_pool, html_pool, logs_pool = self._convert('pool', workers=2)
+        
+        self.assertEqual(results_seq['pdf'], [])
+        self.assertEqual(results_pool['pdf'], [])
+        # Документ без содержимого пропущен, порядок остальных сохранен
+        expected = [f'org/dept/doc{i}.html' for i in (1, 2, 4, 5)]
+        self.assertEqual(list(html_seq), expected)
+        self.assertEqual(list(html_pool), expected)
+        self.assertEqual(html_seq, html_pool)
+        
+        # Ссылки разрешены по индексу документов пакета
+        self.assertIn('href="/document/org/dept/doc2.md"', html_seq['org/dept/doc1.html'])
+        self.assertIn('broken-doc-link', html_seq['org/dept/doc1.html'])
+        
+        # Ошибка документа выводится в журнал, итог учитывает только созданные файлы
+        self.assertTrue(any('Ошибка при генерации HTML' in line and 'doc3.md' in line
+                            for line in logs_seq))
+        for logs in (logs_seq, logs_pool):
+            self.assertIn('HTML файлов создано: 4', logs[-1])
+    
+    def test_convert_all_default_workers(self):
+        """Тест convert_all (пул процессов по числу ядер) против конвертации в процессе"""
+        pool = self._converter('pool').convert_all(formats=['html'], verbose=False)
+        seq = self._converter('seq').convert(formats=['html'], verbose=False, workers=1)
+        
+        self.assertEqual(len(pool['html']), 5)
+        for pool_path, seq_path in zip(pool['html'], seq['html']):
+            self.assertEqual(pool_path.name, seq_path.name)
+            self.assertEqual(pool_path.read_text(encoding='utf-8'), seq_path.read_text(encoding='utf-8'))
+    
+    def test_convert_documents_sees_changes_between_batches(self):
+        """Тест: индекс ссылок строится заново для каждого пакета"""
+        converter = self._converter('out')
+        doc_path = converter.html_dir / 'org' / 'dept' / 'doc1.html'
+        converter.convert_documents(converter.parser.get_all_documents(),
+                                    formats=['html'], verbose=False, workers=1)
+        self.assertIn('Документ не найден: ДОК-99', doc_path.read_text(encoding='utf-8'))
+        
+        (self.test_dir / 'documents' / 'org' / 'dept' / 'doc99.md').write_text(
+            "---\ntitle: Документ 99\nnumber: ДОК-99\norganization: org\n---\n\n# Документ 99\n",
+            encoding='utf-8')
+        converter.convert_documents(converter.parser.get_all_documents(),
+                                    formats=['html'], verbose=False, workers=1)
+        self.assertIn('href="/document/org/dept/doc99.md"', doc_path.read_text(encoding='utf-8'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -83,6 +83,26 @@ status: действующий
         
         self.assertEqual(len(documents), 3)
     
+    def test_get_all_documents_cache_invalidation(self):
+        """Тест обновления кэша документов при изменении файлов"""
+        doc_file = self.doc_dir / "doc.md"
+        doc_file.write_text("---\ntitle: Старый\n---\n# Документ\n", encoding='utf-8')
+        
+        documents = self.parser.get_all_documents()
+        self.assertEqual(documents[0]['title'], 'Старый')
+        
+        # Изменения возвращенных словарей не попадают в кэш
+        del documents[0]['content']
+        self.assertIn('content', self.parser.get_all_documents()[0])
+        
+        doc_file.write_text("---\ntitle: Новый заголовок\n---\n# Документ\n", encoding='utf-8')
+        (self.doc_dir / "doc2.md").write_text("# Второй\n", encoding='utf-8')
+        
+        documents = self.parser.get_all_documents()
+        self.assertEqual(len(documents), 2)
+        titles = {doc.get('title') for doc in documents}
+        self.assertIn('Новый заголовок', titles)
+    
     def test_filter_documents(self):
         """Тест фильтрации документов"""
         # Создаем документы с разными метаданными
@@ -113,6 +133,37 @@ department: Отдел2
         filtered = self.parser.filter_documents(department='Отдел1')
         self.assertEqual(len(filtered), 1)
         self.assertEqual(filtered[0]['department'], 'Отдел1')
+    
+    def test_find_document_by_number(self):
+        """Тест поиска документа по номеру с учетом организации"""
+        for org in ('Орг1', 'Орг2'):
+            doc_dir = self.doc_dir / org / 'Отдел'
+            doc_dir.mkdir(parents=True)
+            (doc_dir / 'doc.md').write_text(f"---\nnumber: ПОЛ-001\ntitle: {org}\n---\n# Документ\n",
+                                            encoding='utf-8')
+        
+        doc = self.parser.find_document_by_number('ПОЛ-001', 'Орг2')
+        self.assertEqual(doc['organization'], 'Орг2')
+        self.assertIsNotNone(self.parser.find_document_by_number('ПОЛ-001'))
+        self.assertIsNone(self.parser.find_document_by_number('ПОЛ-001', 'Орг3'))
+        self.assertIsNone(self.parser.find_document_by_number('ПОЛ-999'))
+        self.assertIsNone(self.parser.find_document_by_number('ПОЛ-001', ['Орг1']))
+    
+    def test_document_index_snapshot(self):
+        """Тест поиска по индексу: дерево проверяется при получении индекса"""
+        doc_dir = self.doc_dir / 'Орг' / 'Отдел'
+        doc_dir.mkdir(parents=True)
+        (doc_dir / 'doc.md').write_text("---\nnumber: ПОЛ-001\n---\n# Документ\n", encoding='utf-8')
+        
+        index = self.parser.get_document_index()
+        self.assertIn('Орг/Отдел/doc.md', index['by_path'])
+        doc = self.parser.find_document_by_number('ПОЛ-001', 'Орг', index=index)
+        self.assertEqual(doc['relative_path'], 'Орг/Отдел/doc.md')
+        
+        # Новый документ виден в новом индексе, но не в полученном ранее
+        (doc_dir / 'doc2.md').write_text("---\nnumber: ПОЛ-002\n---\n# Документ\n", encoding='utf-8')
+        self.assertIsNone(self.parser.find_document_by_number('ПОЛ-002', index=index))
+        self.assertIsNotNone(self.parser.find_document_by_number('ПОЛ-002'))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+"""
+Тесты для конвертера DOCX
+"""
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+import os
+
+# Добавляем путь к скриптам
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from docx_converter import DocxConverter, DocxBuilder, HAS_DOCX
+
+if HAS_DOCX:
+    from docx import Document
+
+
+MARKDOWN_FIXTURE = """# Раздел
+
+Текст с **жирным** и *курсивом*.
+Вторая строка<br>третья строка
+
+1. Первый
+2. Второй
+    - Вложенный
+3. Третий
+
+##### Пятый уровень
+
+###### Шестой уровень
+
+| Имя | Должность |
+| --- | --- |
+| Иванов | Директор |
+"""
+
+
+@unittest.skipUnless(HAS_DOCX, "python-docx не установлен")
+class TestDocxConverter(unittest.TestCase):
+    """Тесты для DocxConverter"""
+    
+    def setUp(self):
+        """Создание временной директории для тестов"""
+        self.test_dir = tempfile.mkdtemp()
+        self.converter = DocxConverter(self.test_dir, os.path.join(self.test_dir, 'versions'))
+    
+    def tearDown(self):
+        """Удаление временной директории"""
+        shutil.rmtree(self.test_dir)
+    
+    def _convert(self, markdown_content: str):
+        """Конвертирует Markdown в DOCX без метаданных и открывает результат"""
+        output_path = self.converter.markdown_to_docx(
+            markdown_content, {}, Path(self.test_dir) / 'out.docx',
+            include_metadata=False, include_technical=False
+        )
+        return Document(str(output_path))
+    
+    @staticmethod
+    def _paragraph(doc, text: str):
+        """Находит абзац по началу текста"""
+        return next(p for p in doc.paragraphs if p.text.startswith(text))
+    
+    def test_markdown_to_docx_styles(self):
+        """Тест стилей заголовков и списков"""
+        doc = self._convert(MARKDOWN_FIXTURE)
+        
+        self.assertEqual(self._paragraph(doc, 'Раздел').style.name, 'Heading 1')
+        self.assertEqual(self._paragraph(doc, 'Первый').style.name, 'List Number')
+        self.assertEqual(self._paragraph(doc, 'Вложенный').style.name, 'List Bullet')
+        # После вложенного списка продолжается нумерованный
+        self.assertEqual(self._paragraph(doc, 'Третий').style.name, 'List Number')
+        # h5 и h6 записываются заголовками 4 уровня
+        self.assertEqual(self._paragraph(doc, 'Пятый уровень').style.name, 'Heading 4')
+        self.assertEqual(self._paragraph(doc, 'Шестой уровень').style.name, 'Heading 4')
+    
+    def test_markdown_to_docx_runs(self):
+        """Тест жирного и курсивного начертания и переносов строк"""
+        doc = self._convert(MARKDOWN_FIXTURE)
+        para = self._paragraph(doc, 'Текст с')
+        runs = [(run.text, bool(run.bold), bool(run.italic)) for run in para.runs]
+        
+        self.assertIn(('жирным', True, False), runs)
+        self.assertIn(('курсивом', False, True), runs)
+        self.assertEqual(para.text, 'Текст с жирным и курсивом.\nВторая строка\nтретья строка')
+        breaks = [run for run in para.runs if run._r.xpath('./w:br')]
+        self.assertEqual(len(breaks), 2)
+    
+    def test_markdown_to_docx_table(self):
+        """Тест ячеек таблицы и жирной строки заголовка"""
+        doc = self._convert(MARKDOWN_FIXTURE)
+        self.assertEqual(len(doc.tables), 1)
+        rows = doc.tables[0].rows
+        
+        self.assertEqual([cell.text for cell in rows[0].cells], ['Имя', 'Должность'])
+        self.assertEqual([cell.text for cell in rows[1].cells], ['Иванов', 'Директор'])
+        header_runs = [run for cell in rows[0].cells for p in cell.paragraphs for run in p.runs]
+        self.assertTrue(header_runs and all(run.bold for run in header_runs))
+        body_runs = [run for cell in rows[1].cells for p in cell.paragraphs for run in p.runs]
+        self.assertFalse(any(run.bold for run in body_runs))
+    
+    def test_html_quoted_attribute_and_unclosed_bold(self):
+        """Тест '>' в значении атрибута и незакрытого <b> внутри абзаца"""
+        doc = Document()
+        builder = DocxBuilder(doc)
+        builder.feed_html('<p><span title="a>b">текст</span></p>'
+                          '<p><b>жирный</p><p>обычный</p>')
+        builder.finish()
+        
+        self.assertEqual([p.text for p in doc.paragraphs], ['текст', 'жирный', 'обычный'])
+        self.assertTrue(doc.paragraphs[1].runs[0].bold)
+        self.assertFalse(doc.paragraphs[2].runs[0].bold)
+    
+    def test_docx_to_markdown_block_order(self):
+        """Тест порядка абзацев и таблиц и схлопывания пустых строк"""
+        doc = Document()
+        doc.add_paragraph('До таблицы')
+        doc.add_paragraph('')
+        doc.add_paragraph('')
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = 'Имя'
+        table.cell(0, 1).text = 'Должность'
+        table.cell(1, 0).text = 'Иванов'
+        table.cell(1, 1).text = 'Директор'
+        doc.add_paragraph('')
+        doc.add_paragraph('После таблицы')
+        docx_path = Path(self.test_dir) / 'in.docx'
+        doc.save(str(docx_path))
+        
+        result = self.converter.docx_to_markdown(docx_path, include_metadata=False)
+        
+        self.assertEqual(result.split('\n'), [
+            'До таблицы',
+            '',
+            '| Имя | Должность |',
+            '| --- | --- |',
+            '| Иванов | Директор |',
+            '',
+            'После таблицы',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Тесты для парсера карточек сотрудников
+"""
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+import os
+
+# Добавляем путь к скриптам
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from employee_parser import EmployeeParser
+
+
+class TestEmployeeParser(unittest.TestCase):
+    """Тесты для EmployeeParser"""
+    
+    def setUp(self):
+        """Создание временной структуры documents/<организация>/<отдел>/сотрудники"""
+        self.test_dir = tempfile.mkdtemp()
+        self.parser = EmployeeParser(self.test_dir)
+        
+        self._write_card('Бухгалтерия', 'ivanov.md', 'Иванов Иван Иванович', 'Бухгалтер')
+        self._write_card('Отдел кадров', 'ivanov.md', 'Иванов Иван Иванович', 'Инспектор')
+        self._write_card('Отдел кадров', 'petrov.md', 'Петров Петр Петрович', 'Начальник отдела')
+    
+    def tearDown(self):
+        """Удаление временной директории"""
+        shutil.rmtree(self.test_dir)
+    
+    def _write_card(self, department: str, file_name: str, full_name: str,
+                    position: str, extra: str = '') -> Path:
+        """Записывает карточку сотрудника и возвращает путь к ней"""
+        emp_dir = Path(self.test_dir) / 'Организация' / department / 'сотрудники'
+        emp_dir.mkdir(parents=True, exist_ok=True)
+        card = emp_dir / file_name
+        card.write_text(f"""---
+full_name: {full_name}
+position: {position}
+{extra}---
+
+# {full_name}
+
+Карточка сотрудника.
+""", encoding='utf-8')
+        return card
+    
+    @staticmethod
+    def _touch(path: Path):
+        """Сдвигает время изменения файла (изменение заметно даже при грубом mtime)"""
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    
+    def test_get_employee_by_name(self):
+        """Тест поиска сотрудника по ФИО с отделом и без него"""
+        employee = self.parser.get_employee_by_name('Петров Петр Петрович')
+        self.assertIsNotNone(employee)
+        self.assertEqual(employee['position'], 'Начальник отдела')
+        self.assertEqual(employee['department'], 'Отдел кадров')
+        self.assertIn('Карточка сотрудника', employee['content'])
+        
+        employee = self.parser.get_employee_by_name('Иванов Иван Иванович', department='Отдел кадров')
+        self.assertEqual(employee['position'], 'Инспектор')
+        employee = self.parser.get_employee_by_name('Иванов Иван Иванович', department='Бухгалтерия')
+        self.assertEqual(employee['position'], 'Бухгалтер')
+        
+        # Нет в указанном отделе - ищется по всей организации
+        employee = self.parser.get_employee_by_name('Петров Петр Петрович', department='Бухгалтерия')
+        self.assertEqual(employee['position'], 'Начальник отдела')
+        
+        self.assertIsNone(self.parser.get_employee_by_name('Сидоров Сидор Сидорович'))
+        self.assertIsNone(self.parser.get_employee_by_name('Петров Петр Петрович',
+                                                            organization='Другая организация'))
+    
+    def test_name_index_follows_card_changes(self):
+        """Тест обновления индекса по ФИО после изменения и добавления карточек"""
+        self.assertEqual(self.parser.get_employee_by_name('Петров Петр Петрович')['position'],
+                         'Начальник отдела')
+        
+        card = self._write_card('Отдел кадров', 'petrov.md', 'Петров Петр Петрович', 'Заместитель')
+        self._touch(card)
+        self.assertEqual(self.parser.get_employee_by_name('Петров Петр Петрович')['position'],
+                         'Заместитель')
+        
+        # ФИО изменено в карточке: старое имя больше не находится
+        card = self._write_card('Отдел кадров', 'petrov.md', 'Петров Павел Петрович', 'Заместитель')
+        self._touch(card)
+        self.assertIsNone(self.parser.get_employee_by_name('Петров Петр Петрович'))
+        self.assertIsNotNone(self.parser.get_employee_by_name('Петров Павел Петрович'))
+        
+        self.assertIsNone(self.parser.get_employee_by_name('Сидоров Сидор Сидорович'))
+        self._write_card('Бухгалтерия', 'sidorov.md', 'Сидоров Сидор Сидорович', 'Кассир')
+        employee = self.parser.get_employee_by_name('Сидоров Сидор Сидорович')
+        self.assertIsNotNone(employee)
+        self.assertEqual(employee['department'], 'Бухгалтерия')
+    
+    def test_long_front_matter(self):
+        """Тест карточки, front matter которой длиннее читаемого начала файла"""
+        notes = 'примечание ' * 1000
+        card = self._write_card('Бухгалтерия', 'sidorov.md', 'Сидоров Сидор Сидорович', 'Кассир',
+                                extra=f'notes: {notes}\nphone: 123-45-67\n')
+        self.assertGreater(len(card.read_text(encoding='utf-8')), EmployeeParser.METADATA_READ_SIZE)
+        
+        metadata = self.parser.parse_employee(card, metadata_only=True)
+        self.assertEqual(metadata['phone'], '123-45-67')
+        self.assertNotIn('content', metadata)
+        full = self.parser.parse_employee(card)
+        full.pop('content')
+        self.assertEqual(metadata, full)
+        
+        employee = self.parser.get_employee_by_name('Сидоров Сидор Сидорович')
+        self.assertEqual(employee['phone'], '123-45-67')
+        self.assertEqual(employee['notes'], notes.strip())
+        self.assertIn('Карточка сотрудника', employee['content'])
+
+
+if __name__ == '__main__':
+    unittest.main()